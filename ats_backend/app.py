@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, current_app, request, jsonify
 import mysql.connector
 from mysql.connector import Error
 from flask_cors import CORS
@@ -6,37 +6,28 @@ import uuid
 import os
 import re
 from datetime import datetime
-from pathlib import Path
 from werkzeug.utils import secure_filename
+# utils.db loads .env / config.env: import it before modules that read settings at import time
+from utils.db import get_db_connection, db_config, get_pool_stats, get_replica_stats, get_shard_stats, get_transaction_stats, init_app as init_db, request_connection, run_transaction
 from utils.event_notifier import notify_event
 from utils.auth import get_current_user
-from utils.db import get_db_connection, db_config
+from utils.migrations import check_schema, enum_values, schema_required
+from utils import db, deadline, llm_gateway, screening_cache
+from utils.pagination import InvalidPageRequest, get_page_request, paginate, sort_key
+from utils.streaming import stream_format, stream_select
+from utils.archive import archive_source, include_archived
+from utils.sharding import get_pipeline_connection, release_pipeline_connection
+from utils.loaders import loaders
+from utils.fanout import Query, fan_out
 from controllers.reports_controller import reports_bp
-try:
-    from dotenv import load_dotenv
-except ImportError:
-    load_dotenv = None
 
+# Routes live on a blueprint; create_app() builds the Flask app around it, so
+# importing this module doesn't create an app, touch the DB or the filesystem
+core_bp = Blueprint("core", __name__)
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}}, supports_credentials=True)
-app.register_blueprint(reports_bp)
 
-# -------------------------------------
-# Environment loading (.env preferred; fallback to config.env for local dev)
-# -------------------------------------
-if load_dotenv:
-    # Try .env first, then fallback to config.env
-    env_file = Path(__file__).parent / ".env"
-    if not env_file.exists():
-        env_file = Path(__file__).parent / "config.env"
-    if env_file.exists():
-        load_dotenv(dotenv_path=env_file, override=True)
-        print(f"✅ Loaded environment from: {env_file.name}")
-    else:
-        print("⚠️ No .env or config.env found, using defaults")
-else:
-    print("⚠️ python-dotenv not installed, using system environment variables")
+def handle_invalid_page(e):
+    return jsonify({"error": e.description}), 400
 
 # -------------------------------------
 # Database connection configuration
@@ -44,301 +35,25 @@ else:
 # Moved to utils/db.py
 
 def initialize_database():
-    """Create tables if they do not exist."""
+    """
+    Verify the schema is at the latest migration. Costs one query when current;
+    schema changes themselves are applied with `python manage.py migrate`.
+    """
     try:
-        conn = get_db_connection()
-        if not conn:
-            print("❌ DB connection failed")
-            return
-
-        cursor = conn.cursor()
-
-        # ---------------------------
-        # USERS TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                email VARCHAR(150) NOT NULL UNIQUE,
-                password_hash VARCHAR(255) NOT NULL,
-                role ENUM('ADMIN','DELIVERY_MANAGER','TEAM_LEAD','RECRUITER','CLIENT','CANDIDATE') DEFAULT 'RECRUITER',
-                phone VARCHAR(20),
-                status VARCHAR(20) DEFAULT 'ACTIVE',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # ---------------------------
-        # USERSDATA TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS usersdata (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100),
-                email VARCHAR(150) UNIQUE,
-                phone VARCHAR(20),
-                role VARCHAR(50),
-                status VARCHAR(20) DEFAULT 'ACTIVE',
-                password_hash VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # ---------------------------
-        # CLIENTS TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS clients (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                contact_person VARCHAR(255),
-                email VARCHAR(255),
-                phone VARCHAR(50),
-                address TEXT,
-                status ENUM('ACTIVE','INACTIVE') DEFAULT 'ACTIVE',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        #----------------------------
-        #Interviewers TABLE
-        #----------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS interviews (
-                       id INT AUTO_INCREMENT PRIMARY KEY,
-                candidate_id INT NOT NULL,
-                requirement_id VARCHAR(64),
-                category VARCHAR(50),
-                stage VARCHAR(100),
-                date DATE,
-                time TIME,
-                duration VARCHAR(50),
-                mode VARCHAR(50),
-                location VARCHAR(255),
-                interviewer VARCHAR(255),
-                notes TEXT,
-                status VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)    
-
-        # ---------------------------
-        # REQUIREMENTS TABLE
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requirements (
-                id VARCHAR(50) PRIMARY KEY,
-                client_id INT,
-                title VARCHAR(255),
-                description TEXT,
-                location VARCHAR(100),
-                skills_required VARCHAR(255),
-                experience_required FLOAT,
-                ctc_range VARCHAR(100),
-                no_of_rounds INT DEFAULT 1,
-                status VARCHAR(50) DEFAULT 'OPEN',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_by VARCHAR(100),
-                FOREIGN KEY (client_id) REFERENCES clients(id)
-            );
-        """)
-
-        # Check for no_of_rounds column in requirements
-        cursor.execute("SHOW COLUMNS FROM requirements LIKE 'no_of_rounds'")
-        if not cursor.fetchone():
-            print("⚠️ Adding 'no_of_rounds' column to requirements...")
-            try:
-                cursor.execute("ALTER TABLE requirements ADD COLUMN no_of_rounds INT DEFAULT 1")
-            except Exception as e:
-                print(f"❌ Error adding no_of_rounds: {e}")
-
-        # ---------------------------
-        # REQUIREMENT_ALLOCATIONS
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requirement_allocations (
-                id VARCHAR(50) PRIMARY KEY,
-                requirement_id VARCHAR(50),
-                recruiter_id INT,
-                assigned_by INT,
-                status VARCHAR(20) DEFAULT 'ASSIGNED',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id),
-                FOREIGN KEY (recruiter_id) REFERENCES users(id),
-                FOREIGN KEY (assigned_by) REFERENCES users(id)
-            );
-        """)
-
-        # ---------------------------
-        # CANDIDATES TABLE
-        # ---------------------------
-        cursor.execute("""
-    CREATE TABLE IF NOT EXISTS candidates (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        name VARCHAR(255),
-        email VARCHAR(255),
-        phone VARCHAR(20),
-        skills TEXT,
-        education TEXT,
-        experience TEXT,
-        ctc VARCHAR(50),          
-        ectc VARCHAR(50),         
-        resume_filename VARCHAR(255),
-        created_by INT,
-        source VARCHAR(50),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (created_by) REFERENCES users(id)
-    );
-""")
-
-
-        # ---------------------------
-        # REQUIREMENT STAGES (NEW)
-        # ---------------------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requirement_stages (
-                id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                requirement_id VARCHAR(50),
-                stage_order INT,
-                stage_name VARCHAR(255),
-                is_mandatory BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id)
-            );
-        """)
-
-        # ---------------------------
-        # CANDIDATE PROGRESS (UPDATED)
-        # ---------------------------
-        # Check if table exists to decide on creation or update
-        cursor.execute("SHOW TABLES LIKE 'candidate_progress'")
-        if not cursor.fetchone():
-            cursor.execute("""
-                CREATE TABLE candidate_progress (
-                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                    candidate_id INT,
-                    requirement_id VARCHAR(50),
-                    stage_id BIGINT,
-                    stage_name VARCHAR(255),
-                    status ENUM('PENDING','IN_PROGRESS','COMPLETED','REJECTED','REVIEW_REQUIRED') DEFAULT 'PENDING',
-                    decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
-                    manual_decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
-                    category VARCHAR(50),
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id),
-                    FOREIGN KEY (candidate_id) REFERENCES candidates(id),
-                    FOREIGN KEY (requirement_id) REFERENCES requirements(id),
-                    FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)
-                );
-            """)
-        else:
-            # Table exists, attempt to add new columns if they don't exist
-            print("⚠️ 'candidate_progress' exists. Checking for schema updates...")
-            
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'stage_id'")
-            if not cursor.fetchone():
-                print("   -> Adding 'stage_id' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN stage_id BIGINT")
-                    cursor.execute("ALTER TABLE candidate_progress ADD CONSTRAINT fk_cp_stage FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)")
-                except Exception as e:
-                    print(f"   ❌ Error adding stage_id: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'stage_name'")
-            if not cursor.fetchone():
-                print("   -> Adding 'stage_name' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN stage_name VARCHAR(255)")
-                except Exception as e:
-                    print(f"   ❌ Error adding stage_name: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'decision'")
-            if not cursor.fetchone():
-                print("   -> Adding 'decision' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'")
-                except Exception as e:
-                    print(f"   ❌ Error adding decision: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'manual_decision'")
-            if not cursor.fetchone():
-                print("   -> Adding 'manual_decision' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN manual_decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'")
-                except Exception as e:
-                    print(f"   ❌ Error adding manual_decision: {e}")
-
-            cursor.execute("SHOW COLUMNS FROM candidate_progress LIKE 'category'")
-            if not cursor.fetchone():
-                print("   -> Adding 'category' column...")
-                try:
-                    cursor.execute("ALTER TABLE candidate_progress ADD COLUMN category VARCHAR(50)")
-                except Exception as e:
-                    print(f"   ❌ Error adding category: {e}")
-
-            # Fix Unique Key for candidate_progress
-            print("   -> Checking unique key constraints...")
-            try:
-                # Try to drop the old unique key if it exists
-                cursor.execute("ALTER TABLE candidate_progress DROP INDEX uniq_progress")
-                print("   ✅ Dropped old unique key 'uniq_progress'")
-            except Exception:
-                pass # Key might not exist
-
-            try:
-                # Add the correct unique key
-                cursor.execute("ALTER TABLE candidate_progress ADD UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id)")
-                print("   ✅ Added unique key 'uniq_progress_stage'")
-            except Exception as e:
-                # print(f"   ℹ️ Unique key 'uniq_progress_stage' might already exist: {e}")
-                pass
-
-        # ---------------- CANDIDATE SCREENING ----------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS candidate_screening (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                candidate_id INT,
-                requirement_id VARCHAR(64),
-                ai_score FLOAT,
-                ai_rationale TEXT,
-                recommend VARCHAR(32),
-                red_flags TEXT,
-                model_version VARCHAR(50),
-                status ENUM('PENDING','DONE','ERROR') DEFAULT 'PENDING',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (candidate_id) REFERENCES candidates(id),
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id)
-            );
-        """)
-
-        # ---------------- ASSESSMENT QUEUE ----------------
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS assesment_queue (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                candidate_id INT NOT NULL,
-                requirement_id VARCHAR(64) NOT NULL,
-                status VARCHAR(32) DEFAULT 'PENDING',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (candidate_id) REFERENCES candidates(id),
-                FOREIGN KEY (requirement_id) REFERENCES requirements(id)
-            );
-        """)
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        print("✅ All required tables checked/created successfully")
-
+        current, latest = check_schema()
     except Exception as e:
-        print("❌ Error initializing DB:", e)
+        print("❌ Error checking DB schema:", e)
+        return False
+    if current is None:
+        print("❌ DB connection failed")
+        return False
+    if current < latest:
+        print(f"⚠️ Database schema is at version {current} but the code expects {latest}. "
+              f"Run `python manage.py migrate`.")
+        return False
+    print(f"✅ Database schema is current (version {current})")
+    return True
 
-# Debug: Print DB config (mask password for security)
-print(f"🔧 DB Config: host={db_config['host']}, user={db_config['user']}, database={db_config['database']}, password={'***' if db_config['password'] else '(empty)'}")
-
-
-app.config["UPLOAD_FOLDER"] = "./uploads/resumes"
-os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 ALLOWED_EXTENSIONS = {"pdf", "doc", "docx"}
 
 def allowed_file(filename):
@@ -346,23 +61,8 @@ def allowed_file(filename):
 
 
 def get_allowed_roles():
-    import re
-    conn = get_db_connection()
-    if not conn:
-        return []
-    cursor = conn.cursor()
-    cursor.execute("SHOW COLUMNS FROM users LIKE 'role'")
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
-
-    if not row:
-        return []
-
-    # row[1] contains: "enum('ADMIN','RECRUITER',...)"
-    enum_type = row[1]
-    roles = re.findall(r"'(.*?)'", enum_type)
-    return roles
+    # Process-wide schema metadata cache, no query per request (utils/migrations.py)
+    return enum_values("users", "role")
 
 
 # -------------------------------------
@@ -373,10 +73,27 @@ def get_allowed_roles():
 # -------------------------------------
 # Routes
 # -------------------------------------
-@app.route('/')
+@core_bp.route('/')
 def home():
     return 'ATS Backend is Running! 🚀'
 
+
+@core_bp.route('/api/db/stats', methods=['GET'])
+def db_stats():
+    """Connection pool usage, for sizing DB_POOL_SIZE from real traffic."""
+    return jsonify({
+        "pool": get_pool_stats(),
+        "replicas": get_replica_stats(),
+        "shards": get_shard_stats(),
+        "transactions": get_transaction_stats(),
+    }), 200
+
+
+@core_bp.route('/api/llm/stats', methods=['GET'])
+def llm_stats():
+    """LLM gateway config, circuit breaker state (closed / open / half_open) and screening cache hits."""
+    return jsonify(dict(llm_gateway.get_stats(), screening_cache=screening_cache.get_stats())), 200
+
 # @app.route('/testdb')
 # def test_db():
 #     try:
@@ -426,30 +143,7 @@ def ensure_admin_exists():
         print("❌ Error ensuring admin:", e)
 
 
-def ensure_user_status_defaults():
-    """Normalize users.status and enforce default at DB level."""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return
-        cursor = conn.cursor()
-        # Normalize existing rows
-        cursor.execute("UPDATE users SET status = 'ACTIVE' WHERE status IS NULL OR status = ''")
-        conn.commit()
-        # Enforce default at schema level
-        try:
-            cursor.execute("ALTER TABLE users MODIFY status VARCHAR(20) NOT NULL DEFAULT 'ACTIVE'")
-            conn.commit()
-        except Exception:
-            # Ignore if permissions or already set
-            pass
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        print("⚠️ Could not enforce user status defaults:", e)
-
-
-@app.route("/roles", methods=["GET"])
+@core_bp.route("/roles", methods=["GET"])
 def roles_endpoint():
     """
     Returns JSON: { "roles": ["ADMIN","RECRUITER", ...] }
@@ -458,12 +152,14 @@ def roles_endpoint():
     try:
         roles = get_allowed_roles()
         return jsonify({"roles": roles}), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"roles": [], "error": str(e)}), 500
 
 
 
-@app.route("/submit-candidate", methods=["POST"])
+@core_bp.route("/submit-candidate", methods=["POST"])
 def submit_candidate():
     try:
         # ------------------- Form Data -------------------
@@ -488,7 +184,7 @@ def submit_candidate():
         filename = None
         if resume and allowed_file(resume.filename):
             filename = secure_filename(resume.filename)
-            resume.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
+            resume.save(os.path.join(current_app.config["UPLOAD_FOLDER"], filename))
         elif resume:
             return jsonify({"message": "Invalid file type"}), 400
 
@@ -536,94 +232,45 @@ def submit_candidate():
 
         return jsonify({"message": f"✅ Candidate '{name}' submitted successfully!"}), 201
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error:", e)
         return jsonify({"message": "❌ Error submitting candidate", "error": str(e)}), 500
 
 
-@app.route("/get-candidates", methods=["GET"])
+@core_bp.route("/get-candidates", methods=["GET"])
+@schema_required
 def get_candidates():
+    page = get_page_request()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # 1️⃣ Ensure correct database
-        cursor.execute("SELECT DATABASE()")
-        db_row = cursor.fetchone()
-        print("🟢 Current DB check:", db_row)
-
-        db_name = db_row.get("DATABASE()") if db_row else None
-
-        if not db_name or db_name.lower() != "ats_system":
-            print("⚠ Switching to ats database...")
-            cursor.execute("USE ats_system")
-            conn.commit()
-
-        # 2️⃣ Create table if it doesn't exist
-        cursor.execute("SHOW TABLES LIKE 'candidates'")
-        if not cursor.fetchone():
-            print("⚠ 'candidates' table not found — creating now...")
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS candidates (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    email VARCHAR(100) NOT NULL,
-                    phone VARCHAR(20),
-                    skills TEXT,
-                    education TEXT,
-                    experience TEXT,
-                    resume_filename VARCHAR(255),
-                    ctc VARCHAR(50),
-                    ectc VARCHAR(50),
-                    created_by INT DEFAULT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users(id)
-                )
-            """)
-            conn.commit()
-            print("✅ 'candidates' table created successfully!")
-
-        # 3️⃣ Ensure ctc + ectc columns exist
-        cursor.execute("""
-            SELECT COLUMN_NAME 
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA='ats_system'
-            AND TABLE_NAME='candidates'
-        """)
-        cols = [row["COLUMN_NAME"] for row in cursor.fetchall()]
-
-        if "ctc" not in cols:
-            print("⚠ Adding 'ctc' column")
-            cursor.execute("ALTER TABLE candidates ADD COLUMN ctc VARCHAR(50)")
-            conn.commit()
-
-        if "ectc" not in cols:
-            print("⚠ Adding 'ectc' column")
-            cursor.execute("ALTER TABLE candidates ADD COLUMN ectc VARCHAR(50)")
-            conn.commit()
-
-        # 4️⃣ Role-based filtering
+        # Role-based filtering
         user_id = request.args.get("user_id", type=int)
         user_role = request.args.get("user_role", "").upper()
 
+        where, params = None, ()
         if user_role == "RECRUITER" and user_id:
-            cursor.execute(
-                "SELECT * FROM candidates WHERE created_by=%s ORDER BY id DESC",
-                (user_id,)
-            )
-        elif user_role in ["ADMIN", "DELIVERY_MANAGER"]:
-            cursor.execute("SELECT * FROM candidates ORDER BY id DESC")
-        else:
-            cursor.execute("SELECT * FROM candidates ORDER BY id DESC")
+            where, params = "created_by=%s", (user_id,)
 
-        rows = cursor.fetchall()
+        # Large exports: stream rows instead of building the whole list
+        fmt = stream_format()
+        if fmt and page is None:
+            return stream_select("*", "candidates", [sort_key("id")], fmt, where, params)
+
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        result = paginate(cursor, "*", "candidates", [sort_key("id")], page, where, params)
+        rows = result if page is None else result["items"]
         print(f"✅ Found {len(rows)} candidates")
 
         cursor.close()
         conn.close()
 
-        return jsonify(rows), 200
+        return jsonify(result), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error:", str(e))
         return jsonify({"error": str(e)}), 500
@@ -634,7 +281,7 @@ def get_candidates():
 
 # --------------------------------------------------------
 
-@app.route("/update-candidate/<int:id>", methods=["PUT"])
+@core_bp.route("/update-candidate/<int:id>", methods=["PUT"])
 def update_candidate(id):
     try:
         name = request.form.get("name")
@@ -656,7 +303,7 @@ def update_candidate(id):
 
         if resume and allowed_file(resume.filename):
             filename = secure_filename(resume.filename)
-            resume.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
+            resume.save(os.path.join(current_app.config["UPLOAD_FOLDER"], filename))
 
             cursor.execute("""
                 UPDATE candidates 
@@ -679,13 +326,16 @@ def update_candidate(id):
 
         return jsonify({"message": "✅ Candidate updated successfully!"}), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print(e)
         return jsonify({"message": str(e)}), 500
 
 
-@app.route('/get-users', methods=['GET'])
+@core_bp.route('/get-users', methods=['GET'])
 def get_users():
+    page = get_page_request()
     try:
         conn = get_db_connection()
         if not conn:
@@ -694,8 +344,9 @@ def get_users():
         cursor = conn.cursor(dictionary=True)
 
         # Fetch users with fallback to usersdata
-        cursor.execute("""
-            SELECT 
+        result = paginate(
+            cursor,
+            """
                 u.id,
                 u.name,
                 u.email,
@@ -703,12 +354,12 @@ def get_users():
                 u.role,
                 COALESCE(u.status, 'ACTIVE') AS status,
                 u.created_at
-            FROM users u
-            LEFT JOIN usersdata ud ON ud.email = u.email
-            ORDER BY u.created_at DESC
-        """)
-
-        users = cursor.fetchall()
+            """,
+            "users u LEFT JOIN usersdata ud ON ud.email = u.email",
+            [sort_key("u.created_at"), sort_key("u.id")],
+            page,
+        )
+        users = result if page is None else result["items"]
 
         cursor.close()
         conn.close()
@@ -723,14 +374,16 @@ def get_users():
             else:
                 user["role_valid"] = True
 
-        return jsonify(users), 200
+        return jsonify(result), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"message": "❌ Error fetching users", "error": str(e)}), 500
 
 
 
-@app.route("/delete-candidate/<int:id>", methods=["DELETE"])
+@core_bp.route("/delete-candidate/<int:id>", methods=["DELETE"])
 def delete_candidate(id):
     try:
         conn = get_db_connection()
@@ -745,11 +398,13 @@ def delete_candidate(id):
         conn.close()
 
         return jsonify({"message": "🗑 Candidate deleted successfully!"}), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print(e)
         return jsonify({"message": str(e)}), 500
 
-@app.route('/create-user', methods=['POST'])
+@core_bp.route('/create-user', methods=['POST'])
 def create_user():
     try:
         data = request.get_json()
@@ -789,20 +444,22 @@ def create_user():
 
     except mysql.connector.IntegrityError:
         return jsonify({"message": "⚠️ Email already exists!"}), 409
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"message": "❌ Error creating user", "error": str(e)}), 500
 
 # -------------------------------
 # API: Get All Users (Admin view)
 # -------------------------------
-@app.route('/users/<int:user_id>/details', methods=['GET'])
+@core_bp.route('/users/<int:user_id>/details', methods=['GET'])
 def get_user_details(user_id):
     """
     Provide unified view: user profile, assigned requirements, created candidates,
     and organization stats for ADMINS / DELIVERY_MANAGERS.
     """
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
 
@@ -923,13 +580,15 @@ def get_user_details(user_id):
 
         return jsonify(response_payload), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error building user details:", e)
         return jsonify({"error": str(e)}), 500
 
 
 
-@app.route("/create-screening-process", methods=["POST"])
+@core_bp.route("/create-screening-process", methods=["POST"])
 def create_screening_process():
     try:
         conn = get_db_connection()
@@ -951,6 +610,8 @@ def create_screening_process():
         cursor.close()
         conn.close()
         return jsonify({"message": "✅ Screening process created successfully!"}), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error creating screening process:", e)
         return jsonify({"message": "❌ Error creating screening Table", "error": str(e)}), 500
@@ -958,7 +619,7 @@ def create_screening_process():
 
 
 
-@app.route('/login', methods=['POST'])
+@core_bp.route('/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -971,10 +632,9 @@ def login():
         hashed_pw = hashlib.sha256(password.encode()).hexdigest()
 
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
 
         # Search in 'users' table (registered users)
-        cursor.execute("""
+        user = conn.prepared("""
             SELECT 
                 u.id, 
                 u.name, 
@@ -987,21 +647,21 @@ def login():
             WHERE u.email = %s 
               AND u.password_hash = %s 
               AND (u.status = 'ACTIVE' OR u.status IS NULL)
-        """, (email, hashed_pw))
-        user = cursor.fetchone()
+        """).execute((email, hashed_pw)).fetchone()
 
-        cursor.close()
         conn.close()
         if user:
             return jsonify({"message": "✅ Login successful", "user": user}), 200
         else:
             return jsonify({"message": "❌ Invalid email or password"}), 401
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"message": "❌ Error during login", "error": str(e)}), 500
 
 
-@app.route('/signup', methods=['POST'])
+@core_bp.route('/signup', methods=['POST'])
 def signup():
     try:
         data = request.get_json()
@@ -1054,6 +714,8 @@ def signup():
             "user": {"name": name, "email": email, "role": existing_user['role']}
         }), 201
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"message": "❌ Signup error", "error": str(e)}), 500
 
@@ -1061,7 +723,7 @@ def signup():
 # -------------------------------------
 # Admin: Update a user's status
 # -------------------------------------
-@app.route('/update-user-status/<int:user_id>', methods=['PUT'])
+@core_bp.route('/update-user-status/<int:user_id>', methods=['PUT'])
 def update_user_status(user_id: int):
     try:
         data = request.get_json() or {}
@@ -1111,6 +773,8 @@ def update_user_status(user_id: int):
             "status": new_status
         }), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({
             "message": "❌ Error updating user status",
@@ -1169,7 +833,7 @@ def fix_requirement_allocations_schema():
         return False, f"❌ Database error: {str(e)}"
 
 
-@app.route("/fix-requirement-allocations-schema", methods=["GET"])
+@core_bp.route("/fix-requirement-allocations-schema", methods=["GET"])
 def fix_schema_route():
     success, message = fix_requirement_allocations_schema()
     status = 200 if success else 500
@@ -1178,7 +842,7 @@ def fix_schema_route():
 # -----------------------------
 #  Get All Recruiters (for dropdown)
 # -----------------------------
-@app.route("/get-recruiters", methods=["GET"])
+@core_bp.route("/get-recruiters", methods=["GET"])
 def get_recruiters():
     try:
         conn = get_db_connection()
@@ -1188,11 +852,13 @@ def get_recruiters():
         cursor.close()
         conn.close()
         return jsonify(data), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
     
-@app.route("/requirements", methods=["POST"])
+@core_bp.route("/requirements", methods=["POST"])
 def create_requirement():
     try:
         data = request.get_json()
@@ -1258,56 +924,54 @@ def create_requirement():
         if not isinstance(stage_names_list, list):
             stage_names_list = []
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # Request connection: the client lookup below reuses it
+        with request_connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            INSERT INTO requirements
-            (id, client_id, title, description, location, skills_required, 
-             experience_required, ctc_range, no_of_rounds, status, created_by)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,'OPEN',%s)
-        """, (
-            req_id,
-            client_id_value,
-            title_value,
-            description_value,
-            location_value,
-            skills_value,
-            experience_value,
-            ctc_range_value,
-            no_of_rounds,
-            created_by_value
-        ))
-
-        # Generate Stages with custom names if provided
-        for i in range(1, no_of_rounds + 1):
-            # Use custom name if available, otherwise default to "Round X"
-            if i <= len(stage_names_list) and stage_names_list[i-1].strip():
-                stage_name = stage_names_list[i-1].strip()
-            else:
-                stage_name = f"Round {i}"
-                
             cursor.execute("""
-                INSERT INTO requirement_stages (requirement_id, stage_order, stage_name, is_mandatory)
-                VALUES (%s, %s, %s, TRUE)
-            """, (req_id, i, stage_name))
+                INSERT INTO requirements
+                (id, client_id, title, description, location, skills_required, 
+                 experience_required, ctc_range, no_of_rounds, status, created_by)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,'OPEN',%s)
+            """, (
+                req_id,
+                client_id_value,
+                title_value,
+                description_value,
+                location_value,
+                skills_value,
+                experience_value,
+                ctc_range_value,
+                no_of_rounds,
+                created_by_value
+            ))
+
+            # Generate Stages with custom names if provided
+            for i in range(1, no_of_rounds + 1):
+                # Use custom name if available, otherwise default to "Round X"
+                if i <= len(stage_names_list) and stage_names_list[i-1].strip():
+                    stage_name = stage_names_list[i-1].strip()
+                else:
+                    stage_name = f"Round {i}"
+                
+                cursor.execute("""
+                    INSERT INTO requirement_stages (requirement_id, stage_order, stage_name, is_mandatory)
+                    VALUES (%s, %s, %s, TRUE)
+                """, (req_id, i, stage_name))
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
 
-        # Fetch client name (optional)
+        # Fetch client name (optional); batched loader on the request connection,
+        # no second pool checkout
         client_name = "Unknown Client"
         try:
-            conn2 = get_db_connection()
-            cursor2 = conn2.cursor(dictionary=True)
-            cursor2.execute("SELECT name FROM clients WHERE id = %s", (client_id_value,))
-            row = cursor2.fetchone()
-            if row:
-                client_name = row["name"]
-            cursor2.close()
-            conn2.close()
-        except:
+            client = loaders().clients[client_id_value]
+            if client:
+                client_name = client["name"]
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception:
             pass
 
         user = get_current_user()
@@ -1332,17 +996,22 @@ def create_requirement():
 
         return jsonify({"message": "Requirement created", "id": req_id}), 201
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error creating requirement:", e)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/candidate-tracker/<int:candidate_id>", methods=["GET"])
+@core_bp.route("/api/candidate-tracker/<int:candidate_id>", methods=["GET"])
 def get_candidate_tracker(candidate_id):
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
+        # ?include_archived=1 also shows requirements moved to the archive tier
+        archived = include_archived()
+
         # 1. Get all requirements this candidate is associated with (via progress or screening)
         # For now, let's assume if they are in candidate_progress, they are being tracked.
         # If they are just screened, we might need to initialize progress?
@@ -1350,12 +1019,12 @@ def get_candidate_tracker(candidate_id):
         # So we should look for screening records too and maybe auto-initialize progress if missing.
 
         # Let's just fetch requirements where we have progress OR screening
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT DISTINCT r.id, r.title, r.client_id, c.name as client_name, r.no_of_rounds
-            FROM requirements r
+            FROM {archive_source("requirements", archived, "r")}
             LEFT JOIN clients c ON c.id = r.client_id
-            LEFT JOIN candidate_progress cp ON cp.requirement_id = r.id
-            LEFT JOIN candidate_screening cs ON cs.requirement_id = r.id
+            LEFT JOIN {archive_source("candidate_progress", archived, "cp")} ON cp.requirement_id = r.id
+            LEFT JOIN {archive_source("candidate_screening", archived, "cs")} ON cs.requirement_id = r.id
             WHERE cp.candidate_id = %s OR cs.candidate_id = %s
         """, (candidate_id, candidate_id))
         
@@ -1367,18 +1036,18 @@ def get_candidate_tracker(candidate_id):
             req_id = req["id"]
             
             # Get Stages
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT id, stage_order, stage_name 
-                FROM requirement_stages 
+                FROM {archive_source("requirement_stages", archived)} 
                 WHERE requirement_id = %s 
                 ORDER BY stage_order ASC
             """, (req_id,))
             stages = cursor.fetchall()
             
             # Get Progress for each stage
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT stage_id, status, decision, updated_at
-                FROM candidate_progress
+                FROM {archive_source("candidate_progress", archived)}
                 WHERE candidate_id = %s AND requirement_id = %s
             """, (candidate_id, req_id))
             progress_rows = cursor.fetchall()
@@ -1406,12 +1075,14 @@ def get_candidate_tracker(candidate_id):
         
         return jsonify(tracker_data), 200
         
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error fetching tracker:", e)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/update-stage-status", methods=["POST"])
+@core_bp.route("/api/update-stage-status", methods=["POST"])
 def update_stage_status():
     try:
         data = request.get_json()
@@ -1423,6 +1094,14 @@ def update_stage_status():
         
         if not all([candidate_id, requirement_id, stage_id, status]):
             return jsonify({"error": "Missing required fields"}), 400
+
+        # Reject unknown values up front instead of failing on the ENUM column
+        allowed_statuses = enum_values("candidate_progress", "status")
+        if allowed_statuses and status not in allowed_statuses:
+            return jsonify({"error": f"Invalid status. Allowed: {', '.join(allowed_statuses)}"}), 400
+        allowed_decisions = enum_values("candidate_progress", "decision")
+        if decision and allowed_decisions and decision not in allowed_decisions:
+            return jsonify({"error": f"Invalid decision. Allowed: {', '.join(allowed_decisions)}"}), 400
             
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -1431,26 +1110,35 @@ def update_stage_status():
         cursor.execute("SELECT stage_name FROM requirement_stages WHERE id=%s", (stage_id,))
         s_row = cursor.fetchone()
         stage_name = s_row[0] if s_row else "Unknown"
-        
+
+        # Progress rows live with the requirement's client (see utils/sharding.py)
+        pconn = get_pipeline_connection(requirement_id, conn)
+        if not pconn:
+            return jsonify({"error": "Database connection failed"}), 500
+
         # Use INSERT ON DUPLICATE KEY UPDATE to handle both insert and update
         # Note: Using explicit column names instead of VALUES() for MySQL 8.0+ compatibility
-        cursor.execute("""
-            INSERT INTO candidate_progress 
-            (candidate_id, requirement_id, stage_id, stage_name, status, decision)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE 
-                status = %s,
-                decision = %s,
-                updated_at = CURRENT_TIMESTAMP
-        """, (candidate_id, requirement_id, stage_id, stage_name, status, decision or 'NONE',
-              status, decision or 'NONE'))  # Repeat status and decision for UPDATE clause
-            
-        conn.commit()
+        # Concurrent upserts on the same (candidate, requirement) can deadlock: retried
+        try:
+            run_transaction(pconn, lambda c: c.prepared("""
+                INSERT INTO candidate_progress 
+                (candidate_id, requirement_id, stage_id, stage_name, status, decision)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE 
+                    status = %s,
+                    decision = %s,
+                    updated_at = CURRENT_TIMESTAMP
+            """).execute((candidate_id, requirement_id, stage_id, stage_name, status, decision or 'NONE',
+                          status, decision or 'NONE')))  # Repeat status and decision for UPDATE clause
+        finally:
+            release_pipeline_connection(pconn, conn)
         cursor.close()
         conn.close()
         
         return jsonify({"message": "Status updated"}), 200
         
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"❌ Error updating status: {e}")
         print(f"   Details: candidate_id={candidate_id}, requirement_id={requirement_id}, stage_id={stage_id}, status={status}")
@@ -1459,7 +1147,8 @@ def update_stage_status():
         return jsonify({"error": str(e)}), 500
 
     
-@app.route("/assign-requirement", methods=["POST"])
+@core_bp.route("/assign-requirement", methods=["POST"])
+@schema_required
 def assign_requirement():
     try:
         data = request.get_json()
@@ -1476,109 +1165,48 @@ def assign_requirement():
 
         alloc_id = str(uuid.uuid4())
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Ensure table exists with required columns
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS requirement_allocations (
-                id VARCHAR(64) PRIMARY KEY,
-                requirement_id VARCHAR(64) NOT NULL,
-                recruiter_id INT NOT NULL,
-                assigned_by INT NOT NULL,
-                status VARCHAR(20) DEFAULT 'ASSIGNED',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
-
-        # Add status column if missing (legacy tables)
-        cursor.execute("SHOW COLUMNS FROM requirement_allocations LIKE 'status'")
-        if cursor.fetchone() is None:
-            cursor.execute("ALTER TABLE requirement_allocations ADD COLUMN status VARCHAR(20) DEFAULT 'ASSIGNED'")
-            conn.commit()
-
-        # Add created_at column if missing
-        cursor.execute("SHOW COLUMNS FROM requirement_allocations LIKE 'created_at'")
-        if cursor.fetchone() is None:
-            cursor.execute("ALTER TABLE requirement_allocations ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-            conn.commit()
-
-        # Validate recruiter
-        cursor.execute("SELECT COUNT(*) FROM users WHERE id = %s", (recruiter_id,))
-        if cursor.fetchone()[0] == 0:
+        # Validate recruiter and assigned_by (one batched users lookup)
+        recruiter, assigner = loaders().users[[recruiter_id, assigned_by]]
+        if not recruiter:
             return jsonify({"error": "Recruiter not found"}), 400
-
-        # Validate assigned_by
-        cursor.execute("SELECT COUNT(*) FROM users WHERE id = %s", (assigned_by,))
-        if cursor.fetchone()[0] == 0:
+        if not assigner:
             return jsonify({"error": "Assigned by user not found"}), 400
 
         # Validate requirement
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE id = %s", (requirement_id,))
-        if cursor.fetchone()[0] == 0:
+        requirement = loaders().requirements[requirement_id]
+        if not requirement:
             return jsonify({"error": "Requirement not found"}), 400
 
-        # Insert allocation
-        cursor.execute("""
-            INSERT INTO requirement_allocations (id, requirement_id, recruiter_id, assigned_by, status)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (alloc_id, requirement_id, recruiter_id, assigned_by, status))
-        conn.commit()
+        # Insert allocation (on the request connection the loaders read through)
+        with request_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO requirement_allocations (id, requirement_id, recruiter_id, assigned_by, status)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (alloc_id, requirement_id, recruiter_id, assigned_by, status))
+            conn.commit()
+            cursor.close()
 
         # ---------- NEW PART: build payload for n8n ----------
 
-        # Fetch recruiter info (id, name, email)
-        cursor.execute(
-            "SELECT id, name, email FROM users WHERE id = %s",
-            (recruiter_id,),
-        )
-        recruiter_row = cursor.fetchone()
-        recruiter_id_val = recruiter_row[0] if recruiter_row else None
-        recruiter_name = recruiter_row[1] if recruiter_row else None
-        recruiter_email = recruiter_row[2] if recruiter_row else None
-
-        # Fetch assigner info (who assigned)
-        cursor.execute(
-            "SELECT id, name, email FROM users WHERE id = %s",
-            (assigned_by,),
-        )
-        assigner_row = cursor.fetchone()
-        assigned_by_id = assigner_row[0] if assigner_row else None
-        assigned_by_name = assigner_row[1] if assigner_row else None
-        assigned_by_email = assigner_row[2] if assigner_row else None
-
-        # Fetch requirement info (id, title, client_id)
-        cursor.execute(
-            "SELECT id, title, client_id FROM requirements WHERE id = %s",
-            (requirement_id,),
-        )
-        req_row = cursor.fetchone()
-        req_id_val = req_row[0] if req_row else None
-        req_title = req_row[1] if req_row else None
-        client_id_val = req_row[2] if req_row else None
-
-        # Fetch client name (optional)
-        client_name = None
-        if client_id_val:
-            cursor.execute("SELECT name FROM clients WHERE id = %s", (client_id_val,))
-            client_row = cursor.fetchone()
-            if client_row:
-                client_name = client_row[0]
+        # Client name (optional); users and requirement are already loaded
+        client_id_val = requirement.get("client_id")
+        client = loaders().clients[client_id_val] if client_id_val else None
+        client_name = client["name"] if client else None
 
         # Send event to n8n (safe even if some fields are None)
         payload = {
             "allocation_id": alloc_id,
-            "requirement_id": req_id_val,
-            "requirement_title": req_title,
+            "requirement_id": requirement["id"],
+            "requirement_title": requirement.get("title"),
             "client_id": client_id_val,
             "client_name": client_name,
-            "recruiter_id": recruiter_id_val,
-            "recruiter_name": recruiter_name,
-            "recruiter_email": recruiter_email,
-            "assigned_by_id": assigned_by_id,
-            "assigned_by_name": assigned_by_name,
-            "assigned_by_email": assigned_by_email,
+            "recruiter_id": recruiter["id"],
+            "recruiter_name": recruiter.get("name"),
+            "recruiter_email": recruiter.get("email"),
+            "assigned_by_id": assigner["id"],
+            "assigned_by_name": assigner.get("name"),
+            "assigned_by_email": assigner.get("email"),
             "status": status,
         }
 
@@ -1586,18 +1214,17 @@ def assign_requirement():
 
         # ---------- END NEW PART ----------
 
-        cursor.close()
-        conn.close()
-
         return jsonify({
             "message": "Requirement assigned successfully",
             "allocation_id": alloc_id
         }), 201
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route("/requirements/<string:req_id>/allocations", methods=["GET"])
+@core_bp.route("/requirements/<string:req_id>/allocations", methods=["GET"])
 def get_requirement_allocations(req_id):
     try:
         conn = get_db_connection()
@@ -1624,11 +1251,13 @@ def get_requirement_allocations(req_id):
         cursor.close()
         conn.close()
         return jsonify(rows), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/recruiter/<int:recruiter_id>/requirements", methods=["GET"])
+@core_bp.route("/recruiter/<int:recruiter_id>/requirements", methods=["GET"])
 def get_recruiter_requirements(recruiter_id):
     """Return all requirement allocations assigned to a recruiter with requirement and client details."""
     try:
@@ -1667,17 +1296,23 @@ def get_recruiter_requirements(recruiter_id):
         conn.close()
 
         return jsonify(rows), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/get-requirements", methods=["GET"])
+@core_bp.route("/get-requirements", methods=["GET"])
 def get_requirements():
+    page = get_page_request()
+    fmt = stream_format()
+    if fmt and page is None:
+        return stream_select("*", "requirements", [sort_key("created_at"), sort_key("id")], fmt)
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("SELECT * FROM requirements ORDER BY created_at DESC")
-    data = cursor.fetchall()
+    data = paginate(cursor, "*", "requirements", [sort_key("created_at"), sort_key("id")], page)
 
     cursor.close()
     conn.close()
@@ -1688,7 +1323,7 @@ def get_requirements():
 # -----------------------------
 #  Delete Requirement
 # -----------------------------
-@app.route('/delete-requirement/<req_id>', methods=['DELETE', 'OPTIONS'])
+@core_bp.route('/delete-requirement/<req_id>', methods=['DELETE', 'OPTIONS'])
 def delete_requirement(req_id):
 
     # Handle CORS preflight
@@ -1754,6 +1389,8 @@ def delete_requirement(req_id):
 
         return jsonify({"message": "Requirement and all related records deleted successfully"}), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         conn.rollback()
         print(f"❌ Error deleting requirement: {e}")
@@ -1763,20 +1400,13 @@ def delete_requirement(req_id):
         cursor.close()
         conn.close()
 
-@app.route("/recent-requirements", methods=["GET"])
+@core_bp.route("/recent-requirements", methods=["GET"])
+@schema_required
 def recent_requirements():
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # Ensure correct DB
-        cursor.execute("USE ats_system")
-
-        # Ensure table exists
-        cursor.execute("SHOW TABLES LIKE 'requirements'")
-        if not cursor.fetchone():
-            return jsonify([]), 200
-
         # Fetch latest 5 requirements
         cursor.execute("""
             SELECT 
@@ -1796,57 +1426,52 @@ def recent_requirements():
 
         return jsonify(rows), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error fetching recent requirements:", e)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/dashboard-stats', methods=['GET'])
+@core_bp.route('/dashboard-stats', methods=['GET'])
+@schema_required
 def dashboard_stats():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Use your database
-        cursor.execute("USE ats_system")
-
-        # Total requirements
-        cursor.execute("SELECT COUNT(*) AS total FROM requirements")
-        total = cursor.fetchone()['total'] or 0
-
-        # Open requirements
-        cursor.execute("SELECT COUNT(*) AS open_count FROM requirements WHERE status = 'Open'")
-        open_req = cursor.fetchone()['open_count'] or 0
-
-        # Closed requirements
-        cursor.execute("SELECT COUNT(*) AS closed_count FROM requirements WHERE status = 'Closed'")
-        closed_req = cursor.fetchone()['closed_count'] or 0
-
-        # Assigned requirements
-        cursor.execute("SELECT COUNT(*) AS assigned_count FROM requirement_allocations")
-        assigned_req = cursor.fetchone()['assigned_count'] or 0
-
-        # Urgent requirements (example: open and no_of_rounds > 5)
-        cursor.execute("SELECT COUNT(*) AS urgent_count FROM requirements WHERE status = 'Open' AND no_of_rounds > 5")
-        urgent_req = cursor.fetchone()['urgent_count'] or 0
+        start_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-        # Pending review
-        cursor.execute("SELECT COUNT(*) AS pending_review FROM requirement_allocations WHERE status = 'Pending'")
-        pending_review = cursor.fetchone()['pending_review'] or 0
+        # Independent counts: run concurrently, each on its own pooled connection
+        counts = fan_out({
+            # Total requirements
+            "total": Query("SELECT COUNT(*) AS total FROM requirements", fetch="one"),
+            # Open requirements
+            "open_count": Query("SELECT COUNT(*) AS open_count FROM requirements WHERE status = 'Open'", fetch="one"),
+            # Closed requirements
+            "closed_count": Query("SELECT COUNT(*) AS closed_count FROM requirements WHERE status = 'Closed'", fetch="one"),
+            # Assigned requirements
+            "assigned_count": Query("SELECT COUNT(*) AS assigned_count FROM requirement_allocations", fetch="one"),
+            # Urgent requirements (example: open and no_of_rounds > 5)
+            "urgent_count": Query("SELECT COUNT(*) AS urgent_count FROM requirements WHERE status = 'Open' AND no_of_rounds > 5", fetch="one"),
+            # Pending review
+            "pending_review": Query("SELECT COUNT(*) AS pending_review FROM requirement_allocations WHERE status = 'Pending'", fetch="one"),
+            # Closed this month (for the growth percent)
+            "closed_this_month": Query(
+                "SELECT COUNT(*) AS closed_this_month FROM requirements "
+                "WHERE status = 'Closed' AND created_at >= %s",
+                (start_of_month,),
+                fetch="one",
+            ),
+        })
+        total = counts["total"]["total"] or 0
+        open_req = counts["open_count"]["open_count"] or 0
+        closed_req = counts["closed_count"]["closed_count"] or 0
+        assigned_req = counts["assigned_count"]["assigned_count"] or 0
+        urgent_req = counts["urgent_count"]["urgent_count"] or 0
+        pending_review = counts["pending_review"]["pending_review"] or 0
+        closed_this_month = counts["closed_this_month"]["closed_this_month"] or 0
 
         # Closed growth percent (closed this month / total)
-        start_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        cursor.execute(
-            "SELECT COUNT(*) AS closed_this_month FROM requirements "
-            "WHERE status = 'Closed' AND created_at >= %s",
-            (start_of_month,)
-        )
-        closed_this_month = cursor.fetchone()['closed_this_month'] or 0
         closed_growth_percent = round((closed_this_month / total) * 100, 2) if total else 0
 
-        cursor.close()
-        conn.close()
-
         stats = {
             "totalRequirements": total,
             "openRequirements": open_req,
@@ -1859,12 +1484,14 @@ def dashboard_stats():
 
         return jsonify({"stats": stats})
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error fetching dashboard stats:", e)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/update-requirement/<req_id>", methods=["PUT"])
+@core_bp.route("/update-requirement/<req_id>", methods=["PUT"])
 def update_requirement(req_id):
     data = request.json
 
@@ -1911,7 +1538,7 @@ def update_requirement(req_id):
 
 
 
-@app.route('/create-client', methods=['POST'])
+@core_bp.route('/create-client', methods=['POST'])
 def create_client():
     data = request.get_json()
     name = data.get("name")
@@ -1937,24 +1564,26 @@ def create_client():
 
     return jsonify({"message": "Client created successfully"}), 201
 
-@app.route('/clients', methods=['GET'])
+@core_bp.route('/clients', methods=['GET'])
 def get_clients():
+    page = get_page_request()
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT * FROM clients ORDER BY id DESC")
-        clients = cursor.fetchall()
+        clients = paginate(cursor, "*", "clients", [sort_key("id")], page)
 
         cursor.close()
         conn.close()
 
         return jsonify(clients), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"message": "Error fetching clients", "error": str(e)}), 500
 
-@app.route("/update-client/<int:id>", methods=["PUT"])
+@core_bp.route("/update-client/<int:id>", methods=["PUT"])
 def update_client(id):
     data = request.json
     name = data.get("name")
@@ -1995,7 +1624,7 @@ def update_client(id):
 
 
 # ---------------- DELETE CLIENT ----------------
-@app.route('/delete-client/<int:id>', methods=['DELETE'])
+@core_bp.route('/delete-client/<int:id>', methods=['DELETE'])
 def delete_client(id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -2032,16 +1661,18 @@ def delete_client(id):
 # -------------------------------
 # Get all users (recent first)
 # -------------------------------
-@app.route("/users-list", methods=["GET"])
+@core_bp.route("/users-list", methods=["GET"])
 def get_users_list():
+    page = get_page_request()
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, name, email, phone, role, status FROM users ORDER BY id DESC")
-        users = cursor.fetchall()
+        users = paginate(cursor, "id, name, email, phone, role, status", "users", [sort_key("id")], page)
         cursor.close()
         conn.close()
         return jsonify(users), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error fetching users:", e)
         return jsonify({"message": "❌ Error fetching users", "error": str(e)}), 500
@@ -2050,7 +1681,7 @@ def get_users_list():
 # -------------------------------
 # Add a new user
 # -------------------------------
-@app.route("/users", methods=["POST"])
+@core_bp.route("/users", methods=["POST"])
 def add_user():
     try:
         data = request.json
@@ -2091,6 +1722,8 @@ def add_user():
 
         return jsonify({"message": f"✅ User '{name}' added successfully!"}), 201
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -2100,7 +1733,7 @@ def add_user():
 # -------------------------------
 # Update a user
 # -------------------------------
-@app.route("/update-user/<int:id>", methods=["PUT"])
+@core_bp.route("/update-user/<int:id>", methods=["PUT"])
 def update_user(id):
     try:
         data = request.json
@@ -2152,6 +1785,8 @@ def update_user(id):
         conn.close()
         return jsonify({"message": f"✅ User '{name}' updated successfully!"}), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error updating user:", e)
         return jsonify({"message": "❌ Error updating user", "error": str(e)}), 500
@@ -2160,7 +1795,7 @@ def update_user(id):
 # -------------------------------
 # Delete a user
 # -------------------------------
-@app.route("/delete-user/<int:id>", methods=["DELETE"])
+@core_bp.route("/delete-user/<int:id>", methods=["DELETE"])
 def delete_user(id):
     try:
         conn = get_db_connection()
@@ -2170,6 +1805,8 @@ def delete_user(id):
         cursor.close()
         conn.close()
         return jsonify({"message": "🗑 User deleted successfully!"}), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Error deleting user:", e)
         return jsonify({"message": "❌ Error deleting user", "error": str(e)}), 500
@@ -2180,74 +1817,9 @@ def delete_user(id):
 # -------------------------------------
 # Reports & Analytics
 # -------------------------------------
-@app.route("/api/reports/stats", methods=["GET"])
-def get_reports_stats():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # 1. Requirements Stats
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'OPEN' THEN 1 ELSE 0 END) as open_reqs,
-                SUM(CASE WHEN status = 'CLOSED' THEN 1 ELSE 0 END) as closed_reqs
-            FROM requirements
-        """)
-        req_stats = cursor.fetchone()
-
-        # 2. Candidate Stats
-        cursor.execute("SELECT COUNT(*) as total FROM candidates")
-        total_candidates = cursor.fetchone()['total']
-
-        # 3. Selections (Qualified Candidates)
-        # Candidates who have status='COMPLETED' in the LAST round of any requirement
-        cursor.execute("""
-            SELECT 
-                c.name as candidate_name,
-                r.title as requirement_title,
-                cl.name as client_name,
-                cp.updated_at as selection_date
-            FROM candidate_progress cp
-            JOIN candidates c ON c.id = cp.candidate_id
-            JOIN requirements r ON r.id = cp.requirement_id
-            JOIN requirement_stages rs ON rs.id = cp.stage_id
-            LEFT JOIN clients cl ON cl.id = r.client_id
-            WHERE rs.stage_order = r.no_of_rounds 
-              AND cp.status = 'COMPLETED'
-            ORDER BY cp.updated_at DESC
-        """)
-        selections = cursor.fetchall()
-
-        # 4. Requirements by Client
-        cursor.execute("""
-            SELECT 
-                c.name as client_name,
-                COUNT(r.id) as req_count
-            FROM requirements r
-            LEFT JOIN clients c ON c.id = r.client_id
-            GROUP BY c.name
-        """)
-        client_stats = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-
-        return jsonify({
-            "requirements": req_stats,
-            "candidates": {"total": total_candidates},
-            "selections": selections,
-            "client_stats": client_stats
-        }), 200
-
-    except Exception as e:
-        print(f"❌ Error fetching report stats: {e}")
-        return jsonify({"error": str(e)}), 500
-
-
-
-@app.route("/api/candidate_progress", methods=["GET"])
+@core_bp.route("/api/candidate_progress", methods=["GET"])
 def get_candidate_progress():
+    page = get_page_request()
     conn = get_db_connection()
     if not conn:
         return jsonify({"error": "Database connection failed"}), 500
@@ -2255,25 +1827,32 @@ def get_candidate_progress():
     try:
         cursor = conn.cursor(dictionary=True)
 
-        sql = """
-            SELECT cp.id, cp.candidate_id, cp.requirement_id, cp.stage_name,
-                   cp.status, c.name AS candidate_name,
-                   rs.stage_name
-            FROM candidate_progress cp
-            LEFT JOIN candidates c ON cp.candidate_id = c.id
-            LEFT JOIN requirement_stages rs ON cp.stage_id = rs.id
-            WHERE cp.id IN (
-                SELECT MAX(id)
-                FROM candidate_progress
-                GROUP BY candidate_id
-            )
-            ORDER BY cp.id
-        """
-
-        cursor.execute(sql)
-        rows = cursor.fetchall()
+        rows = paginate(
+            cursor,
+            """
+                cp.id, cp.candidate_id, cp.requirement_id, cp.stage_name,
+                cp.status, c.name AS candidate_name,
+                rs.stage_name
+            """,
+            """
+                candidate_progress cp
+                LEFT JOIN candidates c ON cp.candidate_id = c.id
+                LEFT JOIN requirement_stages rs ON cp.stage_id = rs.id
+            """,
+            [sort_key("cp.id", descending=False)],
+            page,
+            where="""
+                cp.id IN (
+                    SELECT MAX(id)
+                    FROM candidate_progress
+                    GROUP BY candidate_id
+                )
+            """,
+        )
         return jsonify(rows), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("Error fetching candidate progress:", e)
         return jsonify({"error": str(e)}), 500
@@ -2285,16 +1864,53 @@ def get_candidate_progress():
 # -------------------------------------
 # Run Server
 # -------------------------------------
-if __name__ == '__main__':
-    # Import AI routes after env loading (to avoid circular import issues)
+def log_startup_config():
+    if db.loaded_env_file:
+        print(f"✅ Loaded environment from: {db.loaded_env_file.name}")
+    elif db.load_dotenv:
+        print("⚠️ No .env or config.env found, using defaults")
+    else:
+        print("⚠️ python-dotenv not installed, using system environment variables")
+
+    # Debug: Print DB config (mask password for security)
+    if db.DB_BACKEND == 'sqlite':
+        print(f"🔧 DB Config: sqlite database={db.sqlite_config['database']}")
+    else:
+        print(f"🔧 DB Config: host={db_config['host']}, user={db_config['user']}, database={db_config['database']}, password={'***' if db_config['password'] else '(empty)'}")
+
+
+def create_app(config=None):
+    """
+    Build the Flask app with every blueprint registered. ``config`` overrides
+    app.config, e.g. ``create_app({"TESTING": True})``. Served by wsgi.py.
+    """
     from controllers.ai_chat_controller import register_ai_routes
     from controllers.ai_jd_controller import jd_bp
     from controllers.ai_screening import screening_bp
-    initialize_database()
-    ensure_admin_exists()
-    ensure_user_status_defaults()
-    # Register AI assistant routes without altering existing endpoints
+
+    app = Flask(__name__)
+    app.config["UPLOAD_FOLDER"] = "./uploads/resumes"
+    if config:
+        app.config.update(config)
+
+    CORS(app, resources={r"/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}}, supports_credentials=True)
+    app.register_blueprint(reports_bp)
+    app.register_blueprint(core_bp)
     register_ai_routes(app)
     app.register_blueprint(jd_bp)
     app.register_blueprint(screening_bp)
-    app.run(debug=True, port=5001)
+    app.register_error_handler(InvalidPageRequest, handle_invalid_page)
+    init_db(app)
+    deadline.init_app(app)
+
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    log_startup_config()
+    return app
+
+
+if __name__ == '__main__':
+    app = create_app()
+    initialize_database()
+    ensure_admin_exists()
+    # The reloader runs a second copy of the app; opt in with FLASK_RELOAD=1
+    app.run(debug=True, port=5001, use_reloader=os.getenv("FLASK_RELOAD") == "1")
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from typing import Any, Dict
 
+from services import ai_data_service_async as ai_async
+from utils import async_db
+from utils.deadline import DeadlineExceeded, request_deadline
 from utils.llm_client import call_llm
 from services.ai_data_service import (
 	get_candidate_by_name_for_user,
@@ -17,7 +20,6 @@ from services.ai_data_service import (
     list_clients_for_user,
     list_requirements_for_admin,
     list_candidates_for_user,
-    list_requirement_allocations,
     list_usersdata,
     build_user_self_context,
     get_candidate_progress_for_requirement,
@@ -69,6 +71,7 @@ def _detect_intent(message: str) -> str:
 
 
 @ai_bp.route("/chat", methods=["POST"])
+@request_deadline(40)
 def chat() -> Any:
 
 	# 1) Read user and message. We expect frontend to include logged-in user payload
@@ -193,18 +196,26 @@ def chat() -> Any:
 
 		# If admin or delivery manager with a general question, provide broad context to answer freely
 		if (user.get("role", "").upper() in ["ADMIN", "DELIVERY_MANAGER"]) and intent == "general":
-			# Load key datasets so LLM can answer "anything" within ATS
-			context["clients"] = context.get("clients") or list_clients_for_user(user)
-			context["users"] = context.get("users") or list_users_for_admin()
-			context["usersdata"] = context.get("usersdata") or list_usersdata()
-			context["requirements"] = context.get("requirements") or list_requirements_for_admin()
-			context["candidates"] = context.get("candidates") or list_candidates_for_user(user)
-			context["allocations"] = context.get("allocations") or list_requirement_allocations()
+			# Load key datasets so LLM can answer "anything" within ATS.
+			# They are independent, so the missing ones are fetched concurrently
+			loaders = {
+				"clients": lambda: ai_async.list_clients_for_user(user),
+				"users": ai_async.list_users_for_admin,
+				"usersdata": ai_async.list_usersdata,
+				"requirements": ai_async.list_requirements_for_admin,
+				"candidates": lambda: ai_async.list_candidates_for_user(user),
+				"allocations": ai_async.list_requirement_allocations,
+			}
+			missing = {key: load() for key, load in loaders.items() if not context.get(key)}
+			if missing:
+				context.update(async_db.run(ai_async.gather(**missing)))
 
 		# 4) Call LLM with system prompt, original question, and structured context
 		answer = call_llm(SYSTEM_PROMPT, context, message)
 		return jsonify({"answer": answer, "context": context}), 200
 
+	except DeadlineExceeded:
+		raise
 	except Exception as e:
 		# Never crash; provide a safe message
 		return jsonify({"answer": f"AI processing failed: {e}", "context": context}), 200
@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
+from utils.deadline import DeadlineExceeded, request_deadline
 from utils.llm_client import call_llm
 import json
 
 jd_bp = Blueprint("jd_bp", __name__)
 
 @jd_bp.route("/api/ai/jd-to-requirement", methods=["POST"])
+@request_deadline(40)
 def jd_to_requirement():
     try:
         data = request.get_json() or {}
@@ -50,5 +52,7 @@ def jd_to_requirement():
             }), 200
 
         return jsonify({"suggested_requirement": parsed_data}), 200
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
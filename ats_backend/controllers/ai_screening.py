@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
 from utils.gemini import run_gemini_screening
-from services.ai_data_service import get_db_connection
+from utils.db import get_db_connection, run_transaction
+from utils.migrations import schema_required
+from utils.pagination import get_page_request, paginate, sort_key
+from utils.sharding import get_pipeline_connection, release_pipeline_connection
+from utils import deadline
+from utils.deadline import request_deadline
 import requests
 import json
 
@@ -8,11 +13,15 @@ screening_bp = Blueprint('screening', __name__, url_prefix="/api")
 
 
 @screening_bp.route("/screen-candidate", methods=["POST"])
+@schema_required
+@request_deadline(30)
 def screen_candidate():
     try:
         body = request.json or {}
         candidate_id = body.get("candidate_id")
         requirement_ref = body.get("requirement_id") or body.get("requirement_ref")
+        # force=true re-asks the model instead of reusing a cached screening
+        force = str(body.get("force") or request.args.get("force") or "").lower() in ("1", "true", "yes")
 
         if not candidate_id:
             return jsonify({"error": "candidate_id is required"}), 400
@@ -26,78 +35,108 @@ def screen_candidate():
 
         # Removed _ensure_screening_tables(cursor) as tables are handled in app.py
 
-        cursor.execute("SELECT * FROM candidates WHERE id = %s", (candidate_id,))
-        candidate = cursor.fetchone()
+        candidate = conn.prepared("SELECT * FROM candidates WHERE id = %s").execute((candidate_id,)).fetchone()
 
-        requirement = _resolve_requirement(cursor, requirement_ref)
+        requirement = _resolve_requirement(conn, requirement_ref)
 
         if not candidate:
             return jsonify({"error": "Candidate not found"}), 404
         if not requirement:
             return jsonify({"error": "Requirement not found"}), 404
 
-        ai_output = run_gemini_screening(candidate, requirement)
+        ai_output = run_gemini_screening(candidate, requirement, force=force)
         normalized_output, normalize_error = _normalize_ai_output(ai_output)
         if normalize_error:
             return jsonify({"error": normalize_error, "raw_output": str(ai_output)}), 500
 
-        cursor.execute("""
-            INSERT INTO candidate_screening
-            (candidate_id, requirement_id, ai_score, ai_rationale, recommend, red_flags, model_version)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            candidate_id,
-            requirement["id"],
-            normalized_output["score"],
-            json.dumps(normalized_output["rationale"]),
-            normalized_output["recommend"],
-            json.dumps(normalized_output["red_flags"]),
-            "gemini-2.5"
-        ))
-        conn.commit()
-
-        _touch_candidate_progress(
-            cursor,
-            candidate_id,
-            requirement["id"],
-            requirement.get("category", "IT"),
-            stage="Manual Review",
-            status="REVIEW_REQUIRED",
-            decision="NONE"
-        )
-        conn.commit()
+        # Screening + progress rows live with the requirement's client (see utils/sharding.py)
+        pconn = get_pipeline_connection(requirement["id"], conn)
+        if not pconn:
+            return jsonify({"error": "Database connection failed"}), 500
+
+        # A cache hit computed nothing new: when this candidate already has a
+        # screening for the requirement, add no row, queue entry or event, and
+        # leave its progress where the recruiter moved it
+        cached = bool(ai_output.get("cached"))
+        outcome = {"new": True}
+
+        def record_screening(c):
+            pcursor = c.cursor()
+            try:
+                if cached:
+                    pcursor.execute(
+                        "SELECT 1 FROM candidate_screening WHERE candidate_id = %s AND requirement_id = %s LIMIT 1",
+                        (candidate_id, requirement["id"]),
+                    )
+                    outcome["new"] = pcursor.fetchone() is None
+                if not outcome["new"]:
+                    return
+                pcursor.execute("""
+                    INSERT INTO candidate_screening
+                    (candidate_id, requirement_id, ai_score, ai_rationale, recommend, red_flags, model_version)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    candidate_id,
+                    requirement["id"],
+                    normalized_output["score"],
+                    json.dumps(normalized_output["rationale"]),
+                    normalized_output["recommend"],
+                    json.dumps(normalized_output["red_flags"]),
+                    "gemini-2.5"
+                ))
+            finally:
+                pcursor.close()
+
+            _touch_candidate_progress(
+                c,
+                candidate_id,
+                requirement["id"],
+                requirement.get("category", "IT"),
+                stage="Manual Review",
+                status="REVIEW_REQUIRED",
+                decision="NONE"
+            )
 
-        # Check if assesment_queue table exists before inserting
-        cursor.execute("SHOW TABLES LIKE 'assesment_queue'")
-        if cursor.fetchone():
+        # Screening row and progress upsert commit together (retried on deadlock)
+        try:
+            run_transaction(pconn, record_screening)
+        finally:
+            release_pipeline_connection(pconn, conn)
+
+        if outcome["new"]:
             cursor.execute("""
                 INSERT INTO assesment_queue (candidate_id, requirement_id, status)
                 VALUES (%s, %s, 'PENDING')
             """, (candidate_id, requirement["id"]))
             conn.commit()
 
-        try:
-            requests.post(
-                "http://localhost:5678/webhook/screen_complete",
-                json={
-                    "candidate_id": candidate_id,
-                    "requirement_id": requirement["id"],
-                    "ai_score": normalized_output["score"],
-                    "recommend": normalized_output["recommend"]
-                },
-                timeout=3
-            )
-        except requests.RequestException:
-            print("⚠️ Could not send event to n8n (server offline).")
+            try:
+                if not deadline.has_budget(0.5):
+                    raise requests.RequestException("request deadline nearly spent")
+                requests.post(
+                    "http://localhost:5678/webhook/screen_complete",
+                    json={
+                        "candidate_id": candidate_id,
+                        "requirement_id": requirement["id"],
+                        "ai_score": normalized_output["score"],
+                        "recommend": normalized_output["recommend"]
+                    },
+                    timeout=deadline.timeout(3)
+                )
+            except requests.RequestException:
+                print("⚠️ Could not send event to n8n (server offline).")
 
         cursor.close()
         conn.close()
 
         return jsonify({
             "message": "✅ Candidate screened successfully!",
-            "result": normalized_output
+            "result": normalized_output,
+            "cached": cached
         }), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ Screening error:", e)
         return jsonify({"error": str(e)}), 500
@@ -122,47 +161,53 @@ def create_interview():
         if missing:
             return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
 
-        conn = get_db_connection()
+        conn = get_pipeline_connection(data["requirement_id"])
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
-        cursor = conn.cursor(dictionary=True, buffered=True)
 
         # Removed _ensure_screening_tables(cursor)
 
-        cursor.execute("""
-            INSERT INTO interviews
-            (candidate_id, requirement_id, category, stage, date, time, duration, mode, location, interviewer, notes, status)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-        """, (
-            data["candidate_id"],
-            data["requirement_id"],
-            data["category"],
-            data["stage"],
-            data["date"],
-            data["time"],
-            data["duration"],
-            data["mode"],
-            data.get("location", ""),
-            data["interviewer"],
-            data.get("notes", ""),
-            data.get("status", "Scheduled")
-        ))
-        _touch_candidate_progress(
-            cursor,
-            data["candidate_id"],
-            data["requirement_id"],
-            data["category"],
-            data["stage"],
-            status="IN_PROGRESS",
-            decision="MOVE_NEXT"
-        )
-        conn.commit()
+        def schedule(c):
+            cursor = c.cursor()
+            try:
+                cursor.execute("""
+                    INSERT INTO interviews
+                    (candidate_id, requirement_id, category, stage, date, time, duration, mode, location, interviewer, notes, status)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                """, (
+                    data["candidate_id"],
+                    data["requirement_id"],
+                    data["category"],
+                    data["stage"],
+                    data["date"],
+                    data["time"],
+                    data["duration"],
+                    data["mode"],
+                    data.get("location", ""),
+                    data["interviewer"],
+                    data.get("notes", ""),
+                    data.get("status", "Scheduled")
+                ))
+            finally:
+                cursor.close()
+            _touch_candidate_progress(
+                c,
+                data["candidate_id"],
+                data["requirement_id"],
+                data["category"],
+                data["stage"],
+                status="IN_PROGRESS",
+                decision="MOVE_NEXT"
+            )
+
+        run_transaction(conn, schedule)
 
-        cursor.close()
         conn.close()
 
         return jsonify({"status": "success"}), 201
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ create_interview error:", e)
         return jsonify({"error": str(e)}), 500
@@ -170,6 +215,7 @@ def create_interview():
 
 @screening_bp.route("/interviews", methods=["GET"])
 def get_interviews():
+    page = get_page_request()
     try:
         conn = get_db_connection()
         if not conn:
@@ -178,23 +224,28 @@ def get_interviews():
 
         # Removed _ensure_screening_tables(cursor)
 
-        cursor.execute("""
-            SELECT
+        rows = paginate(
+            cursor,
+            """
                 i.*,
                 c.name AS candidate_name,
                 c.email AS candidate_email,
                 r.title AS requirement_title
-            FROM interviews i
-            LEFT JOIN candidates c ON c.id = i.candidate_id
-            LEFT JOIN requirements r ON r.id = i.requirement_id
-            WHERE i.status != 'Cancelled'
-            ORDER BY i.date DESC, i.time DESC
-        """)
-
-        rows = cursor.fetchall()
+            """,
+            """
+                interviews i
+                LEFT JOIN candidates c ON c.id = i.candidate_id
+                LEFT JOIN requirements r ON r.id = i.requirement_id
+            """,
+            [sort_key("i.date", nullable=True), sort_key("i.time", nullable=True), sort_key("i.id")],
+            page,
+            where="i.status != 'Cancelled'",
+        )
         cursor.close()
         conn.close()
         return jsonify(rows), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ get_interviews error:", e)
         return jsonify({"error": str(e)}), 500
@@ -209,34 +260,38 @@ def update_stage():
         if missing:
             return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
 
-        conn = get_db_connection()
+        conn = get_pipeline_connection(data["requirement_id"])
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
-        cursor = conn.cursor(dictionary=True, buffered=True)
 
         # Removed _ensure_screening_tables(cursor)
 
-        cursor.execute(
-            "UPDATE interviews SET stage=%s WHERE id=%s",
-            (data["stage"], data["interview_id"])
-        )
-        conn.commit()
+        def move_stage(c):
+            cursor = c.cursor()
+            try:
+                cursor.execute(
+                    "UPDATE interviews SET stage=%s WHERE id=%s",
+                    (data["stage"], data["interview_id"])
+                )
+            finally:
+                cursor.close()
+            _touch_candidate_progress(
+                c,
+                data["candidate_id"],
+                data["requirement_id"],
+                data.get("category", "IT"),
+                data["stage"],
+                status="IN_PROGRESS",
+                decision="MOVE_NEXT"
+            )
 
-        _touch_candidate_progress(
-            cursor,
-            data["candidate_id"],
-            data["requirement_id"],
-            data.get("category", "IT"),
-            data["stage"],
-            status="IN_PROGRESS",
-            decision="MOVE_NEXT"
-        )
-        conn.commit()
+        run_transaction(conn, move_stage)
 
-        cursor.close()
         conn.close()
 
         return jsonify({"status": "success"}), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ update_stage error:", e)
         return jsonify({"error": str(e)}), 500
@@ -256,6 +311,8 @@ def recruiter_decision():
 
         if not candidate_id or not requirement_ref or decision not in {"MOVE_NEXT", "HOLD", "REJECT"}:
             return jsonify({"error": "candidate_id, requirement_id, and valid decision (MOVE_NEXT/HOLD/REJECT) are required"}), 400
+        if decision == "MOVE_NEXT" and not next_stage:
+            return jsonify({"error": "next_stage required for MOVE_NEXT"}), 400
 
         conn = get_db_connection()
         if not conn:
@@ -264,50 +321,61 @@ def recruiter_decision():
 
         # Removed _ensure_screening_tables(cursor)
 
-        requirement = _resolve_requirement(cursor, requirement_ref)
+        requirement = _resolve_requirement(conn, requirement_ref)
         if not requirement:
             return jsonify({"error": "Requirement not found"}), 404
 
         req_id = requirement["id"]
         category = requirement.get("category", "IT")
 
-        # Apply decision updates
-        if decision == "REJECT":
-            cursor.execute("""
-                UPDATE candidate_progress
-                SET status='REJECTED', manual_decision='REJECT', stage_name='Rejected'
-                WHERE candidate_id=%s AND requirement_id=%s
-            """, (candidate_id, req_id))
-
-        elif decision == "HOLD":
-            cursor.execute("""
-                UPDATE candidate_progress
-                SET status='PENDING', manual_decision='HOLD', stage_name='On Hold'
-                WHERE candidate_id=%s AND requirement_id=%s
-            """, (candidate_id, req_id))
-
-        elif decision == "MOVE_NEXT":
-            if not next_stage:
-                return jsonify({"error": "next_stage required for MOVE_NEXT"}), 400
-
-            cursor.execute("""
-                UPDATE candidate_progress
-                SET status='IN_PROGRESS', manual_decision='MOVE_NEXT', stage_name=%s
-                WHERE candidate_id=%s AND requirement_id=%s
-            """, (next_stage, candidate_id, req_id))
+        pconn = get_pipeline_connection(req_id, conn)
+        if not pconn:
+            return jsonify({"error": "Database connection failed"}), 500
+        cursor.close()
 
-            cursor.execute("""
-                INSERT INTO interviews (candidate_id, requirement_id, category, stage, status)
-                VALUES (%s, %s, %s, %s, 'Scheduled')
-            """, (candidate_id, req_id, category, next_stage))
+        # Apply decision updates
+        def apply_decision(c):
+            cursor = c.cursor()
+            try:
+                if decision == "REJECT":
+                    cursor.execute("""
+                        UPDATE candidate_progress
+                        SET status='REJECTED', manual_decision='REJECT', stage_name='Rejected'
+                        WHERE candidate_id=%s AND requirement_id=%s
+                    """, (candidate_id, req_id))
+
+                elif decision == "HOLD":
+                    cursor.execute("""
+                        UPDATE candidate_progress
+                        SET status='PENDING', manual_decision='HOLD', stage_name='On Hold'
+                        WHERE candidate_id=%s AND requirement_id=%s
+                    """, (candidate_id, req_id))
+
+                elif decision == "MOVE_NEXT":
+                    cursor.execute("""
+                        UPDATE candidate_progress
+                        SET status='IN_PROGRESS', manual_decision='MOVE_NEXT', stage_name=%s
+                        WHERE candidate_id=%s AND requirement_id=%s
+                    """, (next_stage, candidate_id, req_id))
+
+                    cursor.execute("""
+                        INSERT INTO interviews (candidate_id, requirement_id, category, stage, status)
+                        VALUES (%s, %s, %s, %s, 'Scheduled')
+                    """, (candidate_id, req_id, category, next_stage))
+            finally:
+                cursor.close()
 
-        conn.commit()
-        cursor.close()
+        try:
+            run_transaction(pconn, apply_decision)
+        finally:
+            release_pipeline_connection(pconn, conn)
         conn.close()
 
         # Trigger n8n webhook (best-effort)
         try:
             webhook_url = "http://localhost:5678/webhook-test/recruiter_decision"
+            if not deadline.has_budget(0.5):
+                raise requests.RequestException("request deadline nearly spent")
             resp = requests.post(
                 webhook_url,
                 json={
@@ -318,7 +386,7 @@ def recruiter_decision():
                     "recruiter": recruiter
                 },
                 headers={"X-AUTOMATION-SECRET": "yoursecret123"},
-                timeout=3
+                timeout=deadline.timeout(3)
             )
             print("Webhook response:", resp.status_code)
         except Exception as e:
@@ -326,6 +394,8 @@ def recruiter_decision():
 
         return jsonify({"status": "updated", "decision": decision}), 200
 
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ recruiter_decision error:", e)
         return jsonify({"error": str(e)}), 500
@@ -346,10 +416,16 @@ def get_candidate_progress(candidate_id, req_ref):
         if not candidate:
             return jsonify({"error": "Candidate not found"}), 404
 
-        requirement = _resolve_requirement(cursor, req_ref)
+        requirement = _resolve_requirement(conn, req_ref)
         if not requirement:
             return jsonify({"error": "Requirement not found"}), 404
 
+        pconn = get_pipeline_connection(requirement["id"], conn)
+        if not pconn:
+            return jsonify({"error": "Database connection failed"}), 500
+        cursor.close()
+        cursor = pconn.cursor(dictionary=True, buffered=True)
+
         cursor.execute("""
             SELECT *
             FROM candidate_progress
@@ -375,6 +451,7 @@ def get_candidate_progress(candidate_id, req_ref):
         interviews = cursor.fetchall()
 
         cursor.close()
+        release_pipeline_connection(pconn, conn)
         conn.close()
 
         return jsonify({
@@ -396,6 +473,8 @@ def get_candidate_progress(candidate_id, req_ref):
             "screening": screening,
             "interviews": interviews,
         }), 200
+    except deadline.DeadlineExceeded:
+        raise
     except Exception as e:
         print("❌ get_candidate_progress error:", e)
         return jsonify({"error": str(e)}), 500
@@ -403,9 +482,10 @@ def get_candidate_progress(candidate_id, req_ref):
 
 # --------------------- Helper functions ---------------------
 
-def _touch_candidate_progress(cursor, candidate_id, requirement_id, category, stage, status="PENDING", decision="NONE"):
-    # Using stage_name instead of current_stage to match app.py schema
-    cursor.execute("""
+def _touch_candidate_progress(conn, candidate_id, requirement_id, category, stage, status="PENDING", decision="NONE"):
+    # Using stage_name instead of current_stage to match app.py schema.
+    # Doesn't commit: callers run it inside run_transaction() with their other writes.
+    conn.prepared("""
         INSERT INTO candidate_progress (candidate_id, requirement_id, category, stage_name, status, manual_decision)
         VALUES (%s, %s, %s, %s, %s, %s)
         ON DUPLICATE KEY UPDATE
@@ -413,18 +493,18 @@ def _touch_candidate_progress(cursor, candidate_id, requirement_id, category, st
             stage_name=VALUES(stage_name),
             status=VALUES(status),
             manual_decision=VALUES(manual_decision)
-    """, (candidate_id, requirement_id, category or "IT", stage, status, decision or "NONE"))
+    """).execute((candidate_id, requirement_id, category or "IT", stage, status, decision or "NONE"))
 
 
-def _resolve_requirement(cursor, identifier):
+def _resolve_requirement(conn, identifier):
     if not identifier:
         return None
 
-    cursor.execute("SELECT * FROM requirements WHERE id = %s", (str(identifier),))
-    row = cursor.fetchone()
+    row = conn.prepared("SELECT * FROM requirements WHERE id = %s").execute((str(identifier),)).fetchone()
     if row:
         return row
 
+    cursor = conn.cursor(dictionary=True, buffered=True)
     cursor.execute(
         """
         SELECT * FROM requirements
@@ -436,6 +516,7 @@ def _resolve_requirement(cursor, identifier):
     )
     row = cursor.fetchone()
     if row:
+        cursor.close()
         return row
 
     cursor.execute(
@@ -447,7 +528,9 @@ def _resolve_requirement(cursor, identifier):
         """,
         (f"%{identifier.lower()}%",)
     )
-    return cursor.fetchone()
+    row = cursor.fetchone()
+    cursor.close()
+    return row
 
 
 def _normalize_ai_output(ai_output):
@@ -1,12 +1,17 @@
 from flask import Blueprint, jsonify, request
+from utils.archive import archive_source, include_archived
 from utils.db import get_db_connection
+from utils.deadline import DeadlineExceeded
+from utils.fanout import Query, fan_out
+from utils.pagination import get_page_request, paginate, sort_key
+from utils.sharding import gather_count, get_pipeline_connection, release_pipeline_connection
 
 reports_bp = Blueprint('reports', __name__)
 
 @reports_bp.route('/api/reports/clients', methods=['GET'])
 def get_clients():
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
         cursor = conn.cursor(dictionary=True)
@@ -15,28 +20,34 @@ def get_clients():
         cursor.close()
         conn.close()
         return jsonify(clients), 200
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @reports_bp.route('/api/reports/client/<int:client_id>/requirements', methods=['GET'])
 def get_client_requirements(client_id):
+    page = get_page_request()
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, title, status, created_at FROM requirements WHERE client_id=%s ORDER BY created_at DESC", (client_id,))
-        reqs = cursor.fetchall()
+        reqs = paginate(cursor, "id, title, status, created_at", archive_source("requirements", include_archived()),
+                        [sort_key("created_at"), sort_key("id")], page,
+                        where="client_id=%s", params=(client_id,))
         cursor.close()
         conn.close()
         return jsonify(reqs), 200
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @reports_bp.route('/api/reports/requirement/<req_id>/stats', methods=['GET'])
 def get_requirement_stats(req_id):
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
         cursor = conn.cursor(dictionary=True)
@@ -44,23 +55,41 @@ def get_requirement_stats(req_id):
         # Get requirement details
         cursor.execute("SELECT title, no_of_rounds, status FROM requirements WHERE id=%s", (req_id,))
         req = cursor.fetchone()
+
+        # Archived requirements are moved whole, so their stats come from the archive tables
+        suffix = ""
+        if not req:
+            cursor.execute("SELECT title, no_of_rounds, status FROM requirements_archive WHERE id=%s", (req_id,))
+            req = cursor.fetchone()
+            suffix = "_archive"
         
         if not req:
             cursor.close()
             conn.close()
             return jsonify({"error": "Requirement not found"}), 404
 
+        # Progress rows live with the requirement's client (see utils/sharding.py).
+        # Always exact: one requirement's breakdown is an indexed lookup, and a
+        # stage update must show up on the next load.
+        pconn = get_pipeline_connection(req_id, conn, readonly=True)
+        if not pconn:
+            cursor.close()
+            conn.close()
+            return jsonify({"error": "Database connection failed"}), 500
+        cursor.close()
+        cursor = pconn.cursor(dictionary=True)
+
         # Get stats from candidate_progress
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT stage_name, status, COUNT(*) as count 
-            FROM candidate_progress 
+            FROM candidate_progress{suffix} 
             WHERE requirement_id=%s 
             GROUP BY stage_name, status
         """, (req_id,))
         progress_stats = cursor.fetchall()
         
         # Get total candidates applied/mapped
-        cursor.execute("SELECT COUNT(DISTINCT candidate_id) as total FROM candidate_progress WHERE requirement_id=%s", (req_id,))
+        cursor.execute(f"SELECT COUNT(DISTINCT candidate_id) as total FROM candidate_progress{suffix} WHERE requirement_id=%s", (req_id,))
         total_res = cursor.fetchone()
         total_candidates = total_res['total'] if total_res else 0
 
@@ -73,13 +102,17 @@ def get_requirement_stats(req_id):
         # For now, let's return the raw stats and let frontend visualize.
 
         cursor.close()
+        release_pipeline_connection(pconn, conn)
         conn.close()
         
         return jsonify({
             "requirement": req,
             "stats": progress_stats,
-            "total_candidates": total_candidates
+            "total_candidates": total_candidates,
+            "archived": bool(suffix)
         }), 200
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -90,39 +123,37 @@ def get_general_stats():
     The user reported 404/403 on this endpoint, so implementing it fixes the immediate error.
     """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({"error": "Database connection failed"}), 500
-        cursor = conn.cursor(dictionary=True)
+        archived = include_archived()
+        requirements = archive_source("requirements", archived)
 
-        # Total Requirements
-        cursor.execute("SELECT COUNT(*) as total, SUM(CASE WHEN status='OPEN' THEN 1 ELSE 0 END) as open_reqs, SUM(CASE WHEN status='CLOSED' THEN 1 ELSE 0 END) as closed_reqs FROM requirements")
-        req_stats = cursor.fetchone()
+        # Independent aggregates, run concurrently (utils/fanout.py)
+        results = fan_out({
+            # Total Requirements
+            "requirements": Query(f"SELECT COUNT(*) as total, SUM(CASE WHEN status='OPEN' THEN 1 ELSE 0 END) as open_reqs, SUM(CASE WHEN status='CLOSED' THEN 1 ELSE 0 END) as closed_reqs FROM {requirements}", fetch="one"),
 
-        # Total Candidates
-        cursor.execute("SELECT COUNT(*) as total FROM candidates")
-        cand_stats = cursor.fetchone()
+            # Total Candidates
+            "candidates": Query("SELECT COUNT(*) as total FROM candidates", fetch="one"),
 
-        # Total Selections (This is tricky without a clear 'SELECTED' flag, approximating with 'COMPLETED' status in progress)
-        cursor.execute("SELECT COUNT(*) as count FROM candidate_progress WHERE status='COMPLETED'") # Approximation
-        sel_stats = cursor.fetchone()
-        selections_count = sel_stats['count'] if sel_stats else 0
+            # Total Selections (This is tricky without a clear 'SELECTED' flag, approximating with 'COMPLETED' status in progress)
+            # Summed across the primary and any pipeline shards
+            "selections": lambda: gather_count(f"SELECT COUNT(*) as count FROM {archive_source('candidate_progress', archived)} WHERE status='COMPLETED'"), # Approximation
 
-        # Client Stats
-        cursor.execute("""
-            SELECT c.name as client_name, COUNT(r.id) as req_count 
-            FROM clients c 
-            LEFT JOIN requirements r ON r.client_id = c.id 
-            GROUP BY c.id
-        """)
-        client_stats = cursor.fetchall()
+            # Client Stats
+            "client_stats": Query(f"""
+                SELECT c.name as client_name, COUNT(r.id) as req_count 
+                FROM clients c 
+                LEFT JOIN {archive_source("requirements", archived, "r")} ON r.client_id = c.id 
+                GROUP BY c.id
+            """),
+        })
+        req_stats = results["requirements"]
+        cand_stats = results["candidates"]
+        selections_count = results["selections"]
+        client_stats = results["client_stats"]
 
         # Recent Selections (Dummy or real if possible)
         selections_list = [] # Populate if we can identify them clearly
 
-        cursor.close()
-        conn.close()
-
         return jsonify({
             "requirements": req_stats,
             "candidates": cand_stats,
@@ -134,5 +165,7 @@ def get_general_stats():
             # selections.map is used for list.
             # So 'selections' should be an array of objects.
         }), 200
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,41 @@
+"""
+gunicorn settings for the ATS backend.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (preload_app) and every worker is
+forked from it, so modules, blueprints and startup data are shared
+copy-on-write instead of being rebuilt per worker. Before forking, the master
+closes its DB connections and moves everything it allocated into the GC's
+permanent generation, so collections in the workers don't touch (and copy)
+those pages.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+# Each worker holds its own DB pool: workers x DB_POOL_SIZE must stay under
+# the server's max_connections
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+# Longest per-request budget is 40s (AI chat / JD parsing, utils/deadline.py)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then; a fresh fork of the preloaded master is cheap
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded, before the first fork
+    from utils import db
+
+    db.reset_pool()
+    gc.collect()
+    gc.freeze()
+    server.log.info("App preloaded; %d objects frozen for copy-on-write", gc.get_freeze_count())
@@ -0,0 +1,215 @@
+"""
+Operational commands for the ATS backend.
+
+    python manage.py migrate            # apply all pending schema migrations
+    python manage.py migrate --to 2     # apply up to a specific version
+    python manage.py status             # show applied / pending migrations
+    python manage.py replicas           # check primary + DB_REPLICAS routing and lag
+    python manage.py replicas --routing # also verify reads move to the primary after a write
+    python manage.py shards list        # show DB_SHARDS and the client -> shard map
+    python manage.py shards init        # create the pipeline tables on every shard
+    python manage.py shards move 7 eu   # move client 7's pipeline rows to shard "eu"
+    python manage.py archive            # move old CLOSED requirements to the archive tables
+    python manage.py archive --dry-run  # only count what would be archived
+    python manage.py purge-screening-cache  # drop expired cached screening results
+"""
+import argparse
+import sys
+
+from utils import archive, db, migrations, screening_cache, sharding
+
+
+def cmd_migrate(args):
+    applied = migrations.migrate(target=args.to)
+    if applied:
+        print(f"✅ Applied {len(applied)} migration(s); schema is at version {applied[-1].version}")
+    else:
+        print("✅ Schema already up to date")
+    return 0
+
+
+def cmd_status(args):
+    current, latest = migrations.check_schema()
+    if current is None:
+        print("❌ DB connection failed")
+        return 1
+
+    print(f"Schema version: {current} (latest: {latest})")
+    for migration in migrations.discover_migrations():
+        marker = "applied" if migration.version <= current else "pending"
+        print(f"  [{marker:>7}] {migration.version:04d}_{migration.name} - {migration.description}")
+    return 0 if current >= latest else 2
+
+
+def _describe(conn):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT @@hostname AS hostname, @@port AS port, @@read_only AS read_only")
+    info = cursor.fetchone()
+    try:
+        cursor.execute("SHOW REPLICA STATUS")
+        status = cursor.fetchone() or {}
+        info["lag"] = status.get("Seconds_Behind_Source")
+    except Exception:
+        info["lag"] = None  # not a replica, or missing REPLICATION CLIENT privilege
+    cursor.close()
+    return info
+
+
+def cmd_replicas(args):
+    conn = db.get_db_connection()
+    if not conn:
+        print("❌ Primary connection failed")
+        return 1
+    info_primary = _describe(conn)
+    conn.close()
+    print(f"Primary: {info_primary['hostname']}:{info_primary['port']} read_only={info_primary['read_only']}")
+
+    if not db.replica_configs:
+        print("No DB_REPLICAS configured; reads use the primary")
+        return 0
+
+    failed = 0
+    for pool in db.get_replica_pools():
+        label = f"{pool.config['host']}:{pool.config.get('port', 3306)}"
+        try:
+            conn = pool.acquire()
+        except Exception as e:
+            print(f"  ❌ {label}: {e}")
+            failed += 1
+            continue
+        info = _describe(conn)
+        conn.close()
+        lag = "n/a" if info["lag"] is None else f"{info['lag']}s"
+        print(f"  ✅ {label} -> {info['hostname']}:{info['port']} read_only={info['read_only']} lag={lag}")
+    if failed:
+        return 1
+    return _check_routing((info_primary["hostname"], info_primary["port"])) if args.routing else 0
+
+
+def _server(readonly):
+    conn = db.get_db_connection(readonly=readonly)
+    info = _describe(conn)
+    conn.close()
+    return info["hostname"], info["port"]
+
+
+def _check_routing(primary):
+    """Which server a request's reads reach: replica by default, primary after a write or when asked."""
+    from flask import Flask
+
+    app = Flask("routing-check")
+    failed = 0
+
+    def check(label, headers, expect_primary, write_first=False):
+        nonlocal failed
+        with app.test_request_context(headers=headers):
+            if write_first:
+                conn = db.get_db_connection()
+                conn.commit()
+                conn.close()
+            server = _server(readonly=True)
+            ok = (server == primary) == expect_primary
+            failed += not ok
+            where = "primary" if server == primary else "replica"
+            print(f"  {'✅' if ok else '❌'} {label}: read went to {where} ({server[0]}:{server[1]})")
+
+    print("Read routing:")
+    check("read-only query", {}, expect_primary=False)
+    check("X-Read-Your-Writes: 1", {"X-Read-Your-Writes": "1"}, expect_primary=True)
+    check(f"{db.READ_YOUR_WRITES_COOKIE} cookie (client wrote recently)",
+          {"Cookie": f"{db.READ_YOUR_WRITES_COOKIE}=1"}, expect_primary=True)
+    check("after a commit in the same request", {}, expect_primary=True, write_first=True)
+    return 1 if failed else 0
+
+
+def cmd_shards(args):
+    if not sharding.sharding_enabled():
+        print("No DB_SHARDS configured; pipeline tables live on the primary")
+        return 0 if args.action == "list" else 1
+
+    if args.action == "init":
+        for shard in sharding.pipeline_nodes(include_primary=False):
+            print(f"⏳ Initializing shard '{shard}'")
+            sharding.init_shard_schema(shard)
+        return 0
+
+    if args.action == "move":
+        if args.client_id is None or not args.shard:
+            print("usage: manage.py shards move CLIENT_ID SHARD")
+            return 1
+        moved = sharding.move_client(args.client_id, args.shard)
+        summary = ", ".join(f"{table}={count}" for table, count in moved.items())
+        print(f"✅ Client {args.client_id} now on shard '{args.shard}' ({summary})")
+        return 0
+
+    conn = db.get_db_connection()
+    if not conn:
+        print("❌ DB connection failed")
+        return 1
+    cursor = conn.cursor()
+    cursor.execute("SELECT client_id, shard FROM client_shards ORDER BY client_id")
+    mapping = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    print("Shards: " + ", ".join(sharding.pipeline_nodes(include_primary=False)))
+    for client_id, shard in mapping:
+        print(f"  client {client_id} -> {shard}")
+    if not mapping:
+        print("  (no clients moved; all pipeline rows are on the primary)")
+    return 0
+
+
+def cmd_archive(args):
+    totals = archive.archive_closed_requirements(args.days, args.batch, args.dry_run)
+    if args.dry_run:
+        print(f"{totals['requirements']} CLOSED requirement(s) older than {args.days} days would be archived")
+        return 0
+    summary = ", ".join(f"{table}={count}" for table, count in totals.items())
+    print(f"✅ Archived {totals['requirements']} requirement(s) ({summary})")
+    return 0
+
+
+def cmd_screening_cache(args):
+    removed = screening_cache.purge_expired()
+    print(f"✅ Removed {removed} expired screening cache entr{'y' if removed == 1 else 'ies'}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ATS backend management commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_migrate = sub.add_parser("migrate", help="apply pending schema migrations")
+    p_migrate.add_argument("--to", type=int, default=None, help="stop after this version")
+    p_migrate.set_defaults(func=cmd_migrate)
+
+    p_status = sub.add_parser("status", help="show schema migration status")
+    p_status.set_defaults(func=cmd_status)
+
+    p_replicas = sub.add_parser("replicas", help="check read replica connectivity and lag")
+    p_replicas.add_argument("--routing", action="store_true",
+                            help="also check which server reads reach before and after a write")
+    p_replicas.set_defaults(func=cmd_replicas)
+
+    p_shards = sub.add_parser("shards", help="manage per-client pipeline shards")
+    p_shards.add_argument("action", choices=["list", "init", "move"])
+    p_shards.add_argument("client_id", type=int, nargs="?")
+    p_shards.add_argument("shard", nargs="?")
+    p_shards.set_defaults(func=cmd_shards)
+
+    p_archive = sub.add_parser("archive", help="archive old CLOSED requirements and their rows")
+    p_archive.add_argument("--days", type=int, default=archive.ARCHIVE_AFTER_DAYS, help="minimum age in days")
+    p_archive.add_argument("--batch", type=int, default=archive.ARCHIVE_BATCH_SIZE, help="requirements per transaction")
+    p_archive.add_argument("--dry-run", action="store_true", help="count eligible requirements only")
+    p_archive.set_defaults(func=cmd_archive)
+
+    p_cache = sub.add_parser("purge-screening-cache", help="delete expired cached screening results")
+    p_cache.set_defaults(func=cmd_screening_cache)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Baseline schema: every table the ATS backend expects."""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(150) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            role ENUM('ADMIN','DELIVERY_MANAGER','TEAM_LEAD','RECRUITER','CLIENT','CANDIDATE') DEFAULT 'RECRUITER',
+            phone VARCHAR(20),
+            status VARCHAR(20) DEFAULT 'ACTIVE',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS usersdata (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100),
+            email VARCHAR(150) UNIQUE,
+            phone VARCHAR(20),
+            role VARCHAR(50),
+            status VARCHAR(20) DEFAULT 'ACTIVE',
+            password_hash VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clients (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            contact_person VARCHAR(255),
+            email VARCHAR(255),
+            phone VARCHAR(50),
+            address TEXT,
+            status ENUM('ACTIVE','INACTIVE') DEFAULT 'ACTIVE',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS interviews (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT NOT NULL,
+            requirement_id VARCHAR(64),
+            category VARCHAR(50),
+            stage VARCHAR(100),
+            date DATE,
+            time TIME,
+            duration VARCHAR(50),
+            mode VARCHAR(50),
+            location VARCHAR(255),
+            interviewer VARCHAR(255),
+            notes TEXT,
+            status VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirements (
+            id VARCHAR(50) PRIMARY KEY,
+            client_id INT,
+            title VARCHAR(255),
+            description TEXT,
+            location VARCHAR(100),
+            skills_required VARCHAR(255),
+            experience_required FLOAT,
+            ctc_range VARCHAR(100),
+            no_of_rounds INT DEFAULT 1,
+            status VARCHAR(50) DEFAULT 'OPEN',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_by VARCHAR(100),
+            FOREIGN KEY (client_id) REFERENCES clients(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_allocations (
+            id VARCHAR(50) PRIMARY KEY,
+            requirement_id VARCHAR(50),
+            recruiter_id INT,
+            assigned_by INT,
+            status VARCHAR(20) DEFAULT 'ASSIGNED',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id),
+            FOREIGN KEY (recruiter_id) REFERENCES users(id),
+            FOREIGN KEY (assigned_by) REFERENCES users(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidates (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255),
+            email VARCHAR(255),
+            phone VARCHAR(20),
+            skills TEXT,
+            education TEXT,
+            experience TEXT,
+            ctc VARCHAR(50),
+            ectc VARCHAR(50),
+            resume_filename VARCHAR(255),
+            created_by INT,
+            source VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (created_by) REFERENCES users(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS requirement_stages (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            requirement_id VARCHAR(50),
+            stage_order INT,
+            stage_name VARCHAR(255),
+            is_mandatory BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_progress (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT,
+            requirement_id VARCHAR(50),
+            stage_id BIGINT,
+            stage_name VARCHAR(255),
+            status ENUM('PENDING','IN_PROGRESS','COMPLETED','REJECTED','REVIEW_REQUIRED') DEFAULT 'PENDING',
+            decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
+            manual_decision ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE',
+            category VARCHAR(50),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id),
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id),
+            FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_screening (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT,
+            requirement_id VARCHAR(64),
+            ai_score FLOAT,
+            ai_rationale TEXT,
+            recommend VARCHAR(32),
+            red_flags TEXT,
+            model_version VARCHAR(50),
+            status ENUM('PENDING','DONE','ERROR') DEFAULT 'PENDING',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS assesment_queue (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            candidate_id INT NOT NULL,
+            requirement_id VARCHAR(64) NOT NULL,
+            status VARCHAR(32) DEFAULT 'PENDING',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+            FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+        )
+    """)
@@ -0,0 +1,40 @@
+"""Bring tables created by older releases up to the baseline columns and keys."""
+from utils.migrations import column_exists, constraint_exists, index_exists
+
+
+def _add_column(cursor, table, column, definition):
+    if not column_exists(cursor, table, column):
+        print(f"   -> Adding '{table}.{column}' column...")
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def upgrade(cursor):
+    _add_column(cursor, "requirements", "no_of_rounds", "INT DEFAULT 1")
+
+    _add_column(cursor, "candidates", "ctc", "VARCHAR(50)")
+    _add_column(cursor, "candidates", "ectc", "VARCHAR(50)")
+
+    _add_column(cursor, "requirement_allocations", "status", "VARCHAR(20) DEFAULT 'ASSIGNED'")
+    _add_column(cursor, "requirement_allocations", "created_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+
+    _add_column(cursor, "candidate_progress", "stage_id", "BIGINT")
+    if not constraint_exists(cursor, "candidate_progress", "fk_cp_stage"):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'candidate_progress' "
+                       "AND COLUMN_NAME = 'stage_id' AND REFERENCED_TABLE_NAME = 'requirement_stages'")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("ALTER TABLE candidate_progress ADD CONSTRAINT fk_cp_stage "
+                           "FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)")
+    _add_column(cursor, "candidate_progress", "stage_name", "VARCHAR(255)")
+    _add_column(cursor, "candidate_progress", "decision", "ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'")
+    _add_column(cursor, "candidate_progress", "manual_decision", "ENUM('NONE','MOVE_NEXT','HOLD','REJECT') DEFAULT 'NONE'")
+    _add_column(cursor, "candidate_progress", "category", "VARCHAR(50)")
+
+    # The progress key moved from (candidate, requirement) to one row per stage
+    if index_exists(cursor, "candidate_progress", "uniq_progress"):
+        print("   -> Dropping old unique key 'uniq_progress'...")
+        cursor.execute("ALTER TABLE candidate_progress DROP INDEX uniq_progress")
+    if not index_exists(cursor, "candidate_progress", "uniq_progress_stage"):
+        print("   -> Adding unique key 'uniq_progress_stage'...")
+        cursor.execute("ALTER TABLE candidate_progress "
+                       "ADD UNIQUE KEY uniq_progress_stage (candidate_id, requirement_id, stage_id)")
@@ -0,0 +1,6 @@
+"""Normalize users.status and enforce the ACTIVE default at the schema level."""
+
+
+def upgrade(cursor):
+    cursor.execute("UPDATE users SET status = 'ACTIVE' WHERE status IS NULL OR status = ''")
+    cursor.execute("ALTER TABLE users MODIFY status VARCHAR(20) NOT NULL DEFAULT 'ACTIVE'")
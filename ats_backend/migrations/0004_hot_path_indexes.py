@@ -0,0 +1,36 @@
+"""Secondary indexes for the hot filters and orderings found by tools/index_audit.py."""
+from utils.migrations import index_exists
+
+# (table, index name, columns) -- each entry removes a full scan or filesort
+# reported by `python -m tools.index_audit` on a seeded database.
+INDEXES = [
+    # /get-candidates (recruiter view), /users/<id>/details, AI self context
+    ("candidates", "idx_candidates_created_by", "created_by, id"),
+    # reports + AI tracking stats: per-requirement status counts
+    ("candidate_progress", "idx_progress_req_status", "requirement_id, status"),
+    # /api/interviews orders by date/time after a != filter on status
+    ("interviews", "idx_interviews_date_time", "date, time"),
+    # /candidate-progress/<id>/<req>: interviews for one candidate + requirement
+    ("interviews", "idx_interviews_cand_req", "candidate_id, requirement_id, date"),
+    # latest screening per candidate + requirement
+    ("candidate_screening", "idx_screening_cand_req_created", "candidate_id, requirement_id, created_at"),
+    # recruiter allocations newest first
+    ("requirement_allocations", "idx_alloc_recruiter_created", "recruiter_id, created_at"),
+    # /recent-requirements, /get-requirements, AI requirement lists
+    ("requirements", "idx_requirements_created", "created_at"),
+    # /api/reports/client/<id>/requirements
+    ("requirements", "idx_requirements_client_created", "client_id, created_at"),
+    # stage lists ordered by stage_order
+    ("requirement_stages", "idx_stages_req_order", "requirement_id, stage_order"),
+    # /get-users ordered by created_at
+    ("users", "idx_users_created", "created_at"),
+]
+
+
+def upgrade(cursor):
+    for table, name, columns in INDEXES:
+        if index_exists(cursor, table, name):
+            continue
+        print(f"   -> Adding index {name} on {table} ({columns})...")
+        # Online DDL: keeps the table writable while the index builds
+        cursor.execute(f"ALTER TABLE {table} ADD INDEX {name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
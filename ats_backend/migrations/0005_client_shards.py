@@ -0,0 +1,12 @@
+"""Shard map for the optional per-client pipeline sharding (utils/sharding.py)."""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS client_shards (
+            client_id INT PRIMARY KEY,
+            shard VARCHAR(64) NOT NULL,
+            moved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (client_id) REFERENCES clients(id)
+        )
+    """)
@@ -0,0 +1,18 @@
+"""Archive tables for closed requirements and their child rows (utils/archive.py)."""
+
+# Same columns and indexes as the hot tables, no foreign keys. A later
+# migration that changes one of these hot tables must change its archive too.
+TABLES = [
+    "requirements",
+    "requirement_stages",
+    "requirement_allocations",
+    "assesment_queue",
+    "candidate_progress",
+    "candidate_screening",
+    "interviews",
+]
+
+
+def upgrade(cursor):
+    for table in TABLES:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_archive LIKE {table}")
@@ -0,0 +1,14 @@
+"""Persistent tier of the screening result cache (utils/screening_cache.py)."""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS screening_cache (
+            cache_key CHAR(64) PRIMARY KEY,
+            model_version VARCHAR(100) NOT NULL,
+            result_json TEXT NOT NULL,
+            expires_at BIGINT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_screening_cache_expires (expires_at)
+        )
+    """)
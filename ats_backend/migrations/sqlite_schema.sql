@@ -0,0 +1,189 @@
+-- SQLite schema for DB_BACKEND=sqlite (utils/sqlite_backend.py).
+--
+-- The numbered migrations are MySQL DDL; an SQLite database is created
+-- directly at head from this file by `python manage.py migrate`, which also
+-- adds the 0004 indexes and the 0006 archive tables from those modules.
+-- A migration that changes a table must update this file and the version
+-- below, or SQLite installs refuse to start.
+--
+-- schema version: 7
+--
+-- ENUM columns are TEXT with a CHECK (col IN (...)) constraint; the backend
+-- reports them as enum('...') in information_schema.COLUMNS.
+-- Text columns that are compared, filtered or joined on are COLLATE NOCASE,
+-- like MySQL's default case-insensitive collation ('Open' = 'OPEN'); add it
+-- to any such new column.
+-- Keep one column or constraint per line: archive tables are derived by
+-- dropping the FOREIGN KEY lines.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) COLLATE NOCASE NOT NULL,
+    email VARCHAR(150) COLLATE NOCASE NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    role TEXT COLLATE NOCASE DEFAULT 'RECRUITER' CHECK (role IN ('ADMIN','DELIVERY_MANAGER','TEAM_LEAD','RECRUITER','CLIENT','CANDIDATE')),
+    phone VARCHAR(20),
+    status VARCHAR(20) COLLATE NOCASE NOT NULL DEFAULT 'ACTIVE',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS usersdata (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) COLLATE NOCASE,
+    email VARCHAR(150) COLLATE NOCASE UNIQUE,
+    phone VARCHAR(20),
+    role VARCHAR(50) COLLATE NOCASE,
+    status VARCHAR(20) COLLATE NOCASE DEFAULT 'ACTIVE',
+    password_hash VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) COLLATE NOCASE NOT NULL,
+    contact_person VARCHAR(255) COLLATE NOCASE,
+    email VARCHAR(255) COLLATE NOCASE,
+    phone VARCHAR(50),
+    address TEXT,
+    status TEXT COLLATE NOCASE DEFAULT 'ACTIVE' CHECK (status IN ('ACTIVE','INACTIVE')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS interviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id INT NOT NULL,
+    requirement_id VARCHAR(64) COLLATE NOCASE,
+    category VARCHAR(50) COLLATE NOCASE,
+    stage VARCHAR(100) COLLATE NOCASE,
+    date DATE,
+    time VARCHAR(16),
+    duration VARCHAR(50),
+    mode VARCHAR(50) COLLATE NOCASE,
+    location VARCHAR(255),
+    interviewer VARCHAR(255) COLLATE NOCASE,
+    notes TEXT,
+    status VARCHAR(50) COLLATE NOCASE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS requirements (
+    id VARCHAR(50) COLLATE NOCASE PRIMARY KEY,
+    client_id INT,
+    title VARCHAR(255) COLLATE NOCASE,
+    description TEXT,
+    location VARCHAR(100) COLLATE NOCASE,
+    skills_required VARCHAR(255),
+    experience_required FLOAT,
+    ctc_range VARCHAR(100),
+    no_of_rounds INT DEFAULT 1,
+    status VARCHAR(50) COLLATE NOCASE DEFAULT 'OPEN',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_by VARCHAR(100) COLLATE NOCASE,
+    FOREIGN KEY (client_id) REFERENCES clients(id)
+);
+
+CREATE TABLE IF NOT EXISTS requirement_allocations (
+    id VARCHAR(50) COLLATE NOCASE PRIMARY KEY,
+    requirement_id VARCHAR(50) COLLATE NOCASE,
+    recruiter_id INT,
+    assigned_by INT,
+    status VARCHAR(20) COLLATE NOCASE DEFAULT 'ASSIGNED',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (requirement_id) REFERENCES requirements(id),
+    FOREIGN KEY (recruiter_id) REFERENCES users(id),
+    FOREIGN KEY (assigned_by) REFERENCES users(id)
+);
+
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) COLLATE NOCASE,
+    email VARCHAR(255) COLLATE NOCASE,
+    phone VARCHAR(20),
+    skills TEXT,
+    education TEXT,
+    experience TEXT,
+    ctc VARCHAR(50),
+    ectc VARCHAR(50),
+    resume_filename VARCHAR(255),
+    created_by INT,
+    source VARCHAR(50) COLLATE NOCASE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (created_by) REFERENCES users(id)
+);
+
+CREATE TABLE IF NOT EXISTS requirement_stages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    requirement_id VARCHAR(50) COLLATE NOCASE,
+    stage_order INT,
+    stage_name VARCHAR(255) COLLATE NOCASE,
+    is_mandatory BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+);
+
+CREATE TABLE IF NOT EXISTS candidate_progress (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id INT,
+    requirement_id VARCHAR(50) COLLATE NOCASE,
+    stage_id BIGINT,
+    stage_name VARCHAR(255) COLLATE NOCASE,
+    status TEXT COLLATE NOCASE DEFAULT 'PENDING' CHECK (status IN ('PENDING','IN_PROGRESS','COMPLETED','REJECTED','REVIEW_REQUIRED')),
+    decision TEXT COLLATE NOCASE DEFAULT 'NONE' CHECK (decision IN ('NONE','MOVE_NEXT','HOLD','REJECT')),
+    manual_decision TEXT COLLATE NOCASE DEFAULT 'NONE' CHECK (manual_decision IN ('NONE','MOVE_NEXT','HOLD','REJECT')),
+    category VARCHAR(50) COLLATE NOCASE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uniq_progress_stage UNIQUE (candidate_id, requirement_id, stage_id),
+    FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+    FOREIGN KEY (requirement_id) REFERENCES requirements(id),
+    FOREIGN KEY (stage_id) REFERENCES requirement_stages(id)
+);
+
+-- MySQL's ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER IF NOT EXISTS candidate_progress_touch
+AFTER UPDATE ON candidate_progress
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE candidate_progress SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS candidate_screening (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id INT,
+    requirement_id VARCHAR(64) COLLATE NOCASE,
+    ai_score FLOAT,
+    ai_rationale TEXT,
+    recommend VARCHAR(32) COLLATE NOCASE,
+    red_flags TEXT,
+    model_version VARCHAR(50),
+    status TEXT COLLATE NOCASE DEFAULT 'PENDING' CHECK (status IN ('PENDING','DONE','ERROR')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+    FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+);
+
+CREATE TABLE IF NOT EXISTS assesment_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id INT NOT NULL,
+    requirement_id VARCHAR(64) COLLATE NOCASE NOT NULL,
+    status VARCHAR(32) COLLATE NOCASE DEFAULT 'PENDING',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (candidate_id) REFERENCES candidates(id),
+    FOREIGN KEY (requirement_id) REFERENCES requirements(id)
+);
+
+CREATE TABLE IF NOT EXISTS client_shards (
+    client_id INT PRIMARY KEY,
+    shard VARCHAR(64) COLLATE NOCASE NOT NULL,
+    moved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (client_id) REFERENCES clients(id)
+);
+
+CREATE TABLE IF NOT EXISTS screening_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    model_version VARCHAR(100) NOT NULL,
+    result_json TEXT NOT NULL,
+    expires_at BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_screening_cache_expires ON screening_cache (expires_at);
@@ -1,72 +1,80 @@
+from contextvars import ContextVar
 from typing import Any, Dict, List, Optional, Tuple
 
 # This module provides role-aware, plain-JSON data fetchers for the AI assistant.
-# It reuses the existing DB connection factory from the Flask app without altering models.
+# It reuses the app's pooled DB layer: every fetcher inside one request shares
+# a single request-scoped connection instead of opening its own.
+# services/ai_data_service_async.py has awaitable versions of the same fetchers.
 
-import os
-import mysql.connector
 from mysql.connector import Error
-from pathlib import Path
 
-# Load environment variables (same as app.py)
-try:
-	from dotenv import load_dotenv
-	env_file = Path(__file__).parent.parent / ".env"
-	if not env_file.exists():
-		env_file = Path(__file__).parent.parent / "config.env"
-	if env_file.exists():
-		load_dotenv(dotenv_path=env_file, override=True)
-except ImportError:
-	pass  # dotenv not available, use system env vars
+from utils.db import request_connection
+from utils.approx_counts import cached_count
+from utils.fanout import Query, fan_out
+from utils.sharding import get_pipeline_connection, release_pipeline_connection
 
 
-def get_db_connection():
+UserDict = Dict[str, Any]
+
+# While set, _fetch_one/_fetch_all record the Query they would run and return
+# it instead of running it, so the async module can execute a fetcher's query
+# itself. Only fetchers that return that one query's result unchanged can be
+# planned; plan_query() raises for any other.
+_planning: ContextVar[Optional[List[Query]]] = ContextVar("ai_data_planning", default=None)
+
 
+def plan_query(fetcher, *args: Any) -> Any:
+	"""The Query ``fetcher(*args)`` would run, or its result when it runs none (e.g. access denied)."""
+	planned: List[Query] = []
+	token = _planning.set(planned)
 	try:
-		connection = mysql.connector.connect(
-			host=os.getenv('DB_HOST', 'localhost'),
-			user=os.getenv('DB_USER', 'root'),
-			password=os.getenv('DB_PASSWORD', ''),
-			database=os.getenv('DB_NAME', 'ats_system')
-		)
-		if connection.is_connected():
-			return connection
-	except Error as e:
-		print("❌ AI service DB connection failed:", e)
-		return None
+		result = fetcher(*args)
+	finally:
+		_planning.reset(token)
+	if planned and result is not planned[0]:
+		raise RuntimeError(f"{fetcher.__name__} does more than return its query's rows; it can't be planned")
+	return result
 
 
-UserDict = Dict[str, Any]
+def _plan(query: str, params: Tuple[Any, ...], fetch: str) -> Query:
+
+	planned = _planning.get()
+	if planned:
+		raise RuntimeError("plan_query: the fetcher ran a second query; pass its SQL explicitly instead")
+	planned.append(Query(query, params, fetch))
+	return planned[0]
 
 
 def _fetch_one(query: str, params: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
 
-	conn = get_db_connection()
-	if not conn:
-		return None
-	cursor = conn.cursor(dictionary=True)
-	try:
-		cursor.execute(query, params)
-		row = cursor.fetchone()
-		return dict(row) if row else None
-	finally:
-		cursor.close()
-		conn.close()
+	if _planning.get() is not None:
+		return _plan(query, params, "one")
+	with request_connection(readonly=True) as conn:
+		if not conn:
+			return None
+		cursor = conn.cursor(dictionary=True)
+		try:
+			cursor.execute(query, params)
+			row = cursor.fetchone()
+			return dict(row) if row else None
+		finally:
+			cursor.close()
 
 
 def _fetch_all(query: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
 
-	conn = get_db_connection()
-	if not conn:
-		return []
-	cursor = conn.cursor(dictionary=True)
-	try:
-		cursor.execute(query, params)
-		rows = cursor.fetchall()
-		return [dict(r) for r in rows] if rows else []
-	finally:
-		cursor.close()
-		conn.close()
+	if _planning.get() is not None:
+		return _plan(query, params, "all")
+	with request_connection(readonly=True) as conn:
+		if not conn:
+			return []
+		cursor = conn.cursor(dictionary=True)
+		try:
+			cursor.execute(query, params)
+			rows = cursor.fetchall()
+			return [dict(r) for r in rows] if rows else []
+		finally:
+			cursor.close()
 
 
 def _is_admin(user: UserDict) -> bool:
@@ -536,7 +544,7 @@ def list_candidates_created_by_user(user_id: int) -> List[Dict[str, Any]]:
 	)
 
 
-def get_org_stats_snapshot() -> Dict[str, int]:
+def get_org_stats_snapshot() -> Dict[str, Any]:
 
 	stats = {
 		"total_requirements": 0,
@@ -546,30 +554,26 @@ def get_org_stats_snapshot() -> Dict[str, int]:
 		"total_clients": 0,
 	}
 
-	conn = get_db_connection()
-	if not conn:
-		return stats
-	cursor = conn.cursor(dictionary=True)
-	try:
-		cursor.execute("SELECT COUNT(*) AS total_requirements FROM requirements")
-		stats["total_requirements"] = cursor.fetchone().get("total_requirements", 0)
-
-		cursor.execute("SELECT COUNT(*) AS open_requirements FROM requirements WHERE status = 'OPEN'")
-		stats["open_requirements"] = cursor.fetchone().get("open_requirements", 0)
-
-		cursor.execute("SELECT COUNT(*) AS total_candidates FROM candidates")
-		stats["total_candidates"] = cursor.fetchone().get("total_candidates", 0)
-
-		cursor.execute("SELECT COUNT(*) AS total_users FROM users")
-		stats["total_users"] = cursor.fetchone().get("total_users", 0)
-
-		cursor.execute("SELECT COUNT(*) AS total_clients FROM clients")
-		stats["total_clients"] = cursor.fetchone().get("total_clients", 0)
-
-		return stats
-	finally:
-		cursor.close()
-		conn.close()
+	# Independent counts, run concurrently on pooled replica connections
+	def count_all() -> Optional[Dict[str, int]]:
+		try:
+			results = fan_out({
+				"total_requirements": Query("SELECT COUNT(*) AS total_requirements FROM requirements", fetch="one"),
+				"open_requirements": Query("SELECT COUNT(*) AS open_requirements FROM requirements WHERE status = 'OPEN'", fetch="one"),
+				"total_candidates": Query("SELECT COUNT(*) AS total_candidates FROM candidates", fetch="one"),
+				"total_users": Query("SELECT COUNT(*) AS total_users FROM users", fetch="one"),
+				"total_clients": Query("SELECT COUNT(*) AS total_clients FROM clients", fetch="one"),
+			})
+		except Error:
+			return None
+		return {key: row.get(key, 0) for key, row in results.items()}
+
+	# Headline numbers: served from a snapshot unless ?exact=1 (utils/approx_counts.py)
+	counts, approximate = cached_count(("org",), count_all)
+	if counts:
+		stats.update(counts)
+	stats["approximate"] = approximate
+	return stats
 
 
 def build_user_self_context(user: UserDict) -> Dict[str, Any]:
@@ -678,64 +682,85 @@ def get_tracking_stats_for_requirement(requirement_id: str, user: UserDict) -> D
 	if not (_is_admin(user) or _is_recruiter(user) or (user or {}).get("role", "").upper() == "DELIVERY_MANAGER"):
 		return {}
 	
-	conn = get_db_connection()
-	if not conn:
-		return {}
-	
-	cursor = conn.cursor(dictionary=True)
-	try:
-		# Get total candidates screened
-		cursor.execute(
-			"SELECT COUNT(DISTINCT candidate_id) AS total FROM candidate_screening WHERE requirement_id = %s",
-			(requirement_id,)
-		)
-		total_screened = cursor.fetchone().get("total", 0)
+	with request_connection(readonly=True) as conn:
+		if not conn:
+			return {}
+
+		def count_pipeline() -> Optional[Dict[str, int]]:
+			# Final-round stage ids come from the primary; the pipeline rows may be on a shard
+			cursor = conn.cursor(dictionary=True)
+			cursor.execute(
+				"""
+				SELECT rs.id
+				FROM requirement_stages rs
+				JOIN requirements r ON r.id = rs.requirement_id
+				WHERE rs.requirement_id = %s AND rs.stage_order = r.no_of_rounds
+				""",
+				(requirement_id,)
+			)
+			final_stage_ids = [row["id"] for row in cursor.fetchall()]
+			cursor.close()
+
+			pconn = get_pipeline_connection(requirement_id, conn, readonly=True)
+			if not pconn:
+				return None
+
+			cursor = pconn.cursor(dictionary=True)
+			try:
+				# Get total candidates screened
+				cursor.execute(
+					"SELECT COUNT(DISTINCT candidate_id) AS total FROM candidate_screening WHERE requirement_id = %s",
+					(requirement_id,)
+				)
+				total_screened = cursor.fetchone().get("total", 0)
 		
-		# Get candidates in progress
-		cursor.execute(
-			"""
-			SELECT COUNT(DISTINCT cp.candidate_id) AS total
-			FROM candidate_progress cp
-			WHERE cp.requirement_id = %s AND cp.status IN ('PENDING', 'IN_PROGRESS')
-			""",
-			(requirement_id,)
-		)
-		in_progress = cursor.fetchone().get("total", 0)
+				# Get candidates in progress
+				cursor.execute(
+					"""
+					SELECT COUNT(DISTINCT cp.candidate_id) AS total
+					FROM candidate_progress cp
+					WHERE cp.requirement_id = %s AND cp.status IN ('PENDING', 'IN_PROGRESS')
+					""",
+					(requirement_id,)
+				)
+				in_progress = cursor.fetchone().get("total", 0)
 		
-		# Get qualified (completed last round)
-		cursor.execute(
-			"""
-			SELECT COUNT(DISTINCT cp.candidate_id) AS total
-			FROM candidate_progress cp
-			JOIN requirement_stages rs ON rs.id = cp.stage_id
-			JOIN requirements r ON r.id = cp.requirement_id
-			WHERE cp.requirement_id = %s 
-			  AND rs.stage_order = r.no_of_rounds
-			  AND cp.status = 'COMPLETED'
-			""",
-			(requirement_id,)
-		)
-		qualified = cursor.fetchone().get("total", 0)
+				# Get qualified (completed last round)
+				qualified = 0
+				if final_stage_ids:
+					cursor.execute(
+						"""
+						SELECT COUNT(DISTINCT cp.candidate_id) AS total
+						FROM candidate_progress cp
+						WHERE cp.requirement_id = %%s
+						  AND cp.stage_id IN (%s)
+						  AND cp.status = 'COMPLETED'
+						""" % ",".join(["%s"] * len(final_stage_ids)),
+						(requirement_id, *final_stage_ids)
+					)
+					qualified = cursor.fetchone().get("total", 0)
 		
-		# Get rejected
-		cursor.execute(
-			"""
-			SELECT COUNT(DISTINCT candidate_id) AS total
-			FROM candidate_progress
-			WHERE requirement_id = %s AND status = 'REJECTED'
-			""",
-			(requirement_id,)
-		)
-		rejected = cursor.fetchone().get("total", 0)
+				# Get rejected
+				cursor.execute(
+					"""
+					SELECT COUNT(DISTINCT candidate_id) AS total
+					FROM candidate_progress
+					WHERE requirement_id = %s AND status = 'REJECTED'
+					""",
+					(requirement_id,)
+				)
+				rejected = cursor.fetchone().get("total", 0)
 		
-		return {
-			"total_screened": total_screened,
-			"in_progress": in_progress,
-			"qualified": qualified,
-			"rejected": rejected
-		}
-	finally:
-		cursor.close()
-		conn.close()
-
-
+				return {
+					"total_screened": total_screened,
+					"in_progress": in_progress,
+					"qualified": qualified,
+					"rejected": rejected
+				}
+			finally:
+				cursor.close()
+				release_pipeline_connection(pconn, conn)
+
+		# Headline numbers: served from a snapshot unless ?exact=1 (utils/approx_counts.py)
+		stats, approximate = cached_count(("tracking", str(requirement_id)), count_pipeline)
+		return dict(stats, approximate=approximate) if stats else {}
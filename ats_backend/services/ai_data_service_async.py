@@ -0,0 +1,193 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Awaitable versions of the services/ai_data_service.py fetchers, for async
+# handlers that want to gather their context queries concurrently:
+#
+#     ctx = await gather(
+#         profile=get_user_profile_summary(user_id),
+#         assignments=list_assignments_for_user(user_id),
+#         clients=list_clients_for_user(user),
+#     )
+#
+# Each fetcher runs the exact query (and role checks) of its sync twin, on its
+# own connection from utils/async_db.py. The sync module stays the API for the
+# Flask routes; sync code can still gather via async_db.run(coro).
+
+from mysql.connector import Error
+
+from services import ai_data_service as sync
+from services.ai_data_service import UserDict, _is_admin, _is_recruiter
+from utils import async_db
+from utils.approx_counts import cached_count_async
+from utils.fanout import Query
+from utils.sharding import sharding_enabled
+
+
+def _async_fetcher(fetcher: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+
+	async def fetch(*args: Any) -> Any:
+		plan = sync.plan_query(fetcher, *args)
+		if not isinstance(plan, Query):
+			return plan  # the fetcher answered without a query
+		if plan.fetch == "one":
+			return await async_db.fetch_one(plan.sql, plan.params)
+		return await async_db.fetch_all(plan.sql, plan.params)
+
+	fetch.__name__ = fetcher.__name__
+	fetch.__doc__ = fetcher.__doc__
+	return fetch
+
+
+async def gather(**named: Awaitable[Any]) -> Dict[str, Any]:
+	"""Await keyword coroutines concurrently; returns ``{name: result}``."""
+	results = await asyncio.gather(*named.values())
+	return dict(zip(named.keys(), results))
+
+
+get_candidate_by_name_for_user = _async_fetcher(sync.get_candidate_by_name_for_user)
+get_candidate_track_for_user = _async_fetcher(sync.get_candidate_track_for_user)
+list_candidates_for_user = _async_fetcher(sync.list_candidates_for_user)
+get_requirement_for_user = _async_fetcher(sync.get_requirement_for_user)
+get_interviews_for_user = _async_fetcher(sync.get_interviews_for_user)
+get_requirement_by_id_for_user = _async_fetcher(sync.get_requirement_by_id_for_user)
+list_requirements_for_recruiter = _async_fetcher(sync.list_requirements_for_recruiter)
+list_requirements_for_client = _async_fetcher(sync.list_requirements_for_client)
+list_requirements_for_admin = _async_fetcher(sync.list_requirements_for_admin)
+list_requirement_allocations = _async_fetcher(sync.list_requirement_allocations)
+get_client_by_id_for_user = _async_fetcher(sync.get_client_by_id_for_user)
+get_allocations_for_requirement = _async_fetcher(sync.get_allocations_for_requirement)
+list_clients_for_user = _async_fetcher(sync.list_clients_for_user)
+list_users_for_admin = _async_fetcher(sync.list_users_for_admin)
+list_usersdata = _async_fetcher(sync.list_usersdata)
+list_recruiters_for_user = _async_fetcher(sync.list_recruiters_for_user)
+get_recruiter_by_query = _async_fetcher(sync.get_recruiter_by_query)
+get_client_for_user = _async_fetcher(sync.get_client_for_user)
+get_user_profile_summary = _async_fetcher(sync.get_user_profile_summary)
+list_assignments_for_user = _async_fetcher(sync.list_assignments_for_user)
+list_candidates_created_by_user = _async_fetcher(sync.list_candidates_created_by_user)
+get_candidate_progress_for_requirement = _async_fetcher(sync.get_candidate_progress_for_requirement)
+get_candidates_in_last_round = _async_fetcher(sync.get_candidates_in_last_round)
+get_qualified_candidates = _async_fetcher(sync.get_qualified_candidates)
+
+
+async def get_org_stats_snapshot() -> Dict[str, Any]:
+
+	stats = {
+		"total_requirements": 0,
+		"open_requirements": 0,
+		"total_candidates": 0,
+		"total_users": 0,
+		"total_clients": 0,
+	}
+
+	async def count_all() -> Optional[Dict[str, int]]:
+		try:
+			rows = await gather(
+				total_requirements=async_db.fetch_one("SELECT COUNT(*) AS total_requirements FROM requirements"),
+				open_requirements=async_db.fetch_one("SELECT COUNT(*) AS open_requirements FROM requirements WHERE status = 'OPEN'"),
+				total_candidates=async_db.fetch_one("SELECT COUNT(*) AS total_candidates FROM candidates"),
+				total_users=async_db.fetch_one("SELECT COUNT(*) AS total_users FROM users"),
+				total_clients=async_db.fetch_one("SELECT COUNT(*) AS total_clients FROM clients"),
+			)
+		except Error:
+			return None
+		return {key: (row or {}).get(key, 0) for key, row in rows.items()}
+
+	# Same snapshot as the sync version (utils/approx_counts.py)
+	counts, approximate = await cached_count_async(("org",), count_all)
+	if counts:
+		stats.update(counts)
+	stats["approximate"] = approximate
+	return stats
+
+
+async def build_user_self_context(user: UserDict) -> Dict[str, Any]:
+
+	if not user or not user.get("id"):
+		return {}
+
+	user_id = user.get("id")
+	role = (user.get("role") or "").upper()
+
+	queries = {
+		"self_profile": get_user_profile_summary(user_id),
+		"self_assignments": list_assignments_for_user(user_id),
+		"self_candidates": list_candidates_created_by_user(user_id),
+	}
+	if role in ("ADMIN", "DELIVERY_MANAGER"):
+		queries["self_org_stats"] = get_org_stats_snapshot()
+
+	return await gather(**queries)
+
+
+async def get_tracking_stats_for_requirement(requirement_id: str, user: UserDict) -> Dict[str, Any]:
+	"""Get tracking statistics for a requirement."""
+	if not (_is_admin(user) or _is_recruiter(user) or (user or {}).get("role", "").upper() == "DELIVERY_MANAGER"):
+		return {}
+
+	if sharding_enabled():
+		# Shard routing is sync-only: run the sync version off the event loop
+		return await asyncio.to_thread(sync.get_tracking_stats_for_requirement, requirement_id, user)
+
+	async def count_pipeline() -> Optional[Dict[str, int]]:
+		final_stages = await async_db.fetch_all(
+			"""
+			SELECT rs.id
+			FROM requirement_stages rs
+			JOIN requirements r ON r.id = rs.requirement_id
+			WHERE rs.requirement_id = %s AND rs.stage_order = r.no_of_rounds
+			""",
+			(requirement_id,),
+		)
+		final_stage_ids = [row["id"] for row in final_stages]
+
+		queries = {
+			"total_screened": async_db.fetch_one(
+				"SELECT COUNT(DISTINCT candidate_id) AS total FROM candidate_screening WHERE requirement_id = %s",
+				(requirement_id,),
+			),
+			"in_progress": async_db.fetch_one(
+				"""
+				SELECT COUNT(DISTINCT cp.candidate_id) AS total
+				FROM candidate_progress cp
+				WHERE cp.requirement_id = %s AND cp.status IN ('PENDING', 'IN_PROGRESS')
+				""",
+				(requirement_id,),
+			),
+			"rejected": async_db.fetch_one(
+				"""
+				SELECT COUNT(DISTINCT candidate_id) AS total
+				FROM candidate_progress
+				WHERE requirement_id = %s AND status = 'REJECTED'
+				""",
+				(requirement_id,),
+			),
+		}
+		if final_stage_ids:
+			queries["qualified"] = async_db.fetch_one(
+				"""
+				SELECT COUNT(DISTINCT cp.candidate_id) AS total
+				FROM candidate_progress cp
+				WHERE cp.requirement_id = %%s
+				  AND cp.stage_id IN (%s)
+				  AND cp.status = 'COMPLETED'
+				""" % ",".join(["%s"] * len(final_stage_ids)),
+				(requirement_id, *final_stage_ids),
+			)
+
+		try:
+			rows = await gather(**queries)
+		except Error:
+			return None
+		counts = {key: (row or {}).get("total", 0) for key, row in rows.items()}
+		return {
+			"total_screened": counts["total_screened"],
+			"in_progress": counts["in_progress"],
+			"qualified": counts.get("qualified", 0),
+			"rejected": counts["rejected"],
+		}
+
+	# Same snapshot as the sync version (utils/approx_counts.py)
+	stats, approximate = await cached_count_async(("tracking", str(requirement_id)), count_pipeline)
+	return dict(stats, approximate=approximate) if stats else {}
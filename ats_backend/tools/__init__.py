@@ -0,0 +1 @@
+# Developer tooling (audits, benchmarks). Run as python -m tools.<name>.
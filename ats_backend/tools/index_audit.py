@@ -0,0 +1,493 @@
+"""
+EXPLAIN audit and index advisor for every SQL statement in the backend.
+
+Collects the literal SQL passed to cursor.execute / conn.prepared / _fetch_one / _fetch_all,
+the Query(...) aggregates run by fan_out() and the gather_count() sums (utils/sharding.py),
+plus the first-page SELECT each paginate() call builds (utils/pagination.py) and f-string
+SQL whose table comes from archive_source() (audited against the hot table), in
+app.py, reports_controller.py, ai_screening.py and ai_data_service.py, runs
+EXPLAIN for each against the configured database, flags full table scans,
+filesorts and temporary tables, times the SELECTs, and suggests indexes.
+
+    python -m tools.index_audit                  # audit the current database
+    python -m tools.index_audit --seed 50000     # load synthetic rows first (scratch DB only!)
+    python -m tools.index_audit --compare        # audit, apply pending migrations, audit again
+
+Run it from the ats_backend folder so DB_* settings come from .env/config.env.
+"""
+import argparse
+import ast
+import random
+import re
+import statistics
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from utils import migrations
+from utils.archive import archive_source
+from utils.db import get_db_connection
+from utils.pagination import order_by_clause, sort_key
+
+ROOT = Path(__file__).parent.parent
+SOURCES = [
+    "app.py",
+    "controllers/reports_controller.py",
+    "controllers/ai_screening.py",
+    "services/ai_data_service.py",
+]
+# Calls whose first argument is one SQL statement; Query(...) is what fan_out() runs
+QUERY_CALLS = {"execute", "prepared", "_fetch_one", "_fetch_all", "Query", "gather_count"}
+AUDITED_VERBS = ("SELECT", "UPDATE", "DELETE")
+
+Statement = namedtuple("Statement", ["location", "function", "sql"])
+Finding = namedtuple("Finding", ["statement", "plan", "flags", "millis", "error"])
+
+
+# -------------------------------------
+# Statement collection
+# -------------------------------------
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+def _sql_text(node, names):
+    """
+    The SQL text of an argument node, or None when it isn't a literal.
+    ``names`` maps local variables to the SQL text assigned to them.
+    """
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        return names.get(node.id)
+    if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "archive_source":
+        # archive_source(table, archived, alias): audit the hot table the archive mirrors
+        table = _sql_text(node.args[0], names) if node.args else None
+        alias = _sql_text(node.args[2], names) if len(node.args) > 2 else None
+        return archive_source(table, False, alias) if table else None
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            part = _sql_text(value.value if isinstance(value, ast.FormattedValue) else value, names)
+            if part is None:
+                return None
+            parts.append(part)
+        return "".join(parts)
+    return None
+
+
+def _local_sql(func):
+    """
+    Local names a function assigns literal SQL text to (e.g. ``where, params = "x=%s", (x,)``).
+    The first assignment wins: later ones are usually fallbacks (``suffix = "_archive"``).
+    """
+    names = {}
+    for node in ast.walk(func):
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            pairs = [(target, node.value)]
+            if isinstance(target, ast.Tuple) and isinstance(node.value, ast.Tuple) \
+                    and len(target.elts) == len(node.value.elts):
+                pairs = zip(target.elts, node.value.elts)
+            for name, value in pairs:
+                if isinstance(name, ast.Name):
+                    text = _sql_text(value, {})
+                    if text is not None:
+                        names.setdefault(name.id, text)
+    return names
+
+
+def _call_arg(call, index, keyword):
+    if len(call.args) > index:
+        return call.args[index]
+    return next((kw.value for kw in call.keywords if kw.arg == keyword), None)
+
+
+def _sort_keys(node):
+    """The sort_key(...) list of a paginate() call, evaluated; None when not literal."""
+    if not isinstance(node, (ast.List, ast.Tuple)):
+        return None
+    keys = []
+    for item in node.elts:
+        if not (isinstance(item, ast.Call) and getattr(item.func, "id", None) == "sort_key"):
+            return None
+        try:
+            args = [ast.literal_eval(arg) for arg in item.args]
+            kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in item.keywords}
+        except ValueError:
+            return None
+        keys.append(sort_key(*args, **kwargs))
+    return keys or None
+
+
+def _paginate_sql(call, names):
+    """
+    The first-page SELECT of ``paginate(cursor, columns, source, keys, page,
+    where, params)``; later pages only add a range condition on the same keys.
+    """
+    columns = _sql_text(_call_arg(call, 1, "columns"), names)
+    source = _sql_text(_call_arg(call, 2, "source"), names)
+    keys = _sort_keys(_call_arg(call, 3, "keys"))
+    where_node = _call_arg(call, 5, "where")
+    where = _sql_text(where_node, names) if where_node is not None else None
+    if columns is None or source is None or keys is None or (where_node is not None and where is None):
+        return None
+    where_sql = f"WHERE ({where})" if where else ""
+    return f"SELECT {columns} FROM {source} {where_sql} {order_by_clause(keys)} LIMIT %s"
+
+
+def collect_statements(sources=SOURCES):
+    """Every distinct literal SELECT/UPDATE/DELETE in the audited modules."""
+    found = OrderedDict()
+    for rel in sources:
+        tree = ast.parse((ROOT / rel).read_text(encoding="utf-8"))
+        for func in ast.walk(tree):
+            if not isinstance(func, ast.FunctionDef):
+                continue
+            names = _local_sql(func)
+            for node in ast.walk(func):
+                if not (isinstance(node, ast.Call) and node.args):
+                    continue
+                name = getattr(node.func, "attr", None) or getattr(node.func, "id", None)
+                if name == "paginate":
+                    sql = _paginate_sql(node, names)
+                elif name in QUERY_CALLS:
+                    sql = _sql_text(node.args[0], names)
+                else:
+                    continue
+                if sql is None:
+                    continue
+                sql = _normalize(sql)
+                if not sql.upper().startswith(AUDITED_VERBS):
+                    continue
+                found.setdefault(sql, Statement(f"{rel}:{node.lineno}", func.name, sql))
+    return list(found.values())
+
+
+# -------------------------------------
+# Parameter sampling
+# -------------------------------------
+_COLUMN_BEFORE = re.compile(r"([\w.]+)\s*(=|!=|<>|<=|>=|<|>|LIKE)\s*$", re.IGNORECASE)
+
+
+def load_samples(cursor):
+    """Real key values from the database so EXPLAIN plans realistic lookups."""
+    samples = {"int": 1, "requirement_id": "missing", "client_id": 1}
+    for key, sql in (
+        ("int", "SELECT id FROM candidates ORDER BY id LIMIT 1"),
+        ("requirement_id", "SELECT id FROM requirements ORDER BY created_at LIMIT 1"),
+        ("client_id", "SELECT id FROM clients ORDER BY id LIMIT 1"),
+    ):
+        cursor.execute(sql)
+        row = cursor.fetchone()
+        if row:
+            samples[key] = list(row.values())[0] if isinstance(row, dict) else row[0]
+    return samples
+
+
+def sample_params(sql, samples):
+    params = []
+    for match in re.finditer(r"%s", sql):
+        before = _COLUMN_BEFORE.search(sql[:match.start()])
+        column = before.group(1).lower() if before else ""
+        operator = before.group(2).upper() if before else ""
+        if operator == "LIKE":
+            params.append("%a%")
+        elif column.endswith("requirement_id") or column in ("r.id", "req.id") or (
+                column == "id" and re.search(r"\bFROM requirements\b", sql, re.IGNORECASE)):
+            params.append(samples["requirement_id"])
+        elif column.endswith("client_id"):
+            params.append(samples["client_id"])
+        elif column.endswith(("created_at", "updated_at", "date")):
+            params.append("2000-01-01")
+        elif column.endswith(("email", "name", "title", "status", "password_hash")):
+            params.append("a")
+        else:
+            params.append(samples["int"])
+    return tuple(params)
+
+
+# -------------------------------------
+# EXPLAIN + timing
+# -------------------------------------
+def classify(plan, min_rows):
+    flags = []
+    for row in plan:
+        table = row.get("table")
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL" and (row.get("rows") or 0) >= min_rows:
+            flags.append(f"full scan on {table} (~{row.get('rows')} rows)")
+        if "Using filesort" in extra:
+            flags.append(f"filesort on {table}")
+        if "Using temporary" in extra:
+            flags.append(f"temporary table for {table}")
+    return flags
+
+
+def audit(statements, repeat=5, min_rows=1000):
+    conn = get_db_connection()
+    if not conn:
+        raise SystemExit("❌ DB connection failed")
+    cursor = conn.cursor(dictionary=True)
+    findings = []
+    try:
+        samples = load_samples(cursor)
+        for stmt in statements:
+            params = sample_params(stmt.sql, samples)
+            try:
+                cursor.execute("EXPLAIN " + stmt.sql, params or None)
+                plan = cursor.fetchall()
+                millis = None
+                if stmt.sql.upper().startswith("SELECT"):
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        cursor.execute(stmt.sql, params or None)
+                        cursor.fetchall()
+                        timings.append((time.perf_counter() - started) * 1000)
+                    millis = statistics.median(timings)
+                findings.append(Finding(stmt, plan, classify(plan, min_rows), millis, None))
+            except Exception as e:
+                findings.append(Finding(stmt, [], [], None, str(e)))
+    finally:
+        cursor.close()
+        conn.close()
+    return findings
+
+
+# -------------------------------------
+# Index advisor
+# -------------------------------------
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|LEFT\b|JOIN\b|ORDER\b|GROUP\b|LIMIT\b)(\w+))?", re.IGNORECASE)
+_EQUALITY = re.compile(r"(?:(\w+)\.)?(\w+)\s*(?:=\s*%s|IN\s*\()", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER BY\s+(.+?)(?:\bLIMIT\b|$)", re.IGNORECASE)
+
+
+def _aliases(sql):
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table.lower()] = table
+        if alias:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def suggest_indexes(finding):
+    """Index candidates for the tables flagged in one finding: equality columns, then ORDER BY columns."""
+    sql = finding.statement.sql
+    aliases = _aliases(sql)
+    single_table = len(set(aliases.values())) == 1
+    flagged = {row.get("table") for row in finding.plan
+               if row.get("type") == "ALL" or "filesort" in (row.get("Extra") or "")}
+
+    where = re.split(r"\bWHERE\b", sql, maxsplit=1, flags=re.IGNORECASE)
+    where = where[1] if len(where) > 1 else ""
+    order = _ORDER_BY.search(sql)
+
+    suggestions = []
+    for alias in flagged:
+        table = aliases.get((alias or "").lower())
+        if not table:
+            continue
+        columns = []
+        for qualifier, column in _EQUALITY.findall(where):
+            if (qualifier.lower() == alias.lower() or (not qualifier and single_table)) and column not in columns:
+                columns.append(column)
+        if order:
+            for part in order.group(1).split(","):
+                ref = part.strip().split()[0]
+                qualifier, _, column = ref.rpartition(".")
+                if (qualifier.lower() == alias.lower() or (not qualifier and single_table)) and column not in columns:
+                    columns.append(column)
+        if columns:
+            suggestions.append((table, tuple(columns)))
+    return suggestions
+
+
+def existing_index_prefixes(cursor):
+    cursor.execute("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """)
+    indexes = OrderedDict()
+    for row in cursor.fetchall():
+        indexes.setdefault((row["TABLE_NAME"], row["INDEX_NAME"]), []).append(row["COLUMN_NAME"])
+    return indexes
+
+
+def advise(findings):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        existing = existing_index_prefixes(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+    advice = OrderedDict()
+    for finding in findings:
+        for table, columns in suggest_indexes(finding):
+            covered = any(t == table and tuple(cols[:len(columns)]) == columns
+                          for (t, _), cols in existing.items())
+            if not covered:
+                advice.setdefault((table, columns), []).append(finding.statement.location)
+    return advice
+
+
+# -------------------------------------
+# Reporting
+# -------------------------------------
+def _fmt_ms(value):
+    return f"{value:8.2f}" if value is not None else "       -"
+
+
+def print_report(findings):
+    flagged = 0
+    for f in findings:
+        status = "ERROR" if f.error else ("FLAG " if f.flags else "ok   ")
+        print(f"[{status}] {_fmt_ms(f.millis)} ms  {f.statement.location:<42} {f.statement.function}")
+        for flag in f.flags:
+            print(f"          - {flag}")
+        if f.error:
+            print(f"          - {f.error}")
+        flagged += bool(f.flags)
+    print(f"\n{len(findings)} statements audited, {flagged} flagged")
+
+
+def print_advice(advice):
+    if not advice:
+        print("\n✅ No missing indexes suggested")
+        return
+    print("\nSuggested indexes (not covered by an existing index prefix):")
+    for (table, columns), locations in advice.items():
+        name = f"idx_{table}_{'_'.join(columns)}"[:64]
+        print(f"  ALTER TABLE {table} ADD INDEX {name} ({', '.join(columns)}), ALGORITHM=INPLACE, LOCK=NONE;")
+        print(f"      used by: {', '.join(sorted(set(locations)))}")
+
+
+def print_comparison(before, after):
+    print("\nBefore / after pending migrations:")
+    after_by_sql = {f.statement.sql: f for f in after}
+    for b in before:
+        a = after_by_sql.get(b.statement.sql)
+        if not a or not (b.flags or a.flags):
+            continue
+        print(f"  {b.statement.location:<42} {_fmt_ms(b.millis)} ms -> {_fmt_ms(a.millis)} ms"
+              f"   flags {len(b.flags)} -> {len(a.flags)}")
+    total_before = sum(f.millis or 0 for f in before)
+    total_after = sum(f.millis or 0 for f in after)
+    print(f"  {'all SELECTs (sum of medians)':<42} {_fmt_ms(total_before)} ms -> {_fmt_ms(total_after)} ms")
+
+
+# -------------------------------------
+# Synthetic data
+# -------------------------------------
+def _insert_many(cursor, sql, rows, batch=1000):
+    for i in range(0, len(rows), batch):
+        cursor.executemany(sql, rows[i:i + batch])
+
+
+def seed(candidates):
+    """Load a synthetic dataset scaled to ``candidates`` rows. Never point this at production."""
+    rng = random.Random(42)
+    now = datetime.now()
+
+    def when():
+        return now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        n_users = max(10, candidates // 50)
+        n_clients = max(5, candidates // 1000)
+        n_reqs = max(10, candidates // 100)
+        tag = uuid.uuid4().hex[:8]
+
+        _insert_many(cursor, "INSERT INTO users (name, email, password_hash, role, status, created_at) VALUES (%s,%s,%s,%s,'ACTIVE',%s)",
+                     [(f"user {i}", f"seed-{tag}-{i}@example.com", "x",
+                       rng.choice(["RECRUITER", "RECRUITER", "TEAM_LEAD", "ADMIN"]), when()) for i in range(n_users)])
+        cursor.execute("SELECT id FROM users WHERE email LIKE %s", (f"seed-{tag}-%",))
+        user_ids = [r[0] for r in cursor.fetchall()]
+
+        _insert_many(cursor, "INSERT INTO clients (name, status, created_at) VALUES (%s, %s, %s)",
+                     [(f"client {tag} {i}", rng.choice(["ACTIVE", "INACTIVE"]), when()) for i in range(n_clients)])
+        cursor.execute("SELECT id FROM clients WHERE name LIKE %s", (f"client {tag} %",))
+        client_ids = [r[0] for r in cursor.fetchall()]
+
+        req_ids = [str(uuid.uuid4()) for _ in range(n_reqs)]
+        _insert_many(cursor, "INSERT INTO requirements (id, client_id, title, location, skills_required, no_of_rounds, status, created_at) "
+                             "VALUES (%s,%s,%s,'Remote','python, sql',3,%s,%s)",
+                     [(rid, rng.choice(client_ids), f"role {i}", rng.choice(["OPEN", "OPEN", "CLOSED"]), when())
+                      for i, rid in enumerate(req_ids)])
+        _insert_many(cursor, "INSERT INTO requirement_stages (requirement_id, stage_order, stage_name) VALUES (%s,%s,%s)",
+                     [(rid, order, f"Round {order}") for rid in req_ids for order in (1, 2, 3)])
+        cursor.execute("SELECT id, requirement_id FROM requirement_stages WHERE requirement_id IN (%s)"
+                       % ",".join(["%s"] * len(req_ids)), tuple(req_ids))
+        stages = cursor.fetchall()
+
+        _insert_many(cursor, "INSERT INTO requirement_allocations (id, requirement_id, recruiter_id, assigned_by, created_at) VALUES (%s,%s,%s,%s,%s)",
+                     [(str(uuid.uuid4()), rid, rng.choice(user_ids), rng.choice(user_ids), when())
+                      for rid in req_ids for _ in range(2)])
+
+        _insert_many(cursor, "INSERT INTO candidates (name, email, skills, experience, created_by, created_at) VALUES (%s,%s,%s,%s,%s,%s)",
+                     [(f"candidate {i}", f"cand-{tag}-{i}@example.com", "python, sql", str(rng.randint(0, 12)),
+                       rng.choice(user_ids), when()) for i in range(candidates)])
+        cursor.execute("SELECT id FROM candidates WHERE email LIKE %s", (f"cand-{tag}-%",))
+        cand_ids = [r[0] for r in cursor.fetchall()]
+
+        progress = {}
+        for cid in cand_ids:
+            stage_id, rid = rng.choice(stages)
+            progress[(cid, rid, stage_id)] = (cid, rid, stage_id, "Round",
+                                              rng.choice(["PENDING", "IN_PROGRESS", "COMPLETED", "REJECTED"]))
+        _insert_many(cursor, "INSERT INTO candidate_progress (candidate_id, requirement_id, stage_id, stage_name, status) VALUES (%s,%s,%s,%s,%s)",
+                     list(progress.values()))
+        _insert_many(cursor, "INSERT INTO candidate_screening (candidate_id, requirement_id, ai_score, recommend, status, created_at) "
+                             "VALUES (%s,%s,%s,'NEEDS_INTERVIEW','DONE',%s)",
+                     [(cid, rid, rng.uniform(20, 95), when()) for (cid, rid, _) in progress])
+        _insert_many(cursor, "INSERT INTO interviews (candidate_id, requirement_id, stage, date, time, status) VALUES (%s,%s,'Round 1',%s,%s,%s)",
+                     [(cid, rid, when().date(), f"{rng.randint(9, 18)}:00:00", rng.choice(["Scheduled", "Done", "Cancelled"]))
+                      for (cid, rid, _) in list(progress)[::2]])
+        conn.commit()
+
+        for table in ("users", "clients", "requirements", "requirement_stages", "requirement_allocations",
+                      "candidates", "candidate_progress", "candidate_screening", "interviews"):
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+        print(f"✅ Seeded {len(cand_ids)} candidates, {n_reqs} requirements, {n_users} users, {n_clients} clients")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN audit and index advisor")
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic candidates first")
+    parser.add_argument("--compare", action="store_true", help="apply pending migrations and re-audit")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per SELECT (median reported)")
+    parser.add_argument("--min-rows", type=int, default=1000, help="ignore full scans estimated below this")
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        seed(args.seed)
+
+    statements = collect_statements()
+    findings = audit(statements, args.repeat, args.min_rows)
+    print_report(findings)
+    print_advice(advise(findings))
+
+    if args.compare:
+        applied = migrations.migrate()
+        print(f"\n⏳ Applied {len(applied)} pending migration(s)")
+        after = audit(statements, args.repeat, args.min_rows)
+        print_report(after)
+        print_comparison(findings, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark the prepared-statement cache on the hot parameterized queries.
+
+Finds every statement routed through ``conn.prepared(...)`` in the backend,
+runs each one ``--runs`` times as a plain text query and ``--runs`` times
+through the connection's statement cache, and reports the mean latency plus
+the session's Com_stmt_prepare counter: the text protocol parses the SQL on
+every call, the cached statement is parsed once per connection.
+
+    python -m tools.stmt_benchmark              # 500 runs per statement
+    python -m tools.stmt_benchmark --runs 2000
+
+Writes (the progress upserts) run inside a transaction that is rolled back,
+but still point this at a scratch database.
+"""
+import argparse
+import ast
+import re
+import time
+from collections import OrderedDict
+
+from tools.index_audit import ROOT, SOURCES, Statement, _normalize, load_samples, sample_params
+from utils.db import get_db_connection
+
+_INSERT_COLUMNS = re.compile(r"INSERT INTO \w+\s*\(([^)]*)\)", re.IGNORECASE)
+_UPDATE_PARAM = re.compile(r"(\w+)\s*=\s*%s", re.IGNORECASE)
+
+
+def collect_prepared(sources=SOURCES):
+    """Literal SQL passed to conn.prepared() in the audited modules."""
+    found = OrderedDict()
+    for rel in sources:
+        tree = ast.parse((ROOT / rel).read_text(encoding="utf-8"))
+        for func in ast.walk(tree):
+            if not isinstance(func, ast.FunctionDef):
+                continue
+            for node in ast.walk(func):
+                if not (isinstance(node, ast.Call) and node.args):
+                    continue
+                if getattr(node.func, "attr", None) != "prepared":
+                    continue
+                first = node.args[0]
+                if isinstance(first, ast.Constant) and isinstance(first.value, str):
+                    # Keep the original text: the cache is keyed on it
+                    found.setdefault(_normalize(first.value), Statement(f"{rel}:{node.lineno}", func.name, first.value))
+    return list(found.values())
+
+
+def load_write_samples(cursor, samples):
+    samples = dict(samples)
+    cursor.execute("SELECT id, requirement_id FROM requirement_stages ORDER BY id LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        samples["stage_id"] = row["id"]
+        samples["requirement_id"] = row["requirement_id"]
+    return samples
+
+
+def statement_params(sql, samples):
+    """Parameters for one statement; INSERTs are filled column by column."""
+    match = _INSERT_COLUMNS.search(sql)
+    if not match:
+        return sample_params(sql, samples)
+
+    values = {
+        "candidate_id": samples["int"],
+        "requirement_id": samples["requirement_id"],
+        "stage_id": samples.get("stage_id"),
+        "category": "IT",
+        "stage_name": "Benchmark",
+        "status": "PENDING",
+        "decision": "NONE",
+        "manual_decision": "NONE",
+    }
+    columns = [c.strip() for c in match.group(1).split(",")]
+    params = [values.get(c) for c in columns]
+    tail = sql[match.end():].split(")", 1)[-1]  # the ON DUPLICATE KEY UPDATE part
+    params += [values.get(c.lower()) for c in _UPDATE_PARAM.findall(tail)]
+    return tuple(params)
+
+
+def _stmt_prepares(cursor):
+    cursor.execute("SHOW SESSION STATUS LIKE 'Com_stmt_prepare'")
+    return int(cursor.fetchone()["Value"])
+
+
+def benchmark(statements, runs):
+    conn = get_db_connection()
+    if not conn:
+        raise SystemExit("❌ DB connection failed")
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    results = []
+    try:
+        samples = load_write_samples(cursor, load_samples(cursor))
+        for stmt in statements:
+            params = statement_params(stmt.sql, samples)
+            try:
+                started = time.perf_counter()
+                for _ in range(runs):
+                    cursor.execute(stmt.sql, params)
+                    if cursor.with_rows:
+                        cursor.fetchall()
+                text_ms = (time.perf_counter() - started) * 1000 / runs
+
+                prepares_before = _stmt_prepares(cursor)
+                started = time.perf_counter()
+                for _ in range(runs):
+                    conn.prepared(stmt.sql).execute(params).fetchall()
+                prepared_ms = (time.perf_counter() - started) * 1000 / runs
+                prepares = _stmt_prepares(cursor) - prepares_before
+
+                results.append((stmt, text_ms, prepared_ms, prepares, None))
+            except Exception as e:
+                results.append((stmt, None, None, None, str(e)))
+            finally:
+                conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+    return results
+
+
+def print_results(results, runs):
+    print(f"\n📊 Prepared statement cache, {runs} runs per statement")
+    print(f"{'statement':<44} {'text ms':>9} {'cached ms':>10} {'saved':>7} {'parses':>12}")
+    for stmt, text_ms, prepared_ms, prepares, error in results:
+        label = f"{stmt.function} ({stmt.location})"[:44]
+        if error:
+            print(f"{label:<44} ❌ {error}")
+            continue
+        saved = (1 - prepared_ms / text_ms) * 100 if text_ms else 0.0
+        print(f"{label:<44} {text_ms:>9.3f} {prepared_ms:>10.3f} {saved:>6.1f}% {runs:>5} -> {prepares:<4}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prepared statement cache benchmark")
+    parser.add_argument("--runs", type=int, default=500, help="executions per statement and mode")
+    args = parser.parse_args(argv)
+
+    statements = collect_prepared()
+    if not statements:
+        raise SystemExit("No conn.prepared() statements found")
+    print_results(benchmark(statements, args.runs), args.runs)
+
+
+if __name__ == "__main__":
+    main()
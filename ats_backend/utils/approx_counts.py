@@ -0,0 +1,64 @@
+"""
+Approximate mode for headline counts.
+
+COUNT(*) / COUNT(DISTINCT candidate_id) over candidates and the pipeline
+tables walks a whole index on every dashboard load. Headline numbers are
+instead served from a per-process snapshot that is recomputed at most every
+APPROX_COUNT_TTL seconds, and responses say so with ``approximate: true``.
+``?exact=1`` (or ``X-Exact-Counts: 1``) skips the snapshot, runs the real
+query and refreshes the snapshot with its result; so does a request that
+reads its own writes (utils/db.py read_your_writes()).
+"""
+import os
+
+from flask import has_request_context, request
+
+from utils.db import reads_own_writes
+from utils.ttl_cache import TTLCache
+
+APPROX_COUNT_TTL = float(os.getenv("APPROX_COUNT_TTL", "60"))
+APPROX_COUNT_SIZE = 4096
+
+_snapshots = TTLCache(APPROX_COUNT_TTL, APPROX_COUNT_SIZE)
+
+
+def exact_requested():
+    """True when the current request asked for exact counts, or must see its own writes."""
+    if not has_request_context():
+        return False
+    flag = request.args.get("exact") or request.headers.get("X-Exact-Counts", "")
+    return flag.lower() in ("1", "true", "yes") or reads_own_writes()
+
+
+def cached_count(key, compute, exact=None):
+    """
+    Return ``(value, approximate)`` for the count(s) ``compute()`` produces.
+    ``approximate`` is True when the value came from a snapshot rather than
+    a query run for this call. ``compute()`` returning None (e.g. no
+    connection) is passed through and not cached. APPROX_COUNT_TTL=0 always
+    computes.
+    """
+    if exact is None:
+        exact = exact_requested()
+    if not exact and APPROX_COUNT_TTL > 0:
+        value = _snapshots.get(key)
+        if value is not None:
+            return value, True
+    value = compute()
+    if value is not None:
+        _snapshots.set(key, value)
+    return value, False
+
+
+async def cached_count_async(key, compute, exact=None):
+    """cached_count() for an async ``compute()``; shares the same snapshots."""
+    if exact is None:
+        exact = exact_requested()
+    if not exact and APPROX_COUNT_TTL > 0:
+        value = _snapshots.get(key)
+        if value is not None:
+            return value, True
+    value = await compute()
+    if value is not None:
+        _snapshots.set(key, value)
+    return value, False
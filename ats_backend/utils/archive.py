@@ -0,0 +1,135 @@
+"""
+Archive tier for closed requirements.
+
+``python manage.py archive`` moves CLOSED requirements older than
+ARCHIVE_AFTER_DAYS, with their stages, allocations, assessment queue and
+pipeline rows, into ``<table>_archive`` tables (same columns, no foreign
+keys; see migration 0006). Each batch of requirements is moved in one
+transaction, so a requirement is either fully hot or fully archived.
+
+Readers opt into history with ``?include_archived=1``; ``archive_source``
+then swaps a table name for a UNION ALL of the hot and archive tables.
+"""
+import os
+
+from flask import has_request_context, request
+
+from utils.db import get_db_connection, get_shard_pool
+from utils.sharding import PIPELINE_TABLES, PRIMARY, shard_for_requirement
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "50"))
+
+# Children before parents: deletes must not trip the hot tables' foreign keys
+PRIMARY_TABLES = ("assesment_queue", "requirement_allocations", "requirement_stages")
+ARCHIVED_TABLES = PIPELINE_TABLES + PRIMARY_TABLES + ("requirements",)
+
+
+def include_archived():
+    """True when the current request asked for archived history."""
+    return has_request_context() and request.args.get("include_archived", "").lower() in ("1", "true", "yes")
+
+
+def archive_source(table, archived, alias=None):
+    """FROM-clause text for ``table``, including its archive when ``archived``."""
+    alias = alias or table
+    if not archived:
+        return table if alias == table else f"{table} {alias}"
+    return f"(SELECT * FROM {table} UNION ALL SELECT * FROM {table}_archive) {alias}"
+
+
+def find_archivable(cursor, older_than_days, limit):
+    cursor.execute("""
+        SELECT id FROM requirements
+        WHERE status = 'CLOSED' AND created_at < NOW() - INTERVAL %s DAY
+        ORDER BY created_at
+        LIMIT %s
+    """, (older_than_days, limit))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _move(cursor, table, column, ids):
+    placeholders = ",".join(["%s"] * len(ids))
+    # A plain INSERT: an id already in the archive must abort the batch, not be skipped and then deleted
+    cursor.execute(f"INSERT INTO {table}_archive SELECT * FROM {table} WHERE {column} IN ({placeholders})", tuple(ids))
+    copied = cursor.rowcount
+    cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", tuple(ids))
+    if cursor.rowcount != copied:
+        raise RuntimeError(f"{table}: archived {copied} row(s) but deleted {cursor.rowcount}; batch rolled back")
+    return copied
+
+
+def archive_batch(conn, requirement_ids):
+    """
+    Archive one batch in a single primary transaction. Pipeline rows of
+    sharded clients are archived on their shard first (committed there), so
+    a crash in between leaves them archived and the batch safe to re-run.
+    A row whose id is already in an archive table aborts its transaction.
+    """
+    moved = dict.fromkeys(ARCHIVED_TABLES, 0)
+    by_shard = {}
+    for requirement_id in requirement_ids:
+        by_shard.setdefault(shard_for_requirement(requirement_id), []).append(requirement_id)
+
+    for shard, ids in by_shard.items():
+        if shard == PRIMARY:
+            continue
+        shard_conn = get_shard_pool(shard).acquire()
+        shard_cursor = shard_conn.cursor()
+        try:
+            for table in PIPELINE_TABLES:
+                moved[table] += _move(shard_cursor, table, "requirement_id", ids)
+            shard_conn.commit()
+        except Exception:
+            shard_conn.rollback()
+            raise
+        finally:
+            shard_cursor.close()
+            shard_conn.close()
+
+    cursor = conn.cursor()
+    try:
+        primary_ids = by_shard.get(PRIMARY, [])
+        if primary_ids:
+            for table in PIPELINE_TABLES:
+                moved[table] += _move(cursor, table, "requirement_id", primary_ids)
+        for table in PRIMARY_TABLES:
+            moved[table] += _move(cursor, table, "requirement_id", requirement_ids)
+        moved["requirements"] += _move(cursor, "requirements", "id", requirement_ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return moved
+
+
+def archive_closed_requirements(older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, dry_run=False):
+    """Archive every eligible requirement, batch by batch. Returns rows moved per table."""
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    cursor = conn.cursor()
+    totals = dict.fromkeys(ARCHIVED_TABLES, 0)
+    try:
+        if dry_run:
+            cursor.execute("""
+                SELECT COUNT(*) FROM requirements
+                WHERE status = 'CLOSED' AND created_at < NOW() - INTERVAL %s DAY
+            """, (older_than_days,))
+            totals["requirements"] = cursor.fetchone()[0]
+            return totals
+
+        while True:
+            ids = find_archivable(cursor, older_than_days, batch_size)
+            if not ids:
+                break
+            moved = archive_batch(conn, ids)
+            for table, count in moved.items():
+                totals[table] += count
+            print(f"   -> archived {len(ids)} requirement(s)")
+    finally:
+        cursor.close()
+        conn.close()
+    return totals
@@ -0,0 +1,181 @@
+"""
+asyncio access to the database.
+
+    rows = await fetch_all("SELECT id, name FROM clients WHERE status = %s", ("ACTIVE",))
+    client, reqs = await asyncio.gather(
+        fetch_one("SELECT * FROM clients WHERE id = %s", (client_id,)),
+        fetch_all("SELECT id, title FROM requirements WHERE client_id = %s", (client_id,)),
+    )
+
+With aiomysql installed and the MySQL backend, every query borrows its own
+connection from an aiomysql pool, so gathered queries overlap on one event
+loop instead of queueing on a thread. Pools are per event loop (aiomysql
+connections can't cross loops); read-only queries use a read replica when
+DB_REPLICAS is set, like get_db_connection(readonly=True). Without aiomysql,
+or with DB_BACKEND=sqlite, each query runs on a worker thread with a
+connection from the regular pool.
+
+Queries get the same deadline handling as the sync cursors, and aiomysql
+(pymysql) errors are re-raised as the mysql.connector errors callers
+already handle, with the same errno. Sync code that
+wants to gather (e.g. a Flask view) can hand a coroutine to ``run()``, which
+executes it on a long-lived background loop so its pools survive between
+requests.
+"""
+import asyncio
+import itertools
+import os
+import threading
+import weakref
+
+from mysql.connector import Error, errors
+
+from utils import db
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None  # async access falls back to worker threads
+
+# Connections per event loop pool (per replica for read-only queries)
+ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", str(db.pool_config['size'])))
+
+# loop -> {config index: pool}; index -1 is the primary
+_pools = weakref.WeakKeyDictionary()
+_replica_turn = itertools.count()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def native():
+    """True when queries run on aiomysql rather than on worker threads."""
+    return aiomysql is not None and db.DB_BACKEND == 'mysql'
+
+
+def _pool_index(readonly):
+    if readonly and not db._reads_on_primary():
+        return next(_replica_turn) % len(db.replica_configs)
+    return -1
+
+
+async def _get_pool(index):
+    # Stored as a task so concurrent first queries share one pool
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    if index not in pools:
+        config = db.db_config if index < 0 else db.replica_configs[index]
+        pools[index] = asyncio.ensure_future(aiomysql.create_pool(
+            minsize=0,
+            maxsize=ASYNC_POOL_SIZE,
+            host=config['host'],
+            port=config.get('port', 3306),
+            user=config['user'],
+            password=config['password'],
+            db=config['database'],
+            autocommit=True,
+            pool_recycle=3600,
+        ))
+    return await pools[index]
+
+
+async def _execute(query, params, fetch, readonly):
+    query = db.with_deadline_hint(query)
+    index = _pool_index(readonly)
+    pool = await _get_pool(index)
+    try:
+        conn = await pool.acquire()
+    except (OSError, aiomysql.OperationalError) as e:
+        if index < 0:
+            raise
+        print(f"⚠️ Replica {db.replica_configs[index]['host']} unavailable, using primary:", e)
+        pool = await _get_pool(-1)
+        conn = await pool.acquire()
+    try:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            return await (cursor.fetchone() if fetch == "one" else cursor.fetchall())
+    finally:
+        pool.release(conn)
+
+
+def _mysql_error(e):
+    """Re-raise an aiomysql error (or a socket error while connecting) as the mysql.connector error callers handle."""
+    if isinstance(e, aiomysql.Error) and len(e.args) >= 2 and isinstance(e.args[0], int):
+        cls = getattr(errors, type(e).__name__, None)
+        if not (isinstance(cls, type) and issubclass(cls, Error)):
+            cls = errors.DatabaseError
+        return cls(msg=str(e.args[1]), errno=e.args[0])
+    return errors.InterfaceError(msg=f"Database connection failed: {e}")
+
+
+def _execute_blocking(query, params, fetch, readonly):
+    conn = db.get_db_connection(readonly=readonly)
+    if not conn:
+        raise Error("Database connection failed")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchone() if fetch == "one" else cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+async def execute(query, params=(), fetch="all", readonly=True):
+    """Run one statement on its own connection; returns a row dict (``fetch="one"``) or a list of them."""
+    params = tuple(params)
+    if native():
+        try:
+            return await _execute(query, params, fetch, readonly)
+        except (aiomysql.Error, OSError) as e:
+            raise _mysql_error(e) from e
+    return await asyncio.to_thread(_execute_blocking, query, params, fetch, readonly)
+
+
+async def fetch_one(query, params=(), readonly=True):
+    row = await execute(query, params, "one", readonly)
+    return dict(row) if row else None
+
+
+async def fetch_all(query, params=(), readonly=True):
+    rows = await execute(query, params, "all", readonly)
+    return [dict(r) for r in rows] if rows else []
+
+
+async def close_pools():
+    """Close this event loop's pools (call before the loop shuts down)."""
+    for task in _pools.pop(asyncio.get_running_loop(), {}).values():
+        pool = await task
+        pool.close()
+        await pool.wait_closed()
+
+
+def _get_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-db", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _reset_loop():
+    # The loop's thread doesn't survive fork: the child starts its own
+    global _loop, _loop_lock
+    _loop = None
+    _loop_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_loop)
+
+
+def run(coro):
+    """
+    Run ``coro`` to completion on the shared background loop and return its
+    result. The caller's context (request deadline, Flask app/request
+    context) is visible to it.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
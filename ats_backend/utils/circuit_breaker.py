@@ -0,0 +1,157 @@
+"""
+Circuit breaker for calls to a flaky upstream.
+
+CLOSED: calls go through; outcomes of the last ``window`` seconds are kept.
+Once at least ``min_calls`` were seen and the failure rate or the slow-call
+rate reaches its threshold, the breaker trips to OPEN.
+
+OPEN: ``allow()`` says no, so callers use their fallback right away instead
+of waiting out a timeout. After ``open_seconds`` it goes HALF_OPEN.
+
+HALF_OPEN: up to ``probes`` calls are let through. A good probe closes the
+breaker; a failed (or slow) one opens it again for another ``open_seconds``.
+
+State is per process: each worker learns about an outage from its own calls.
+"""
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=60, min_calls=5, failure_rate=0.5,
+                 slow_seconds=10, slow_rate=0.5, open_seconds=30, probes=1):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._calls = deque()  # (finished_at, failed, slow)
+        self._opened_at = None
+        self._probes_out = 0
+        self._last_trip_reason = None
+        self._counts = {"trips": 0, "rejected": 0, "successes": 0, "failures": 0, "slow": 0}
+
+    def _prune(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _trip(self, now, reason):
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_out = 0
+        self._calls.clear()
+        self._last_trip_reason = reason
+        self._counts["trips"] += 1
+        print(f"⚠️ Circuit '{self.name}' opened: {reason}; failing fast for {self.open_seconds:g}s")
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_out = 0
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def is_open(self):
+        """True while calls are being refused outright (doesn't take a probe slot)."""
+        return self.state == OPEN
+
+    def refuses(self):
+        """Like is_open(), but a True answer counts as a rejected call."""
+        with self._lock:
+            if self._current_state(time.monotonic()) != OPEN:
+                return False
+            self._counts["rejected"] += 1
+            return True
+
+    def allow(self):
+        """
+        May a call go out now? In HALF_OPEN this takes one of the probe slots,
+        so every allowed call must be followed by record().
+        """
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_out < self.probes:
+                self._probes_out += 1
+                return True
+            self._counts["rejected"] += 1
+            return False
+
+    def record(self, success, elapsed=0.0):
+        """Report the outcome of an allowed call and how long it took (seconds)."""
+        now = time.monotonic()
+        slow = elapsed >= self.slow_seconds
+        with self._lock:
+            self._counts["successes" if success else "failures"] += 1
+            if slow:
+                self._counts["slow"] += 1
+
+            if self._current_state(now) == HALF_OPEN:
+                self._probes_out = max(0, self._probes_out - 1)
+                if success and not slow:
+                    self._state = CLOSED
+                    self._calls.clear()
+                    print(f"✅ Circuit '{self.name}' closed: probe call succeeded")
+                else:
+                    self._trip(now, "probe call failed" if not success else "probe call was slow")
+                return
+            if self._state == OPEN:
+                return  # a call that started before the trip
+
+            self._calls.append((now, not success, slow))
+            self._prune(now)
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failed = sum(1 for _, f, _ in self._calls if f)
+            slow_calls = sum(1 for _, _, s in self._calls if s)
+            if failed / total >= self.failure_rate:
+                self._trip(now, f"{failed}/{total} calls failed in {self.window:g}s")
+            elif slow_calls / total >= self.slow_rate:
+                self._trip(now, f"{slow_calls}/{total} calls took over {self.slow_seconds:g}s")
+
+    def cancel(self):
+        """Hand back an allowed call without an outcome (it says nothing about the upstream's health)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_out = max(0, self._probes_out - 1)
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._calls.clear()
+            self._probes_out = 0
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            self._prune(now)
+            stats = dict(self._counts)
+            stats.update({
+                "name": self.name,
+                "state": state,
+                "window_calls": len(self._calls),
+                "window_failures": sum(1 for _, f, _ in self._calls if f),
+                "window_slow": sum(1 for _, _, s in self._calls if s),
+                "last_trip_reason": self._last_trip_reason,
+            })
+            if state == OPEN:
+                stats["retry_in_seconds"] = round(self.open_seconds - (now - self._opened_at), 1)
+            return stats
@@ -0,0 +1,122 @@
+"""
+Per-request deadline budget.
+
+A deadline is set when a request arrives (REQUEST_DEADLINE seconds, or the
+view's ``@request_deadline(...)`` budget, shortened further by an
+``X-Request-Timeout`` header) and is read by everything downstream:
+
+- SELECTs get a ``MAX_EXECUTION_TIME`` hint for the time left (utils/db.py)
+- HTTP calls use ``timeout(cap)`` instead of a fixed timeout
+- LLM callers skip the call and use their fallback when ``remaining()`` is
+  too small for a useful answer
+
+The deadline lives in a ContextVar, so it is per request thread and is
+inherited by work started with ``contextvars.copy_context()``.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, jsonify, request
+
+DEFAULT_BUDGET = float(os.getenv("REQUEST_DEADLINE", "20"))
+
+# Never hand a client a timeout so small it fails before connecting
+MIN_TIMEOUT = 0.05
+
+_deadline = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of its time budget before finishing."""
+
+
+def request_deadline(seconds):
+    """View decorator: give this endpoint its own budget instead of REQUEST_DEADLINE."""
+    def decorator(view):
+        view.deadline_budget = seconds
+        return view
+    return decorator
+
+
+def set_deadline(seconds):
+    """Start a budget of ``seconds`` from now; returns a token for reset_deadline()."""
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining():
+    """Seconds left in the current budget, or None when no deadline is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check(what="request"):
+    if expired():
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def timeout(cap):
+    """``cap`` shrunk to the time left; raises DeadlineExceeded once nothing is left."""
+    left = remaining()
+    if left is None:
+        return cap
+    if left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+    return max(MIN_TIMEOUT, min(cap, left))
+
+
+def has_budget(seconds):
+    """True when there is no deadline or at least ``seconds`` are left."""
+    left = remaining()
+    return left is None or left >= seconds
+
+
+@contextmanager
+def suspended():
+    """Run a block without a deadline (e.g. a streamed export that outlives the request budget)."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _start_request():
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, "deadline_budget", DEFAULT_BUDGET)
+    try:
+        asked = float(request.headers.get("X-Request-Timeout", ""))
+        budget = min(budget, asked)
+    except ValueError:
+        pass
+    request.environ["ats.deadline_token"] = set_deadline(budget)
+
+
+def _end_request(exc=None):
+    token = request.environ.pop("ats.deadline_token", None)
+    if token is not None:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            _deadline.set(None)  # torn down from a different context
+
+
+def init_app(app):
+    app.before_request(_start_request)
+    app.teardown_request(_end_request)
+
+    @app.errorhandler(DeadlineExceeded)
+    def handle_deadline_exceeded(e):
+        return jsonify({"error": str(e)}), 504
@@ -2,6 +2,8 @@ import os
 import json
 import requests
 
+from utils import deadline
+
 N8N_WEBHOOK_URL = os.getenv(
     "N8N_WEBHOOK_URL",
     "http://localhost:5678/webhook/ba1721b9-f7f4-4e7e-9bc3-93b4067c6fc1",  # your current webhook
@@ -16,6 +18,11 @@ def notify_event(event_name: str, payload: dict) -> None:
         print(f"❌ N8N_WEBHOOK_URL not set, skipping event {event_name}")
         return
 
+    # Best-effort: never spend the last of the request budget on a notification
+    if not deadline.has_budget(0.5):
+        print(f"⚠️ Request deadline nearly spent, skipping event {event_name}")
+        return
+
     body = {
         "event": event_name,
         "payload": payload,
@@ -26,7 +33,7 @@ def notify_event(event_name: str, payload: dict) -> None:
             N8N_WEBHOOK_URL,
             headers={"Content-Type": "application/json"},
             data=json.dumps(body),
-            timeout=5,
+            timeout=deadline.timeout(5),
         )
         print(f"📡 Notified n8n: {event_name} (status={resp.status_code})")
     except Exception as e:
@@ -0,0 +1,116 @@
+"""
+Run independent read queries concurrently.
+
+Report endpoints fire several unrelated COUNT/GROUP BY queries; run one after
+another on a single cursor their latencies add up. ``fan_out`` gives each
+query its own pooled connection on a small shared thread pool and returns
+when the slowest one is done:
+
+    results = fan_out({
+        "total": Query("SELECT COUNT(*) AS total FROM requirements", fetch="one"),
+        "by_client": Query("SELECT client_id, COUNT(*) AS n FROM requirements GROUP BY client_id"),
+    })
+
+Workers run in a copy of the caller's context, so the request deadline (and
+its MAX_EXECUTION_TIME hint) and replica routing carry over. A fan-out started
+from inside a worker runs inline, so nesting can't starve the pool.
+DB_FANOUT_WORKERS=0 turns the whole thing back into sequential execution.
+"""
+import contextvars
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error
+
+from utils.db import get_db_connection
+
+# Keep this well below DB_POOL_SIZE: every running query holds a connection
+FANOUT_WORKERS = int(os.getenv("DB_FANOUT_WORKERS", "4"))
+
+Query = namedtuple("Query", ["sql", "params", "fetch"], defaults=((), "all"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="db-fanout")
+    return _executor
+
+
+def _reset_executor():
+    # Threads don't survive fork: let the child build its own executor
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executor)
+
+
+def _in_worker(fn):
+    def run():
+        _worker.active = True
+        try:
+            return fn()
+        finally:
+            _worker.active = False
+    return run
+
+
+def run_parallel(tasks):
+    """
+    Run ``{name: zero-arg callable}`` concurrently; returns ``{name: result}``.
+    Every task is waited for; the first error (in ``tasks`` order) is re-raised.
+    """
+    if FANOUT_WORKERS <= 0 or len(tasks) < 2 or getattr(_worker, "active", False):
+        return {name: fn() for name, fn in tasks.items()}
+
+    executor = _get_executor()
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, _in_worker(fn))
+        for name, fn in tasks.items()
+    }
+    results, error = {}, None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return results
+
+
+def run_query(query, readonly=True, connect=None):
+    """Execute one Query on its own connection and return its rows (or row)."""
+    conn = connect() if connect else get_db_connection(readonly=readonly)
+    if not conn:
+        raise Error("Database connection failed")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query.sql, tuple(query.params))
+        return cursor.fetchone() if query.fetch == "one" else cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def fan_out(queries, readonly=True):
+    """
+    Run ``{name: Query | zero-arg callable}`` concurrently, each Query on its
+    own pooled connection; returns ``{name: rows}`` (a single row for
+    ``fetch="one"``). Callables (e.g. a sharded gather_count) run as-is.
+    """
+    return run_parallel({
+        name: query if callable(query) else (lambda q=query: run_query(q, readonly))
+        for name, query in queries.items()
+    })
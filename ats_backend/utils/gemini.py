@@ -1,16 +1,8 @@
-import requests
 import json
-import os
 import re
+from utils import llm_gateway, screening_cache
 from utils.prompt_builder import build_prompt
 
-# Load API key & model
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
-
-# Correct Gemini 2.5 endpoint
-GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL}:generateContent"
-
 
 def extract_json(text: str):
     """Extract pure JSON from Gemini output (removes extra text)."""
@@ -73,52 +65,63 @@ def _fallback_screening(candidate, req, cause="Missing Gemini API"):
     }
 
 
-def run_gemini_screening(candidate, req):
-    """Call Gemini for candidate screening and return parsed JSON. Falls back to heuristic scoring if Gemini is unavailable."""
-
-    # If API key is missing we fall back immediately
-    if not GEMINI_API_KEY:
+def _cache_key(candidate, req):
+    # None when the rows can't make a prompt (the Gemini path below reports that)
+    if not screening_cache.enabled():
+        return None
+    try:
+        return screening_cache.fingerprint(build_prompt(candidate, req), llm_gateway.model_name())
+    except (KeyError, TypeError):
+        return None
+
+
+def run_gemini_screening(candidate, req, force=False):
+    """
+    Call Gemini for candidate screening and return parsed JSON. Falls back to heuristic scoring if Gemini is unavailable.
+    A result cached for the same prompt and model is returned (with ``"cached": True``) unless ``force`` is set.
+    """
+    cache_key = _cache_key(candidate, req)
+    if cache_key:
+        cached = screening_cache.lookup(cache_key, force)
+        if cached is not None:
+            return dict(cached, cached=True)
+
+    # Without a key or enough request budget we fall back immediately
+    reason = llm_gateway.unavailable()
+    if reason == "no_api_key":
         print("⚠️ GEMINI_API_KEY not set. Using fallback screening logic.")
         return _fallback_screening(candidate, req, cause="No API key")
+    if reason == "deadline":
+        print("⚠️ Request deadline nearly spent. Using fallback screening logic.")
+        return _fallback_screening(candidate, req, cause="Deadline budget exhausted")
+    if reason == "circuit_open":
+        return _fallback_screening(candidate, req, cause="Gemini temporarily unavailable")
 
     # Build prompt safely
     prompt = build_prompt(candidate, req)
 
-    payload = {
-        "contents": [
-            {"parts": [{"text": prompt}]}
-        ]
-    }
-
-    try:
-        response = requests.post(
-            f"{GEMINI_URL}?key={GEMINI_API_KEY}",
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=20,
-        )
-    except requests.RequestException as exc:
-        print("⚠️ Gemini request failed:", exc)
-        return _fallback_screening(candidate, req, cause=str(exc))
-
-    # If Gemini fails
-    if response.status_code != 200:
-        print("⚠️ Gemini API error:", response.status_code, response.text[:250])
-        return _fallback_screening(candidate, req, cause=f"HTTP {response.status_code}")
-
-    # Parse Gemini output
-    data = response.json()
-
-    try:
-        text_output = data["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception as e:
-        print("⚠️ Gemini output parsing failed:", e)
+    result = llm_gateway.generate(prompt, timeout=20)
+    if not result.ok:
+        if result.reason == "circuit_open":
+            return _fallback_screening(candidate, req, cause="Gemini temporarily unavailable")
+        if result.reason == "throttled":
+            return _fallback_screening(candidate, req, cause="Gemini rate limit")
+        if result.reason == "network":
+            print("⚠️ Gemini request failed:", result.error)
+            return _fallback_screening(candidate, req, cause=result.error)
+        if result.reason == "http":
+            print("⚠️ Gemini API error:", result.status, (result.error or "")[:250])
+            return _fallback_screening(candidate, req, cause=f"HTTP {result.status}")
+        print("⚠️ Gemini output parsing failed: no text in response")
         return _fallback_screening(candidate, req, cause="Invalid response")
 
     # Extract JSON inside the output
     try:
-        parsed = extract_json(text_output)
-        return parsed
+        parsed = extract_json(result.text)
     except Exception as e:
         print("⚠️ Gemini returned invalid JSON:", e)
         return _fallback_screening(candidate, req, cause="Invalid JSON")
+
+    if cache_key and isinstance(parsed, dict) and not parsed.get("error"):
+        screening_cache.put(cache_key, parsed, result.model)
+    return parsed
@@ -0,0 +1,88 @@
+"""
+Hedged requests: when a call hasn't answered by the time most calls have
+(the ``percentile`` of recent latencies), send the same request again and
+take whichever answer comes first. Only for idempotent calls.
+
+``HedgePolicy`` decides when and whether to hedge:
+
+- the delay is the ``percentile`` of the last ``samples`` successful
+  latencies, never below ``min_delay`` (and ``min_delay`` itself until
+  ``min_samples`` latencies were seen)
+- hedges are capped at ``max_ratio`` of calls: every call earns
+  ``max_ratio`` of a hedge credit (up to ``burst`` saved), a hedge spends one.
+  When the upstream slows down across the board, hedging stops once the
+  credit runs out instead of doubling the load
+
+State is per process.
+"""
+import threading
+from collections import deque
+
+
+class HedgePolicy:
+    def __init__(self, name, percentile=0.95, min_delay=2.0, max_ratio=0.05,
+                 samples=200, min_samples=20, burst=5):
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.burst = burst
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=samples)  # seconds
+        self._credit = 0.0
+        self._counts = {"calls": 0, "hedged": 0, "hedge_won": 0, "skipped_ratio": 0, "skipped_slot": 0}
+
+    def _delay(self):
+        if len(self._latencies) < self.min_samples:
+            return self.min_delay
+        ordered = sorted(self._latencies)
+        return max(self.min_delay, ordered[int(self.percentile * (len(ordered) - 1))])
+
+    def start(self):
+        """Count a call and return how long (seconds) to wait before hedging it."""
+        with self._lock:
+            self._counts["calls"] += 1
+            self._credit = min(self.burst, self._credit + self.max_ratio)
+            return self._delay()
+
+    def observe(self, seconds):
+        """Latency of a successful attempt (primary or hedge)."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def may_hedge(self):
+        """Take a hedge credit; False (and counted) when the ratio cap is reached."""
+        with self._lock:
+            if self._credit < 1:
+                self._counts["skipped_ratio"] += 1
+                return False
+            self._credit -= 1
+            self._counts["hedged"] += 1
+            return True
+
+    def refund(self):
+        """A hedge that was allowed but couldn't be sent (e.g. no rate limit slot)."""
+        with self._lock:
+            self._credit = min(self.burst, self._credit + 1)
+            self._counts["hedged"] -= 1
+            self._counts["skipped_slot"] += 1
+
+    def won(self):
+        with self._lock:
+            self._counts["hedge_won"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+            stats.update({
+                "name": self.name,
+                "delay_ms": round(self._delay() * 1000),
+                "percentile": self.percentile,
+                "max_ratio": self.max_ratio,
+                "latency_samples": len(self._latencies),
+                "hedge_rate": round(stats["hedged"] / stats["calls"], 3) if stats["calls"] else 0.0,
+                "win_rate": round(stats["hedge_won"] / stats["hedged"], 3) if stats["hedged"] else 0.0,
+            })
+            return stats
@@ -0,0 +1,376 @@
+"""
+The one way out to the LLM.
+
+Screening (utils/gemini.py), AI chat and JD parsing (utils/llm_client.py) all
+call ``generate()``, which owns the model / endpoint configuration and a
+process-wide ``requests.Session`` whose keep-alive connection pool is reused
+across calls, so only the first call per worker pays for DNS and the TLS
+handshake.
+
+``generate()`` never raises for LLM trouble: it returns an LLMResult whose
+``reason`` says why there is no text ("no_api_key", "deadline",
+"circuit_open", "throttled", "network", "http", "empty"), and callers pick
+their own fallback.
+
+Calls go through a circuit breaker (utils/circuit_breaker.py): when Gemini
+times out, errors or crawls, the breaker opens and calls fail fast with
+"circuit_open" instead of each waiting out its timeout.
+
+Before that, every call takes a slot from an adaptive limiter
+(utils/rate_limiter.py) shared by all worker processes: a token bucket plus
+a concurrency window that halves on 429/503 and grows back on success.
+Callers queue for a slot for up to LLM_QUEUE_TIMEOUT seconds (within their
+request deadline) and a throttled call is retried, so a busy quota slows
+answers down instead of degrading them; only a call that can't get a slot
+in time returns "throttled".
+
+With LLM_HEDGE=1 (or ``generate(..., hedge=True)``) a call that hasn't
+answered by the LLM_HEDGE_PERCENTILE latency of recent calls is sent a second
+time and the first good answer wins (utils/hedging.py). The hedge needs a
+free limiter slot and is capped at LLM_HEDGE_MAX_RATIO of calls; the slower
+twin finishes in the background and then hands its slot back.
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import deadline
+from utils.circuit_breaker import CircuitBreaker
+from utils.hedging import HedgePolicy
+from utils.rate_limiter import AdaptiveLimiter
+
+llm_config = {
+    # Available Gemini models: gemini-2.5-flash (fast, free), gemini-1.5-pro (more capable), gemini-pro
+    'model': os.getenv('LLM_MODEL', 'gemini-2.5-flash'),
+    'base_url': os.getenv('LLM_BASE_URL', 'https://generativelanguage.googleapis.com').rstrip('/'),
+    'api_version': os.getenv('LLM_API_VERSION', 'v1beta'),
+    # Keep-alive connections kept per host (one host in practice)
+    'pool_size': int(os.getenv('LLM_HTTP_POOL_SIZE', '10')),
+}
+
+# Below this many seconds of request budget an answer can't arrive in time
+MIN_LLM_BUDGET = float(os.getenv("LLM_MIN_BUDGET", "2"))
+
+breaker_config = {
+    # Outcomes considered, in seconds, and how many are needed before tripping
+    'window': float(os.getenv('LLM_BREAKER_WINDOW', '60')),
+    'min_calls': int(os.getenv('LLM_BREAKER_MIN_CALLS', '5')),
+    # Trip when this share of calls failed (network error, timeout, 5xx)...
+    'failure_rate': float(os.getenv('LLM_BREAKER_FAILURE_RATE', '0.5')),
+    # ...or took longer than slow_seconds
+    'slow_seconds': float(os.getenv('LLM_BREAKER_SLOW_SECONDS', '10')),
+    'slow_rate': float(os.getenv('LLM_BREAKER_SLOW_RATE', '0.5')),
+    # Seconds to fail fast before letting probe calls through
+    'open_seconds': float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30')),
+    'probes': int(os.getenv('LLM_BREAKER_PROBES', '1')),
+}
+
+breaker = CircuitBreaker("gemini", **breaker_config)
+
+limiter_config = {
+    # Calls per second across all workers, and the burst allowed (0 = no rate cap)
+    'rate': float(os.getenv('LLM_RATE_LIMIT', '10')),
+    'burst': int(os.getenv('LLM_RATE_BURST', '10')),
+    # Upper bound of the adaptive window of calls in flight across all workers
+    'max_concurrency': int(os.getenv('LLM_MAX_CONCURRENCY', '8')),
+    # A slot held longer than this is considered abandoned (dead worker)
+    'lease_seconds': 60.0,
+}
+
+limiter = AdaptiveLimiter("gemini", **limiter_config)
+
+# Longest a call queues for a limiter slot, and retries of a 429/503 answer
+QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '5'))
+THROTTLE_RETRIES = int(os.getenv('LLM_THROTTLE_RETRIES', '2'))
+
+# Hedged calls are off unless LLM_HEDGE=1 (or a caller passes hedge=True)
+HEDGE_BY_DEFAULT = os.getenv('LLM_HEDGE', '0') == '1'
+
+hedge_config = {
+    # Hedge once a call is slower than this share of recent calls...
+    'percentile': float(os.getenv('LLM_HEDGE_PERCENTILE', '0.95')),
+    # ...but never sooner than this many seconds
+    'min_delay': float(os.getenv('LLM_HEDGE_MIN_DELAY', '2')),
+    # At most this many hedges per call
+    'max_ratio': float(os.getenv('LLM_HEDGE_MAX_RATIO', '0.05')),
+}
+
+hedger = HedgePolicy("gemini", **hedge_config)
+
+
+@dataclass
+class LLMResult:
+    """Outcome of one generate() call; ``text`` is set only when ``ok``."""
+    ok: bool
+    text: str = ""
+    model: str = ""
+    reason: Optional[str] = None   # why there is no text
+    status: Optional[int] = None   # HTTP status, when a response arrived
+    error: Optional[str] = None    # provider / transport error message
+    error_code: Any = None         # provider error code, when it sent one
+    retry_after: Optional[float] = None  # seconds, from a throttled answer
+    latency_ms: float = 0.0
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide pooled session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=llm_config['pool_size'], max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Content-Type": "application/json"})
+                _session = session
+    return _session
+
+
+def _reset_session():
+    # Pooled sockets must not be shared with a forked child
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Hedged calls run both attempts here so the caller can wait on either
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=2 * limiter.max_concurrency, thread_name_prefix="llm-hedge")
+    return _executor
+
+
+def _reset_executor():
+    # Threads don't survive fork: let the child build its own executor
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_session)
+    os.register_at_fork(after_in_child=_reset_executor)
+
+
+def api_key():
+    return os.getenv("GEMINI_API_KEY")
+
+
+def model_name(model=None):
+    return model or llm_config['model']
+
+
+def endpoint(model=None):
+    return f"{llm_config['base_url']}/{llm_config['api_version']}/models/{model_name(model)}:generateContent"
+
+
+def _provider_error(resp):
+    try:
+        error = resp.json().get("error", {})
+        return error.get("message") or resp.text, error.get("code")
+    except ValueError:
+        return resp.text, None
+
+
+def unavailable():
+    """Why a call can't be made right now ("no_api_key" / "deadline" / "circuit_open"), or None."""
+    if not api_key():
+        return "no_api_key"
+    if not deadline.has_budget(MIN_LLM_BUDGET):
+        return "deadline"
+    if breaker.refuses():
+        return "circuit_open"
+    return None
+
+
+def _upstream_failed(result):
+    # 4xx means our request was wrong (or, for 429, too many: the limiter's job), not that Gemini is down
+    if result.reason == "network":
+        return True
+    return result.reason == "http" and result.status >= 500
+
+
+def _throttled(result):
+    return result.reason == "http" and result.status in (429, 503)
+
+
+def _queue_budget():
+    # Leave enough of the request deadline for the call itself
+    left = deadline.remaining()
+    if left is None:
+        return QUEUE_TIMEOUT
+    return max(0.0, min(QUEUE_TIMEOUT, left - MIN_LLM_BUDGET))
+
+
+def get_stats():
+    return {
+        "model": model_name(),
+        "endpoint": endpoint(),
+        "http_pool_size": llm_config['pool_size'],
+        "breaker": breaker.stats(),
+        "limiter": limiter.stats(),
+        "hedging": dict(hedger.stats(), enabled_by_default=HEDGE_BY_DEFAULT),
+    }
+
+
+def generate(prompt, timeout=20, temperature=None, max_output_tokens=None, model=None, hedge=None):
+    """
+    Send one prompt and return an LLMResult. ``timeout`` is the most this
+    call may take; it is shortened to the request deadline. ``hedge``
+    overrides LLM_HEDGE for this call (only hedge idempotent prompts).
+    """
+    model = model_name(model)
+    if hedge is None:
+        hedge = HEDGE_BY_DEFAULT
+    args = (prompt, timeout, temperature, max_output_tokens, model)
+    reason = unavailable()
+    if reason:
+        return LLMResult(ok=False, model=model, reason=reason)
+
+    retries = THROTTLE_RETRIES
+    while True:
+        slot = limiter.acquire(_queue_budget())
+        if slot is None:
+            print("⚠️ LLM: no rate limit slot within the queue timeout")
+            return LLMResult(ok=False, model=model, reason="throttled")
+        if not breaker.allow():
+            limiter.release(slot, completed=False)
+            return LLMResult(ok=False, model=model, reason="circuit_open")
+
+        try:
+            result = _hedged(slot, args) if hedge else _attempt(slot, args)
+        except deadline.DeadlineExceeded:
+            breaker.cancel()  # out of time before reaching the upstream
+            raise
+        except Exception:
+            breaker.record(False)  # give back a half-open probe slot
+            raise
+        if result.status == 429:
+            breaker.cancel()
+        else:
+            breaker.record(not _upstream_failed(result), result.latency_ms / 1000)
+
+        if not _throttled(result) or retries <= 0 or not deadline.has_budget(MIN_LLM_BUDGET):
+            return result
+        retries -= 1
+        print(f"⚠️ LLM: throttled (HTTP {result.status}), queueing a retry")
+
+
+def _attempt(slot, args):
+    """_post() on a limiter slot, handed back once the answer is in."""
+    try:
+        result = _post(*args)
+    except Exception:
+        limiter.release(slot, completed=False)
+        raise
+    limiter.release(slot, throttled=_throttled(result), retry_after=result.retry_after)
+    if result.ok:
+        hedger.observe(result.latency_ms / 1000)
+    return result
+
+
+def _submit(slot, args):
+    # Each attempt gets its own copy of the caller's context (request deadline)
+    return _get_executor().submit(contextvars.copy_context().run, _attempt, slot, args)
+
+
+def _hedged(slot, args):
+    """
+    Run the call; if it hasn't answered within the hedge delay, send it
+    again and return the first good answer (or the last bad one).
+    """
+    # Before submitting: a spent deadline must not leave an attempt running
+    try:
+        hedge_after = min(deadline.timeout(args[1]), hedger.start())
+    except deadline.DeadlineExceeded:
+        limiter.release(slot, completed=False)
+        raise
+    first = _submit(slot, args)
+    try:
+        return first.result(timeout=hedge_after)
+    except FutureTimeout:
+        pass
+
+    # Not while probing a half-open breaker, nor when there's no time left
+    if breaker.state != "closed" or not deadline.has_budget(MIN_LLM_BUDGET) or not hedger.may_hedge():
+        return first.result()
+    hedge_slot = limiter.acquire(0)
+    if hedge_slot is None:
+        hedger.refund()
+        return first.result()
+
+    second = _submit(hedge_slot, args)
+    pending, result, error = {first, second}, None, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            if future.result().ok:
+                if future is second:
+                    hedger.won()
+                return future.result()
+            result = future.result()
+    if result is None:
+        raise error
+    return result
+
+
+def _post(prompt, timeout, temperature, max_output_tokens, model):
+    """One HTTP round trip to Gemini, as an LLMResult."""
+    payload: Dict[str, Any] = {"contents": [{"parts": [{"text": prompt}]}]}
+    generation_config = {}
+    if temperature is not None:
+        generation_config["temperature"] = temperature
+    if max_output_tokens is not None:
+        generation_config["maxOutputTokens"] = max_output_tokens
+    if generation_config:
+        payload["generationConfig"] = generation_config
+
+    started = time.monotonic()
+    try:
+        resp = get_session().post(endpoint(model), params={"key": api_key()}, json=payload, timeout=deadline.timeout(timeout))
+    except requests.RequestException as e:
+        # The message repeats the URL: keep the key out of logs and stored rationales
+        return LLMResult(ok=False, model=model, reason="network", error=str(e).replace(api_key(), "***"),
+                         latency_ms=(time.monotonic() - started) * 1000)
+    latency_ms = (time.monotonic() - started) * 1000
+
+    if resp.status_code != 200:
+        message, code = _provider_error(resp)
+        try:
+            retry_after = float(resp.headers.get("Retry-After", ""))
+        except ValueError:
+            retry_after = None
+        return LLMResult(ok=False, model=model, reason="http", status=resp.status_code,
+                         error=message, error_code=code, retry_after=retry_after, latency_ms=latency_ms)
+
+    # {"candidates": [{"content": {"parts": [{"text": "..."}]}}]}
+    try:
+        text = resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+    except (ValueError, LookupError, TypeError, AttributeError):
+        text = ""
+    if not text:
+        return LLMResult(ok=False, model=model, reason="empty", status=resp.status_code, latency_ms=latency_ms)
+    return LLMResult(ok=True, text=str(text), model=model, status=resp.status_code, latency_ms=latency_ms)
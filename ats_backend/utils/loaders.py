@@ -0,0 +1,113 @@
+"""
+Per-request batched entity loaders.
+
+``loaders().users[5]`` returns the user row with id 5 (or None), and
+``loaders().users[[5, 7]]`` a list of rows in the order asked. Keys requested
+with ``prime()`` or a list lookup are collected and fetched with a single
+``SELECT ... WHERE id IN (...)`` per table the first time any of them is
+needed; every row is then memoized for the rest of the request, so asking
+twice never costs a second round trip.
+
+Loaders live on ``flask.g`` and read through the request-scoped connection
+(utils/db.py), so writes made earlier in the same request on that connection
+are visible to them.
+"""
+from flask import g
+from mysql.connector import Error
+
+from utils.db import request_connection
+
+# Max keys per IN (...) list; larger batches are split
+BATCH_SIZE = 500
+
+_MISSING = object()
+
+
+class EntityLoader:
+    """Batching, memoizing id -> row lookup for one table."""
+
+    def __init__(self, table, columns="*", key="id"):
+        self.table = table
+        self.columns = columns
+        self.key = key
+        self._rows = {}
+        self._pending = set()
+
+    @staticmethod
+    def _norm(key):
+        # JSON bodies send ids as strings or ints interchangeably
+        return str(key)
+
+    def prime(self, *keys):
+        """Queue keys for the next batch without fetching yet."""
+        for key in keys:
+            if key is None:
+                continue
+            key = self._norm(key)
+            if key not in self._rows:
+                self._pending.add(key)
+        return self
+
+    def _flush(self):
+        pending = sorted(self._pending)
+        self._pending.clear()
+        if not pending:
+            return
+        with request_connection() as conn:
+            if not conn:
+                raise Error("Database connection failed")
+            cursor = conn.cursor(dictionary=True, buffered=True)
+            try:
+                for start in range(0, len(pending), BATCH_SIZE):
+                    chunk = pending[start:start + BATCH_SIZE]
+                    placeholders = ",".join(["%s"] * len(chunk))
+                    cursor.execute(
+                        f"SELECT {self.columns} FROM {self.table} WHERE {self.key} IN ({placeholders})",
+                        tuple(chunk),
+                    )
+                    for row in cursor.fetchall():
+                        self._rows[self._norm(row[self.key])] = row
+            finally:
+                cursor.close()
+        for key in pending:
+            self._rows.setdefault(key, None)  # remember misses too
+
+    def _get(self, key):
+        if key is None:
+            return None
+        key = self._norm(key)
+        row = self._rows.get(key, _MISSING)
+        if row is _MISSING:
+            self._pending.add(key)
+            self._flush()
+            row = self._rows[key]
+        return row
+
+    def __getitem__(self, keys):
+        if isinstance(keys, (list, tuple, set)):
+            keys = list(keys)
+            self.prime(*keys)
+            return [self._get(key) for key in keys]
+        return self._get(keys)
+
+    def clear(self, key=None):
+        """Forget one cached row (after updating it) or all of them."""
+        if key is None:
+            self._rows.clear()
+        else:
+            self._rows.pop(self._norm(key), None)
+
+
+class Loaders:
+    def __init__(self):
+        # Never load password hashes through here
+        self.users = EntityLoader("users", "id, name, email, role, phone, status")
+        self.clients = EntityLoader("clients")
+        self.requirements = EntityLoader("requirements")
+
+
+def loaders():
+    """The current request's loaders (created on first use)."""
+    if "_entity_loaders" not in g:
+        g._entity_loaders = Loaders()
+    return g._entity_loaders
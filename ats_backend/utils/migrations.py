@@ -0,0 +1,318 @@
+"""
+Versioned schema migrations.
+
+Migrations live in ats_backend/migrations as numbered modules
+(``0001_baseline_schema.py``, ``0002_...``). Each module exposes
+``upgrade(cursor)`` and a one-line docstring used as its description.
+Applied versions are recorded in the ``schema_version`` table, so a server
+start only has to compare MAX(version) with the newest file on disk.
+
+Run pending migrations with ``python manage.py migrate``.
+"""
+import importlib
+import re
+import threading
+from collections import namedtuple
+from functools import wraps
+from pathlib import Path
+
+from flask import jsonify
+from mysql.connector import errorcode
+from mysql.connector import Error
+
+from utils import db, deadline, sqlite_backend
+from utils.db import get_db_connection, request_connection
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+MIGRATION_LOCK = "ats_schema_migrate"
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+Migration = namedtuple("Migration", ["version", "name", "description", "module"])
+
+
+def discover_migrations():
+    """Return every migration on disk, ordered by version."""
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.py")):
+        match = _FILENAME.match(path.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"migrations.{path.stem}")
+        description = (module.__doc__ or match.group(2)).strip().splitlines()[0]
+        migrations.append(Migration(int(match.group(1)), match.group(2), description, module))
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version numbers in migrations/")
+    return migrations
+
+
+_latest_version = None
+
+
+def latest_version():
+    """Newest migration version on disk (scanned once per process)."""
+    global _latest_version
+    if _latest_version is None:
+        migrations = discover_migrations()
+        _latest_version = migrations[-1].version if migrations else 0
+    return _latest_version
+
+
+def get_schema_version(cursor):
+    """Highest applied migration version, or 0 on a database never migrated."""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    row = cursor.fetchone()
+    return (row[0] if row else None) or 0
+
+
+def check_schema():
+    """
+    Return (current_version, latest_version) with a single query.
+    current_version is None when the database is unreachable.
+    """
+    latest = latest_version()
+    conn = get_db_connection()
+    if not conn:
+        return None, latest
+    cursor = conn.cursor()
+    try:
+        current = get_schema_version(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    _note_schema_version(current)
+    return current, latest
+
+
+_verified_version = None
+_verify_lock = threading.Lock()
+
+
+def schema_is_current():
+    """
+    True once this process has seen the database at the latest migration.
+    The result is cached per process, so hot endpoints pay for the
+    version query only until the schema is first found current.
+    """
+    global _verified_version
+    latest = latest_version()
+    if _verified_version == latest:
+        return True
+
+    with _verify_lock:
+        if _verified_version == latest:
+            return True
+        try:
+            current, _ = check_schema()
+        except deadline.DeadlineExceeded:
+            raise  # a 504 for this request, not a stale schema
+        except Exception as e:
+            print("❌ Error checking DB schema:", e)
+            return False
+        if current is not None and current >= latest:
+            _verified_version = latest
+            return True
+    return False
+
+
+def schema_required(view):
+    """Route decorator: answer 503 instead of running data queries on an outdated schema."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not schema_is_current():
+            return jsonify({
+                "error": "Database schema is not up to date. Run `python manage.py migrate`."
+            }), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def migrate(target=None):
+    """
+    Apply pending migrations up to ``target`` (default: latest).
+    Returns the list of applied Migration entries.
+    """
+    migrations = discover_migrations()
+    if db.DB_BACKEND == "sqlite":
+        return _create_sqlite_schema(migrations)
+    if target is None:
+        target = migrations[-1].version if migrations else 0
+
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    cursor = conn.cursor()
+    applied = []
+    try:
+        # Serialize concurrent deploys: only one process migrates at a time
+        cursor.execute("SELECT GET_LOCK(%s, 60)", (MIGRATION_LOCK,))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Another process is running migrations")
+
+        try:
+            _ensure_version_table(cursor)
+            current = get_schema_version(cursor)
+
+            for migration in migrations:
+                if migration.version <= current or migration.version > target:
+                    continue
+                print(f"⏳ Applying {migration.version:04d}_{migration.name}: {migration.description}")
+                migration.module.upgrade(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                    (migration.version, migration.name),
+                )
+                conn.commit()
+                applied.append(migration)
+                invalidate_schema_metadata()
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return applied
+
+
+def _create_sqlite_schema(migrations):
+    """
+    SQLite databases are created directly at head from
+    migrations/sqlite_schema.sql, then stamped with every migration version.
+    """
+    head = sqlite_backend.schema_version()
+    latest = migrations[-1].version if migrations else 0
+    if head != latest:
+        raise RuntimeError(f"migrations/sqlite_schema.sql is at version {head} but the latest migration is {latest}; "
+                           "update it together with the migration")
+
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    cursor = conn.cursor()
+    try:
+        _ensure_version_table(cursor)
+        current = get_schema_version(cursor)
+        if current >= head:
+            return []
+        if current:
+            raise RuntimeError(f"SQLite database is at version {current}; recreate it to reach version {head}")
+
+        print(f"⏳ Creating SQLite schema at version {head}")
+        sqlite_backend.create_schema(conn)
+        cursor.executemany(
+            "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+            [(m.version, m.name) for m in migrations],
+        )
+        conn.commit()
+        invalidate_schema_metadata()
+        return migrations
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# -------------------------------------
+# Schema metadata cache
+# -------------------------------------
+_enum_cache = None  # (schema version, {(table, column): [values]})
+_enum_lock = threading.Lock()
+
+
+def invalidate_schema_metadata():
+    global _enum_cache
+    with _enum_lock:
+        _enum_cache = None
+
+
+def _note_schema_version(version):
+    """Drop the cache when a version check finds the schema moved since it was loaded."""
+    global _enum_cache
+    with _enum_lock:
+        if _enum_cache is not None and _enum_cache[0] != version:
+            _enum_cache = None
+
+
+def _load_enums():
+    with request_connection() as conn:
+        if not conn:
+            return None
+        cursor = conn.cursor()
+        try:
+            version = get_schema_version(cursor)
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND DATA_TYPE = 'enum'
+            """)
+            # COLUMN_TYPE looks like: "enum('ADMIN','RECRUITER',...)"
+            enums = {
+                (table, column): re.findall(r"'(.*?)'", column_type)
+                for table, column, column_type in cursor.fetchall()
+            }
+        finally:
+            cursor.close()
+    return version, enums
+
+
+def enum_values(table, column):
+    """
+    Allowed values of an ENUM column ([] if unknown or the DB is unreachable).
+    Every ENUM in the schema is read in one query on first use and kept,
+    with the schema version it was read at, until that version changes:
+    this process migrates, or check_schema() sees a different version.
+    """
+    global _enum_cache
+    cache = _enum_cache
+    if cache is None:
+        with _enum_lock:
+            cache = _enum_cache
+            if cache is None:
+                cache = _load_enums()
+                if cache is None:
+                    return []
+                _enum_cache = cache
+    return list(cache[1].get((table, column), []))
+
+
+# -------------------------------------
+# Catalog helpers for migration modules
+# -------------------------------------
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+    """, (table, index))
+    return cursor.fetchone() is not None
+
+
+def constraint_exists(cursor, table, constraint):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.TABLE_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s AND CONSTRAINT_NAME = %s
+    """, (table, constraint))
+    return cursor.fetchone() is not None
@@ -0,0 +1,164 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Requests without ``limit`` / ``after`` keep the legacy response: the full,
+ordered JSON array. With either parameter the endpoint answers
+
+    {"items": [...], "next_cursor": "<opaque>", "has_more": true, "total": 123}
+
+where ``total`` is only computed when ``include_total=1`` is passed.
+Pass ``next_cursor`` back as ``after`` to fetch the following page.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import request
+from werkzeug.exceptions import BadRequest
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# column: SQL expression used in WHERE/ORDER BY (e.g. "u.created_at")
+# field:  key of that value in the returned row dict (e.g. "created_at")
+SortKey = namedtuple("SortKey", ["column", "field", "descending", "nullable"])
+PageRequest = namedtuple("PageRequest", ["limit", "after", "with_total"])
+
+
+class InvalidPageRequest(BadRequest):
+    description = "Invalid pagination parameters"
+
+
+def sort_key(column, field=None, descending=True, nullable=False):
+    return SortKey(column, field or column.rpartition(".")[2], descending, nullable)
+
+
+def _cursor_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_cursor_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        raise InvalidPageRequest("Invalid 'after' cursor")
+    if not isinstance(values, list) or not values:
+        raise InvalidPageRequest("Invalid 'after' cursor")
+    return values
+
+
+def get_page_request():
+    """Parse limit/after/include_total; None means the legacy unpaginated response."""
+    args = request.args
+    if "limit" not in args and "after" not in args:
+        return None
+
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise InvalidPageRequest("'limit' must be an integer")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    # Decoded here so a malformed cursor is a 400 before the view opens its try block
+    after = args.get("after")
+    after = decode_cursor(after) if after else None
+
+    with_total = args.get("include_total", "").lower() in ("1", "true", "yes")
+    return PageRequest(limit, after, with_total)
+
+
+def keyset_condition(keys, values):
+    """
+    WHERE fragment selecting rows strictly after ``values`` in ``keys`` order.
+    MySQL sorts NULL first ascending and last descending; nullable keys follow that.
+    """
+    def after(key, value):
+        op = "<" if key.descending else ">"
+        if not key.nullable:
+            return f"{key.column} {op} %s", [value]
+        if value is None:
+            return (("1 = 0", []) if key.descending else (f"{key.column} IS NOT NULL", []))
+        if key.descending:
+            return f"({key.column} {op} %s OR {key.column} IS NULL)", [value]
+        return f"{key.column} {op} %s", [value]
+
+    def tie(key, value):
+        if value is None:
+            return f"{key.column} IS NULL", []
+        return f"{key.column} = %s", [value]
+
+    sql, params = after(keys[-1], values[-1])
+    for key, value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+        after_sql, after_params = after(key, value)
+        tie_sql, tie_params = tie(key, value)
+        sql = f"({after_sql} OR ({tie_sql} AND {sql}))"
+        params = after_params + tie_params + params
+    return sql, params
+
+
+def order_by_clause(keys):
+    return "ORDER BY " + ", ".join(f"{k.column} {'DESC' if k.descending else 'ASC'}" for k in keys)
+
+
+def paginate(cursor, columns, source, keys, page, where=None, params=()):
+    """
+    Run ``SELECT columns FROM source [WHERE where] ORDER BY keys``.
+
+    With ``page`` None the full ordered list is returned (legacy behaviour);
+    otherwise one page plus cursor metadata, ready for jsonify().
+    """
+    conditions = [f"({where})"] if where else []
+    params = list(params)
+
+    if page is None:
+        where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor.execute(f"SELECT {columns} FROM {source} {where_sql} {order_by_clause(keys)}", tuple(params))
+        return cursor.fetchall()
+
+    total = None
+    if page.with_total:
+        where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor.execute(f"SELECT COUNT(*) AS total FROM {source} {where_sql}", tuple(params))
+        row = cursor.fetchone()
+        total = row["total"] if isinstance(row, dict) else row[0]
+
+    page_params = list(params)
+    if page.after:
+        if len(page.after) != len(keys):
+            raise InvalidPageRequest("Cursor does not belong to this endpoint")
+        after_sql, after_params = keyset_condition(keys, page.after)
+        conditions.append(after_sql)
+        page_params += after_params
+
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cursor.execute(
+        f"SELECT {columns} FROM {source} {where_sql} {order_by_clause(keys)} LIMIT %s",
+        tuple(page_params + [page.limit + 1]),
+    )
+    rows = cursor.fetchall()
+
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+    next_cursor = encode_cursor([rows[-1][k.field] for k in keys]) if has_more and rows else None
+
+    result = {"items": rows, "next_cursor": next_cursor, "has_more": has_more}
+    if total is not None:
+        result["total"] = total
+    return result
@@ -0,0 +1,212 @@
+"""
+Adaptive client-side limiter for calls to a rate-limited API.
+
+Two limits apply to every call:
+
+- a token bucket: at most ``rate`` calls per second, bursts of ``burst``
+- an AIMD concurrency window: at most ``window`` calls in flight. Each
+  success grows the window by 1/window (about +1 per window's worth of
+  successes); a throttled call (429/503) halves it, at most once per
+  ``cooldown`` seconds, and a Retry-After pauses new calls until then
+
+The state lives in shared memory created when this module is imported. With
+gunicorn's preload_app that happens in the master, so all forked workers
+share one bucket and one window; otherwise the limits are per process.
+Each call holds a slot with a lease (``lease_seconds``), so a worker that
+dies mid-call frees its slot when the lease runs out.
+
+``acquire()`` waits (polling, up to ``max_wait`` seconds) instead of failing
+straight away, so bursts queue briefly rather than erroring.
+
+The shared lock is only ever taken with a timeout (LOCK_TIMEOUT): a worker
+killed while holding it (e.g. a gunicorn timeout SIGKILL) would otherwise
+block every worker's next call forever. A call that can't get the lock is
+treated as throttled; once the lock has been unobtainable for longer than
+``lease_seconds`` its holder is taken to be dead and this process switches
+to per-process limits.
+"""
+import multiprocessing
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Shared array layout: header fields, then one lease expiry per slot
+_TOKENS, _REFILLED_AT, _WINDOW, _BLOCKED_UNTIL, _DECREASED_AT = range(5)
+_GRANTED, _QUEUED, _WAIT_MS, _TIMEOUTS, _THROTTLED = range(5, 10)
+_HEADER = 10
+
+# Longest single sleep while queued; keeps a waiting caller responsive
+MAX_POLL = 0.25
+
+# Seconds to wait for the shared lock; holders keep it for microseconds
+LOCK_TIMEOUT = 0.5
+
+
+class AdaptiveLimiter:
+    def __init__(self, name, rate=10.0, burst=10, max_concurrency=8, min_concurrency=1,
+                 cooldown=1.0, lease_seconds=60.0):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.cooldown = cooldown
+        self.lease_seconds = lease_seconds
+
+        self.lock_timeouts = 0  # this process only
+        self._stuck_since = None
+        self._fallback_lock = threading.Lock()
+
+        size = _HEADER + self.max_concurrency
+        try:
+            self._state = multiprocessing.RawArray("d", size)
+            self._lock = multiprocessing.Lock()
+            self.shared = True
+        except (OSError, ImportError) as e:
+            # No POSIX semaphores (some sandboxes): limit per process instead
+            print(f"⚠️ Limiter '{name}' can't use shared memory ({e}); limits are per process")
+            self._state = [0.0] * size
+            self._lock = threading.Lock()
+            self.shared = False
+        self._reset_state()
+
+    def _reset_state(self):
+        self._state[_TOKENS] = self.burst
+        self._state[_REFILLED_AT] = time.monotonic()
+        self._state[_WINDOW] = self.max_concurrency
+
+    @contextmanager
+    def _locked(self):
+        """Hold the lock; yields False instead when it can't be had within LOCK_TIMEOUT."""
+        lock = self._lock
+        if not lock.acquire(timeout=LOCK_TIMEOUT):
+            self._lock_timed_out()
+            yield False
+            return
+        self._stuck_since = None
+        try:
+            yield True
+        finally:
+            lock.release()
+
+    def _lock_timed_out(self):
+        now = time.monotonic()
+        with self._fallback_lock:
+            self.lock_timeouts += 1
+            if self._stuck_since is None:
+                self._stuck_since = now
+                print(f"⚠️ Limiter '{self.name}': shared lock unavailable for {LOCK_TIMEOUT}s, treating calls as throttled")
+            elif self.shared and now - self._stuck_since >= self.lease_seconds:
+                print(f"⚠️ Limiter '{self.name}': shared lock held for over {self.lease_seconds:g}s "
+                      f"(its holder died?); limits are per process from now on")
+                self._state = [0.0] * len(self._state)
+                self._lock = threading.Lock()
+                self.shared = False
+                self._stuck_since = None
+                self._reset_state()
+
+    def _in_flight(self, now):
+        return sum(1 for i in range(_HEADER, len(self._state)) if self._state[i] > now)
+
+    def _try_take(self, now):
+        """A slot index, or None and how long to wait before trying again."""
+        s = self._state
+        if now < s[_BLOCKED_UNTIL]:
+            return None, s[_BLOCKED_UNTIL] - now
+
+        if self.rate > 0:
+            s[_TOKENS] = min(self.burst, s[_TOKENS] + (now - s[_REFILLED_AT]) * self.rate)
+            s[_REFILLED_AT] = now
+
+        if self._in_flight(now) >= int(s[_WINDOW]):
+            return None, 0.02
+        if self.rate > 0 and s[_TOKENS] < 1:
+            return None, (1 - s[_TOKENS]) / self.rate
+
+        for i in range(_HEADER, len(s)):
+            if s[i] <= now:
+                if self.rate > 0:
+                    s[_TOKENS] -= 1
+                s[i] = now + self.lease_seconds
+                s[_GRANTED] += 1
+                return i, 0.0
+        return None, 0.02
+
+    def acquire(self, max_wait=0.0):
+        """
+        Take a slot, waiting up to ``max_wait`` seconds for one. Returns a
+        slot to hand to release(), or None when the wait ran out or the
+        shared lock couldn't be had.
+        """
+        started = time.monotonic()
+        give_up_at = started + max(0.0, max_wait)
+        queued = False
+        while True:
+            now = time.monotonic()
+            with self._locked() as locked:
+                if not locked:
+                    return None
+                slot, wait = self._try_take(now)
+                if slot is not None:
+                    if queued:
+                        self._state[_WAIT_MS] += (now - started) * 1000
+                    return slot
+                if not queued:
+                    self._state[_QUEUED] += 1
+                    queued = True
+                if now >= give_up_at:
+                    self._state[_TIMEOUTS] += 1
+                    self._state[_WAIT_MS] += (now - started) * 1000
+                    return None
+            # Jitter so queued callers in different workers don't wake in lockstep
+            time.sleep(min(give_up_at - now, MAX_POLL, wait) * random.uniform(0.8, 1.2) + 0.001)
+
+    def release(self, slot, throttled=False, retry_after=None, completed=True):
+        """
+        Give back a slot. ``throttled`` (the API answered 429/503) shrinks the
+        window; any other completed call grows it. ``completed=False`` (the
+        call never got an answer) just frees the slot.
+        """
+        now = time.monotonic()
+        with self._locked() as locked:
+            if not locked:
+                return  # the slot's lease frees it
+            s = self._state
+            s[slot] = 0.0
+            if not completed:
+                return
+            if not throttled:
+                s[_WINDOW] = min(self.max_concurrency, s[_WINDOW] + 1.0 / max(s[_WINDOW], 1.0))
+                return
+            s[_THROTTLED] += 1
+            if retry_after:
+                s[_BLOCKED_UNTIL] = max(s[_BLOCKED_UNTIL], now + retry_after)
+            if now - s[_DECREASED_AT] >= self.cooldown:
+                s[_WINDOW] = max(self.min_concurrency, s[_WINDOW] / 2)
+                s[_DECREASED_AT] = now
+                print(f"⚠️ Limiter '{self.name}': throttled upstream, concurrency window now {int(s[_WINDOW])}")
+
+    def stats(self):
+        now = time.monotonic()
+        with self._locked() as locked:
+            if not locked:
+                return {"name": self.name, "shared_across_workers": self.shared,
+                        "lock_unavailable": True, "lock_timeouts": self.lock_timeouts}
+            s = self._state
+            return {
+                "name": self.name,
+                "shared_across_workers": self.shared,
+                "rate_per_second": self.rate,
+                "tokens": round(min(self.burst, s[_TOKENS] + (now - s[_REFILLED_AT]) * self.rate), 2) if self.rate > 0 else None,
+                "concurrency_window": int(s[_WINDOW]),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight(now),
+                "blocked_for_seconds": round(max(0.0, s[_BLOCKED_UNTIL] - now), 2),
+                "granted": int(s[_GRANTED]),
+                "queued": int(s[_QUEUED]),
+                "avg_queue_wait_ms": round(s[_WAIT_MS] / s[_QUEUED], 1) if s[_QUEUED] else 0.0,
+                "queue_timeouts": int(s[_TIMEOUTS]),
+                "throttled": int(s[_THROTTLED]),
+                "lock_timeouts": self.lock_timeouts,
+            }
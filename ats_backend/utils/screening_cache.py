@@ -0,0 +1,126 @@
+"""
+Cache of AI screening results.
+
+A screening is a pure function of the prompt built from the candidate and
+requirement rows and of the model that answers it, so results are keyed by
+``fingerprint(prompt, model)``: a SHA-256 of both. Any edit to a field the
+prompt uses, or a model change, gives a new key; nothing has to be
+invalidated by hand.
+
+Lookups try a per-process LRU first, then the ``screening_cache`` table
+(migration 0007), which all workers share and which survives restarts.
+Entries live SCREENING_CACHE_TTL seconds (0 turns the cache off). Only real
+model answers are stored, never the heuristic fallback. Callers skip the
+lookup with ``force`` (``"force": true`` on /api/screen-candidate) and still
+store the fresh result.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from mysql.connector import Error
+
+from utils.db import get_db_connection
+from utils.ttl_cache import TTLCache
+
+SCREENING_CACHE_TTL = float(os.getenv("SCREENING_CACHE_TTL", str(7 * 24 * 3600)))
+SCREENING_CACHE_SIZE = int(os.getenv("SCREENING_CACHE_SIZE", "1000"))
+
+_memory = TTLCache(SCREENING_CACHE_TTL, SCREENING_CACHE_SIZE)
+_counts = {"memory_hits": 0, "db_hits": 0, "misses": 0, "forced": 0, "stored": 0}
+_counts_lock = threading.Lock()
+
+
+def enabled():
+    return SCREENING_CACHE_TTL > 0
+
+
+def fingerprint(prompt, model):
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def _count(name):
+    with _counts_lock:
+        _counts[name] += 1
+
+
+def lookup(key, force=False):
+    """The cached result for ``key`` (a dict), or None. ``force`` skips the cache."""
+    if force:
+        _count("forced")
+        return None
+    result = _memory.get(key)
+    if result is not None:
+        _count("memory_hits")
+        return result
+
+    conn = get_db_connection(readonly=True)
+    if conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "SELECT result_json FROM screening_cache WHERE cache_key = %s AND expires_at > %s",
+                (key, int(time.time())),
+            )
+            row = cursor.fetchone()
+            if row:
+                result = json.loads(row["result_json"])
+                _memory.set(key, result)
+                _count("db_hits")
+                return result
+        except (Error, ValueError) as e:
+            print("⚠️ Screening cache lookup failed:", e)
+        finally:
+            cursor.close()
+            conn.close()
+
+    _count("misses")
+    return None
+
+
+def put(key, result, model):
+    _memory.set(key, result)
+    conn = get_db_connection()
+    if not conn:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO screening_cache (cache_key, model_version, result_json, expires_at)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                model_version=VALUES(model_version),
+                result_json=VALUES(result_json),
+                expires_at=VALUES(expires_at)
+        """, (key, model, json.dumps(result), int(time.time() + SCREENING_CACHE_TTL)))
+        conn.commit()
+        _count("stored")
+    except Error as e:
+        print("⚠️ Screening cache write failed:", e)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def purge_expired():
+    """Delete expired rows from the table; returns how many went."""
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM screening_cache WHERE expires_at <= %s", (int(time.time()),))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_stats():
+    with _counts_lock:
+        stats = dict(_counts)
+    stats.update({"enabled": enabled(), "ttl_seconds": SCREENING_CACHE_TTL, "memory_size": SCREENING_CACHE_SIZE})
+    return stats
@@ -0,0 +1,288 @@
+"""
+Optional per-client sharding of the candidate pipeline tables.
+
+With DB_SHARDS unset everything stays on the primary and every helper here
+returns primary connections. With shards configured, the pipeline rows
+(candidate_progress, candidate_screening, interviews) of a client listed in
+the ``client_shards`` table live on that shard; everything else (users,
+candidates, clients, requirements, stages, allocations) stays on the primary.
+
+Routing goes requirement -> requirements.client_id -> client_shards.shard,
+with both lookups cached for DB_SHARD_MAP_TTL seconds. Shards are set up and
+filled with ``python manage.py shards init`` / ``shards move``.
+"""
+import os
+import time
+
+from mysql.connector import Error
+
+from utils.db import get_db_connection, get_shard_pool, request_connection, shard_configs
+from utils.fanout import Query, run_parallel, run_query
+from utils.ttl_cache import TTLCache
+
+PRIMARY = "primary"
+PIPELINE_TABLES = ("candidate_progress", "candidate_screening", "interviews")
+
+SHARD_MAP_TTL = float(os.getenv("DB_SHARD_MAP_TTL", "60"))
+SHARD_MAP_SIZE = 4096
+
+
+def sharding_enabled():
+    return bool(shard_configs)
+
+
+_requirement_clients = TTLCache(SHARD_MAP_TTL, SHARD_MAP_SIZE)
+_client_shards = TTLCache(SHARD_MAP_TTL, SHARD_MAP_SIZE)
+
+
+def _lookup(sql, params):
+    with request_connection() as conn:
+        if not conn:
+            raise Error("Database connection failed")
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+
+
+def shard_for_client(client_id):
+    if not sharding_enabled() or client_id is None:
+        return PRIMARY
+    shard = _client_shards.get(client_id)
+    if shard is None:
+        shard = _lookup("SELECT shard FROM client_shards WHERE client_id = %s", (client_id,)) or PRIMARY
+        if shard != PRIMARY and shard not in shard_configs:
+            print(f"⚠️ Client {client_id} mapped to unknown shard '{shard}', using primary")
+            shard = PRIMARY
+        _client_shards.set(client_id, shard)
+    return shard
+
+
+def shard_for_requirement(requirement_id):
+    if not sharding_enabled() or requirement_id is None:
+        return PRIMARY
+    key = str(requirement_id)
+    client_id = _requirement_clients.get(key)
+    if client_id is None:
+        # Archived requirements keep their shard (utils/archive.py)
+        client_id = _lookup(
+            "SELECT client_id FROM requirements WHERE id = %s "
+            "UNION ALL SELECT client_id FROM requirements_archive WHERE id = %s LIMIT 1",
+            (key, key),
+        )
+        if client_id is None:
+            return PRIMARY
+        _requirement_clients.set(key, client_id)
+    return shard_for_client(client_id)
+
+
+def forget_client(client_id):
+    _client_shards.pop(client_id)
+
+
+def get_pipeline_connection(requirement_id, primary_conn=None, readonly=False):
+    """
+    Connection that holds the pipeline rows of ``requirement_id``.
+
+    For unsharded clients this is ``primary_conn`` when given (so callers that
+    already hold a primary connection don't check out a second one), else a
+    fresh primary/replica connection. Returns None if the shard is unreachable.
+    """
+    shard = shard_for_requirement(requirement_id)
+    if shard == PRIMARY:
+        return primary_conn if primary_conn is not None else get_db_connection(readonly=readonly)
+    try:
+        return get_shard_pool(shard).acquire()
+    except Error as e:
+        print(f"❌ Shard '{shard}' connection failed:", e)
+        return None
+
+
+def release_pipeline_connection(conn, primary_conn=None):
+    """Close a connection from get_pipeline_connection unless it is the caller's own primary one."""
+    if conn is not None and conn is not primary_conn:
+        conn.close()
+
+
+def pipeline_nodes(include_primary=True):
+    return ([PRIMARY] if include_primary else []) + sorted(shard_configs)
+
+
+def _node_connection(node, readonly=True):
+    if node == PRIMARY:
+        conn = get_db_connection(readonly=readonly)
+    else:
+        conn = get_shard_pool(node).acquire()
+    if conn is None:
+        raise Error(f"Database connection failed for {node}")
+    return conn
+
+
+def scatter_gather(sql, params=(), include_primary=True, readonly=True):
+    """
+    Run one SELECT on the primary and every shard, concurrently (utils/fanout.py);
+    returns {node: rows}. Global reports merge the per-node results themselves.
+    """
+    query = Query(sql, params)
+    return run_parallel({
+        node: (lambda node=node: run_query(query, connect=lambda: _node_connection(node, readonly)))
+        for node in pipeline_nodes(include_primary)
+    })
+
+
+def gather_count(sql, params=(), key="count"):
+    """Sum a single-row COUNT/SUM query across every pipeline node."""
+    return sum(
+        int((rows[0].get(key) if rows else 0) or 0)
+        for rows in scatter_gather(sql, params).values()
+    )
+
+
+# -------------------------------------
+# Shard administration (manage.py shards ...)
+# -------------------------------------
+def _strip_foreign_keys(ddl):
+    """Drop the FOREIGN KEY lines of a SHOW CREATE TABLE statement."""
+    lines = [line for line in ddl.splitlines() if " FOREIGN KEY " not in line]
+    for i, line in enumerate(lines):
+        if line.startswith(")") and i and lines[i - 1].endswith(","):
+            lines[i - 1] = lines[i - 1][:-1]
+    return "\n".join(lines)
+
+
+def init_shard_schema(shard):
+    """
+    Create the pipeline tables (and their archives) on ``shard`` from the
+    primary's definitions. Foreign keys are dropped: the parent rows live on
+    the primary.
+    """
+    conn = get_db_connection()
+    shard_conn = get_shard_pool(shard).acquire()
+    cursor = conn.cursor()
+    shard_cursor = shard_conn.cursor()
+    try:
+        for table in PIPELINE_TABLES:
+            cursor.execute(f"SHOW CREATE TABLE {table}")
+            ddl = _strip_foreign_keys(cursor.fetchone()[1])
+            ddl = ddl.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1)
+            shard_cursor.execute(ddl)
+            # Archive tier (utils/archive.py) for this shard's pipeline rows
+            shard_cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_archive LIKE {table}")
+            print(f"   -> {shard}.{table} ready")
+    finally:
+        cursor.close()
+        shard_cursor.close()
+        conn.close()
+        shard_conn.close()
+
+
+def _copy_verified(shard_cursor, table, rows, batch):
+    """
+    Insert ``rows`` on the shard with a plain INSERT. Rows a previous run
+    already copied (same id, same values) are skipped; an id the shard holds
+    with other values raises before anything is deleted on the primary.
+    """
+    for start in range(0, len(rows), batch):
+        chunk = rows[start:start + batch]
+        ids = [row["id"] for row in chunk]
+        shard_cursor.execute(
+            f"SELECT * FROM {table} WHERE id IN ({','.join(['%s'] * len(ids))})", tuple(ids)
+        )
+        existing = {row["id"]: row for row in shard_cursor.fetchall()}
+        clashes = [row["id"] for row in chunk if row["id"] in existing and existing[row["id"]] != row]
+        if clashes:
+            raise RuntimeError(
+                f"{table} id(s) {clashes[:10]} already exist on the shard with other data; nothing was deleted"
+            )
+        fresh = [row for row in chunk if row["id"] not in existing]
+        if fresh:
+            columns = list(fresh[0])
+            shard_cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                [tuple(row[c] for c in columns) for row in fresh],
+            )
+
+
+def _move_pass(client_id, shard, batch):
+    """One copy-then-delete pass over the client's pipeline rows still on the primary."""
+    conn = get_db_connection()
+    shard_conn = get_shard_pool(shard).acquire()
+    cursor = conn.cursor(dictionary=True)
+    shard_cursor = shard_conn.cursor(dictionary=True)
+    moved = {}
+    try:
+        cursor.execute("SELECT id FROM requirements WHERE client_id = %s", (client_id,))
+        requirement_ids = [row["id"] for row in cursor.fetchall()]
+        placeholders = ",".join(["%s"] * len(requirement_ids))
+
+        # Locked until the primary commit, so no copied row changes before its delete
+        rows = {}
+        for table in PIPELINE_TABLES:
+            rows[table] = []
+            if requirement_ids:
+                cursor.execute(
+                    f"SELECT * FROM {table} WHERE requirement_id IN ({placeholders}) FOR UPDATE",
+                    tuple(requirement_ids),
+                )
+                rows[table] = cursor.fetchall()
+            _copy_verified(shard_cursor, table, rows[table], batch)
+        shard_conn.commit()
+
+        cursor.execute(
+            "INSERT INTO client_shards (client_id, shard) VALUES (%s, %s) "
+            "ON DUPLICATE KEY UPDATE shard = VALUES(shard), moved_at = CURRENT_TIMESTAMP",
+            (client_id, shard),
+        )
+        # Delete exactly the rows copied above, never anything written since
+        for table in PIPELINE_TABLES:
+            ids = [row["id"] for row in rows[table]]
+            deleted = 0
+            for start in range(0, len(ids), batch):
+                chunk = ids[start:start + batch]
+                cursor.execute(f"DELETE FROM {table} WHERE id IN ({','.join(['%s'] * len(chunk))})", tuple(chunk))
+                deleted += cursor.rowcount
+            if deleted != len(ids):
+                raise RuntimeError(f"{table}: copied {len(ids)} row(s) but deleted {deleted}; rolled back")
+            moved[table] = deleted
+        conn.commit()
+        forget_client(client_id)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        shard_cursor.close()
+        conn.close()
+        shard_conn.close()
+    return moved
+
+
+def move_client(client_id, shard, batch=1000, settle=SHARD_MAP_TTL):
+    """
+    Copy a client's pipeline rows to ``shard``, then record the mapping and
+    delete the primary copies in one primary transaction. Re-runnable: rows
+    a previous run already copied are recognised by id and values.
+
+    Other processes keep their cached route to the primary for up to
+    DB_SHARD_MAP_TTL after the mapping changes, so their writes for the
+    client keep landing there. After the first pass this waits ``settle``
+    seconds (every cache has expired by then) and moves those rows too.
+    Shard tables keep their own AUTO_INCREMENT, so an id written natively on
+    the shard can equal a primary id being moved; the pass then stops with
+    an error before deleting anything, and the rows stay on the primary.
+    """
+    if shard not in shard_configs:
+        raise ValueError(f"Unknown shard '{shard}' (configured: {', '.join(sorted(shard_configs)) or 'none'})")
+
+    moved = _move_pass(client_id, shard, batch)
+    if settle > 0:
+        print(f"⏳ Waiting {settle:g}s for other processes' shard map caches to expire")
+        time.sleep(settle)
+        for table, count in _move_pass(client_id, shard, batch).items():
+            if count:
+                print(f"   -> {table}: {count} row(s) written to the primary during the move")
+            moved[table] += count
+    return moved
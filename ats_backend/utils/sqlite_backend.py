@@ -0,0 +1,420 @@
+"""
+Embedded SQLite backend (DB_BACKEND=sqlite).
+
+For single-node installs and local benchmarks without a MySQL server. The
+pool in utils/db.py hands out these connections exactly like MySQL ones:
+they expose the subset of the mysql.connector connection/cursor API the
+backend uses (dictionary / buffered / prepared cursors, in_transaction,
+ping, consume_results), and SQLite errors are re-raised as the matching
+mysql.connector errors and errnos, so callers (and run_transaction's
+deadlock retry, which sees a busy database as a lock wait timeout) need no
+changes.
+
+Statements are translated by a small dialect shim, cached per SQL string:
+
+- ``%s`` placeholders -> ``?``
+- ``INSERT IGNORE`` -> ``INSERT OR IGNORE``
+- ``ON DUPLICATE KEY UPDATE`` / ``VALUES(col)`` -> ``ON CONFLICT DO UPDATE SET`` / ``excluded.col``
+- ``NOW()``, ``NOW() - INTERVAL n DAY``, ``DATABASE()``
+- ``information_schema.COLUMNS`` and ``SHOW COLUMNS`` -> a temp catalog view
+  that reports CHECK (col IN (...)) columns as enums
+- ``SHOW CREATE TABLE`` -> sqlite_master
+
+``CONCAT`` and ``DATE_FORMAT`` are registered as SQL functions, and
+``GET_LOCK`` / ``RELEASE_LOCK`` always succeed (SQLite's own write lock
+serializes migrations). Anything
+else MySQL-only (other SHOW statements, ALTER ... MODIFY, server variables)
+fails with NotSupportedError / ProgrammingError. Comparisons are
+case-insensitive only on the columns the schema file declares
+COLLATE NOCASE (MySQL's default collation applies to every text column).
+
+The schema is created at head from migrations/sqlite_schema.sql by
+``python manage.py migrate`` (see create_schema()).
+"""
+import importlib
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+from mysql.connector import errorcode, errors
+
+from utils import deadline
+
+SCHEMA_FILE = Path(__file__).parent.parent / "migrations" / "sqlite_schema.sql"
+_SCHEMA_VERSION = re.compile(r"^--\s*schema version:\s*(\d+)", re.MULTILINE)
+
+# Rows of SQLite work between deadline checks (sqlite3 progress handler)
+PROGRESS_STEPS = 10000
+
+
+# -------------------------------------
+# Types
+# -------------------------------------
+def _parse_timestamp(value):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _parse_date(value):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+# MySQL hands back datetime objects for these columns; so do we
+for _decltype in ("TIMESTAMP", "DATETIME"):
+    sqlite3.register_converter(_decltype, _parse_timestamp)
+sqlite3.register_converter("DATE", _parse_date)
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" "))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_adapter(Decimal, str)
+
+
+# -------------------------------------
+# SQL functions missing from SQLite
+# -------------------------------------
+def _concat(*args):
+    if any(arg is None for arg in args):
+        return None
+    return "".join(str(arg) for arg in args)
+
+
+_DATE_FORMAT_CODES = {
+    "%Y": "%Y", "%y": "%y", "%m": "%m", "%c": "%-m", "%d": "%d", "%e": "%-d",
+    "%H": "%H", "%k": "%-H", "%h": "%I", "%I": "%I", "%i": "%M", "%s": "%S", "%S": "%S",
+    "%p": "%p", "%M": "%B", "%b": "%b", "%W": "%A", "%a": "%a", "%T": "%H:%M:%S", "%%": "%%",
+}
+
+
+def _date_format(value, fmt):
+    if value is None or fmt is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    return value.strftime(re.sub(r"%.", lambda m: _DATE_FORMAT_CODES.get(m.group(0), m.group(0)[1:]), fmt))
+
+
+_ENUM_CHECK = re.compile(r"CHECK\s*\(\s*(\w+)\s+IN\s*\(([^)]*)\)\s*\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _enum_checks(create_sql):
+    return {column: f"enum({values.replace(' ', '')})" for column, values in _ENUM_CHECK.findall(create_sql or "")}
+
+
+def _enum_type(create_sql, column):
+    return _enum_checks(create_sql).get(column)
+
+
+# MySQL's information_schema.COLUMNS, enough for the backend's catalog queries
+_CATALOG_VIEW = """
+    CREATE TEMP VIEW IF NOT EXISTS information_schema_columns AS
+    SELECT
+        'main' AS TABLE_SCHEMA,
+        m.name AS TABLE_NAME,
+        p.name AS COLUMN_NAME,
+        p.cid + 1 AS ORDINAL_POSITION,
+        p.dflt_value AS COLUMN_DEFAULT,
+        CASE WHEN p."notnull" OR p.pk THEN 'NO' ELSE 'YES' END AS IS_NULLABLE,
+        COALESCE(ats_enum_type(m.sql, p.name), lower(p.type)) AS COLUMN_TYPE,
+        CASE WHEN ats_enum_type(m.sql, p.name) IS NOT NULL THEN 'enum'
+             ELSE lower(rtrim(p.type, '(0123456789,) ')) END AS DATA_TYPE,
+        CASE WHEN p.pk THEN 'PRI' ELSE '' END AS COLUMN_KEY
+    FROM sqlite_master m, pragma_table_info(m.name) p
+    WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+"""
+
+
+# -------------------------------------
+# Dialect shim
+# -------------------------------------
+_QUOTED = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\")")
+_SHOW_COLUMNS = re.compile(r"^\s*SHOW\s+(?:FULL\s+)?COLUMNS\s+FROM\s+`?(\w+)`?(?:\s+LIKE\s+('[^']*'))?\s*;?\s*$", re.IGNORECASE)
+_SHOW_CREATE = re.compile(r"^\s*SHOW\s+CREATE\s+TABLE\s+`?(\w+)`?\s*;?\s*$", re.IGNORECASE)
+_SHOW = re.compile(r"^\s*SHOW\b", re.IGNORECASE)
+
+_REWRITES = [
+    (re.compile(r"\bINSERT\s+IGNORE\s+INTO\b", re.IGNORECASE), "INSERT OR IGNORE INTO"),
+    (re.compile(r"\bNOW\(\)\s*-\s*INTERVAL\s+(\?|\d+)\s+(DAY|HOUR|MINUTE|SECOND)\b", re.IGNORECASE),
+     lambda m: f"datetime('now', '-' || {m.group(1)} || ' {m.group(2).lower()}s')"),
+    (re.compile(r"\b(?:NOW|CURRENT_TIMESTAMP)\(\)", re.IGNORECASE), "CURRENT_TIMESTAMP"),
+    (re.compile(r"\bDATABASE\(\)", re.IGNORECASE), "'main'"),
+    (re.compile(r"\binformation_schema\.COLUMNS\b", re.IGNORECASE), "information_schema_columns"),
+]
+
+
+_UPSERT = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_UPSERT_VALUE = re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.IGNORECASE)
+
+
+def _rewrite(code, in_upsert):
+    code = code.replace("%s", "?")
+    for pattern, replacement in _REWRITES:
+        code = pattern.sub(replacement, code)
+    if in_upsert:
+        return _UPSERT_VALUE.sub(r"excluded.\1", code), True
+    parts = _UPSERT.split(code, maxsplit=1)
+    if len(parts) == 1:
+        return code, False
+    # Only in the update list does VALUES(col) mean "the row that failed to insert"
+    return parts[0] + "ON CONFLICT DO UPDATE SET" + _UPSERT_VALUE.sub(r"excluded.\1", parts[1]), True
+
+
+@lru_cache(maxsize=1024)
+def translate(sql):
+    """MySQL statement -> SQLite statement; string literals are left untouched."""
+    match = _SHOW_COLUMNS.match(sql)
+    if match:
+        like = f" AND COLUMN_NAME LIKE {match.group(2)}" if match.group(2) else ""
+        return (
+            "SELECT COLUMN_NAME AS Field, COLUMN_TYPE AS Type, IS_NULLABLE AS \"Null\", "
+            "COLUMN_KEY AS \"Key\", COLUMN_DEFAULT AS \"Default\", '' AS Extra "
+            f"FROM information_schema_columns WHERE TABLE_NAME = '{match.group(1)}'{like} "
+            "ORDER BY ORDINAL_POSITION"
+        )
+    match = _SHOW_CREATE.match(sql)
+    if match:
+        return f"SELECT name AS \"Table\", sql AS \"Create Table\" FROM sqlite_master WHERE type = 'table' AND name = '{match.group(1)}'"
+    if _SHOW.match(sql):
+        raise errors.NotSupportedError(f"Not supported by the SQLite backend: {sql.strip()[:60]}")
+
+    out, in_upsert = [], False
+    for i, part in enumerate(_QUOTED.split(sql)):
+        if not i % 2:
+            part, in_upsert = _rewrite(part, in_upsert)
+        out.append(part)
+    return "".join(out)
+
+
+# -------------------------------------
+# Errors
+# -------------------------------------
+def _mysql_error(e):
+    """Re-raise an sqlite3 error as the mysql.connector error callers handle."""
+    msg = str(e)
+    lowered = msg.lower()
+    if isinstance(e, sqlite3.IntegrityError):
+        if "unique" in lowered:
+            errno = errorcode.ER_DUP_ENTRY
+        elif "foreign key" in lowered:
+            errno = errorcode.ER_NO_REFERENCED_ROW_2
+        elif "not null" in lowered:
+            errno = errorcode.ER_BAD_NULL_ERROR
+        else:
+            errno = errorcode.ER_CHECK_CONSTRAINT_VIOLATED
+        return errors.IntegrityError(msg=msg, errno=errno)
+    if "locked" in lowered or "busy" in lowered:
+        return errors.OperationalError(msg=msg, errno=errorcode.ER_LOCK_WAIT_TIMEOUT)
+    if "interrupted" in lowered:
+        return errors.DatabaseError(msg=msg, errno=errorcode.ER_QUERY_TIMEOUT)
+    if "no such table" in lowered:
+        return errors.ProgrammingError(msg=msg, errno=errorcode.ER_NO_SUCH_TABLE)
+    if "no such column" in lowered:
+        return errors.ProgrammingError(msg=msg, errno=errorcode.ER_BAD_FIELD_ERROR)
+    if "syntax error" in lowered:
+        return errors.ProgrammingError(msg=msg, errno=errorcode.ER_PARSE_ERROR)
+    if isinstance(e, sqlite3.OperationalError):
+        return errors.OperationalError(msg=msg)
+    return errors.DatabaseError(msg=msg)
+
+
+# -------------------------------------
+# Connection / cursor
+# -------------------------------------
+class SQLiteCursor:
+    """mysql.connector-style cursor over an sqlite3 cursor."""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._conn.cursor()
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(col[0] for col in self._cursor.description or ())
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    def execute(self, operation, params=None, multi=False):
+        try:
+            self._cursor.execute(translate(operation), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        return None
+
+    def executemany(self, operation, seq_params):
+        try:
+            self._cursor.executemany(translate(operation), [tuple(p) for p in seq_params])
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def _fetch(self, fetch, *args):
+        try:
+            return fetch(*args)
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def fetchone(self):
+        return self._row(self._fetch(self._cursor.fetchone))
+
+    def fetchmany(self, size=1):
+        return [self._row(r) for r in self._fetch(self._cursor.fetchmany, size)]
+
+    def fetchall(self):
+        if self._cursor.description is None:
+            return []
+        return [self._row(r) for r in self._fetch(self._cursor.fetchall)]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+        return True
+
+
+class SQLiteConnection:
+    """The part of a mysql.connector connection the pool and callers use."""
+
+    def __init__(self, database, busy_timeout=5.0):
+        uri = database.startswith("file:")
+        if database == ":memory:":
+            # Pooled connections must share one in-memory database
+            database, uri = "file:ats_memory?mode=memory&cache=shared", True
+        try:
+            self._conn = sqlite3.connect(
+                database,
+                timeout=busy_timeout,
+                uri=uri,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,  # pooled: one thread at a time, not always the same one
+            )
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        self.database = database
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if not uri:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.create_function("CONCAT", -1, _concat, deterministic=True)
+        self._conn.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+        self._conn.create_function("ats_enum_type", 2, _enum_type, deterministic=True)
+        self._conn.create_function("GET_LOCK", 2, lambda name, timeout: 1)
+        self._conn.create_function("RELEASE_LOCK", 1, lambda name: 1)
+        self._conn.execute(_CATALOG_VIEW)
+        # The request deadline also bounds SQLite work (MAX_EXECUTION_TIME is a MySQL hint)
+        self._conn.set_progress_handler(lambda: 1 if deadline.expired() else 0, PROGRESS_STEPS)
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def cursor(self, buffered=None, dictionary=False, prepared=None, **kwargs):
+        # Every SQLite cursor is "buffered" (rows are local) and sqlite3 keeps
+        # its own per-connection statement cache, so prepared is implicit.
+        return SQLiteCursor(self, dictionary=dictionary)
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self._conn.execute("SELECT 1")
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def consume_results(self):
+        pass
+
+    def executescript(self, script):
+        try:
+            self._conn.executescript(script)
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(database, busy_timeout=5.0, **_mysql_options):
+    return SQLiteConnection(database, busy_timeout)
+
+
+# -------------------------------------
+# Schema
+# -------------------------------------
+def schema_version():
+    """Migration version migrations/sqlite_schema.sql corresponds to."""
+    match = _SCHEMA_VERSION.search(SCHEMA_FILE.read_text(encoding="utf-8"))
+    return int(match.group(1)) if match else 0
+
+
+def _strip_foreign_keys(ddl):
+    lines = [line for line in ddl.splitlines() if "FOREIGN KEY" not in line]
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith(")") and i and lines[i - 1].rstrip().endswith(","):
+            lines[i - 1] = lines[i - 1].rstrip()[:-1]
+    return "\n".join(lines)
+
+
+def create_schema(conn):
+    """
+    Create every table at head on ``conn`` (a pooled SQLite connection) and
+    commit. Indexes and archive tables come from migrations 0004 and 0006,
+    so their lists are maintained in one place for both backends.
+    """
+    indexes = importlib.import_module("migrations.0004_hot_path_indexes").INDEXES
+    archived = importlib.import_module("migrations.0006_archive_tables").TABLES
+
+    conn.executescript(SCHEMA_FILE.read_text(encoding="utf-8"))
+    cursor = conn.cursor()
+    try:
+        for table, name, columns in indexes:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        for table in archived:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+            ddl = re.sub(rf"^CREATE TABLE\s+(?:IF NOT EXISTS\s+)?\"?{table}\"?",
+                         f"CREATE TABLE IF NOT EXISTS {table}_archive", cursor.fetchone()[0], count=1)
+            cursor.execute(_strip_foreign_keys(ddl))
+        conn.commit()
+    finally:
+        cursor.close()
@@ -0,0 +1,92 @@
+"""
+Streaming responses for large list reads.
+
+``?stream=1`` sends the same JSON array as the buffered endpoint, and
+``?stream=ndjson`` (or ``Accept: application/x-ndjson``) sends one JSON object
+per line. Either way rows are read from an unbuffered cursor with fetchmany()
+and written out chunk by chunk, so memory stays flat regardless of table size.
+"""
+from flask import Response, current_app, request, stream_with_context
+
+from utils import deadline
+from utils.db import get_db_connection
+from utils.pagination import order_by_clause
+
+CHUNK_SIZE = 500
+
+NDJSON = "application/x-ndjson"
+
+
+def stream_format():
+    """Return "ndjson", "json" or None (buffered response) for the current request."""
+    stream = request.args.get("stream", "").lower()
+    if stream == "ndjson":
+        return "ndjson"
+    if stream in ("1", "true", "yes", "json"):
+        return "json"
+    if request.accept_mimetypes.best == NDJSON:
+        return "ndjson"
+    return None
+
+
+def _finish(conn, cursor, exhausted):
+    try:
+        if not exhausted:
+            # Client went away mid-stream: drain the unread result so the
+            # connection is usable again before it goes back to the pool
+            conn.consume_results()
+        cursor.close()
+    except Exception as e:
+        print("⚠️ Stream cleanup failed:", e)
+    finally:
+        conn.close()
+
+
+def stream_select(columns, source, keys, fmt, where=None, params=()):
+    """
+    Stream ``SELECT columns FROM source [WHERE where] ORDER BY keys``.
+
+    The query runs before the response starts, so connection and SQL errors
+    still surface as a normal error response from the caller's try block.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise RuntimeError("Database connection failed")
+
+    where_sql = f"WHERE {where}" if where else ""
+    try:
+        cursor = conn.cursor(dictionary=True)  # unbuffered: rows stay on the server
+        # An export may legitimately outlive the request budget: no MAX_EXECUTION_TIME
+        with deadline.suspended():
+            cursor.execute(f"SELECT {columns} FROM {source} {where_sql} {order_by_clause(keys)}", tuple(params))
+    except Exception:
+        conn.close()
+        raise
+
+    dumps = current_app.json.dumps
+
+    def generate():
+        exhausted = False
+        sent = 0
+        try:
+            if fmt == "json":
+                yield "["
+            while True:
+                rows = cursor.fetchmany(CHUNK_SIZE)
+                if not rows:
+                    break
+                if fmt == "json":
+                    chunk = ",".join(dumps(row) for row in rows)
+                    yield ("," if sent else "") + chunk
+                else:
+                    yield "".join(dumps(row) + "\n" for row in rows)
+                sent += len(rows)
+            exhausted = True
+            if fmt == "json":
+                yield "]"
+            print(f"✅ Streamed {sent} rows from {source.split()[0]}")
+        finally:
+            _finish(conn, cursor, exhausted)
+
+    mimetype = NDJSON if fmt == "ndjson" else "application/json"
+    return Response(stream_with_context(generate()), mimetype=mimetype)
@@ -0,0 +1,37 @@
+"""
+Per-process LRU cache with expiring entries, shared by the shard map
+(utils/sharding.py), count snapshots (utils/approx_counts.py) and the
+screening cache (utils/screening_cache.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Small thread-safe LRU whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl, size):
+        self.ttl = ttl
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
@@ -0,0 +1,13 @@
+"""
+WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With gunicorn.conf.py the app is built (and the schema / admin checks run)
+once in the master, and workers are forked from it.
+"""
+from app import create_app, ensure_admin_exists, initialize_database
+
+app = create_app()
+initialize_database()
+ensure_admin_exists()